@@ -3,3 +3,4 @@ from . import models
 # Register your models here.
 admin.site.register(models.SudokuPuzzle)
 admin.site.register(models.PuzzleCell)
+admin.site.register(models.SolveJob)
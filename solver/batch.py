@@ -0,0 +1,196 @@
+from __future__ import unicode_literals
+import numpy as np
+from . import engine
+from .exceptions import ContradictionError
+
+# numpy versions of the engine's mask tables
+BIT = np.array(engine.BIT, dtype=np.uint16)
+POPCOUNT = np.array(engine.POPCOUNT, dtype=np.uint8)
+MASK_VAL = np.array([vals[0] if vals else 0 for vals in engine.MASK_VALS],
+                    dtype=np.int8)  # lowest value of every mask
+
+
+def to_sqrs(arr):
+    """ Regroups a (N, 9, 9) array by square. Applying it twice gives
+        back the original array.
+
+        Args:
+            - arr (numpy.ndarray): indexed by puzzle, row and column.
+
+        Returns:
+            - numpy.ndarray: (N, 9, 9) indexed by puzzle, square and
+                position inside the square.
+    """
+    return arr.reshape(-1, 3, 3, 3, 3).swapaxes(2, 3).reshape(-1, 9, 9)
+
+
+def get_cand_masks(grids):
+    """ Gets the possible values masks of every cell of a stack of
+        puzzles.
+
+        Args:
+            - grids (numpy.ndarray): (N, 9, 9), 0 means unknown value.
+
+        Returns:
+            - numpy.ndarray: (N, 9, 9) 9-bit masks, 0 for known cells.
+    """
+    bits = BIT[grids]
+    rows = np.bitwise_or.reduce(bits, axis=2)[:, :, np.newaxis]
+    cols = np.bitwise_or.reduce(bits, axis=1)[:, np.newaxis, :]
+    sqrs = np.bitwise_or.reduce(to_sqrs(bits), axis=2)
+    # square k covers rows 3 * (k // 3) and cols 3 * (k % 3) onwards
+    sqrs = sqrs.reshape(-1, 3, 1, 3, 1).repeat(3, 2).repeat(3, 4)
+
+    known = rows | cols | sqrs.reshape(-1, 9, 9)
+    return np.where(grids == 0, engine.ALL_MASK & ~known, 0).astype(
+        np.uint16)
+
+
+def get_unique_masks(masks):
+    """ Gets the values that are possible in only one cell of each unit.
+
+        Args:
+            - masks (numpy.ndarray): (N, 9, 9) indexed by puzzle, unit
+                and cell in the unit.
+
+        Returns:
+            - numpy.ndarray: (N, 9) masks.
+    """
+    once = np.zeros(masks.shape[:2], dtype=np.uint16)
+    twice = np.zeros(masks.shape[:2], dtype=np.uint16)
+
+    for cell in range(9):
+        twice |= once & masks[:, :, cell]
+        once |= masks[:, :, cell]
+
+    return once & ~twice
+
+
+def get_singles(masks):
+    """ Applies single candidate and single position to every puzzle
+        at once.
+
+        Args:
+            - masks (numpy.ndarray): (N, 9, 9) from get_cand_masks.
+
+        Returns:
+            - numpy.ndarray: (N, 9, 9) values found, 0 where none.
+    """
+    found = np.where(POPCOUNT[masks] == 1, masks, 0)
+    found |= masks & get_unique_masks(masks)[:, :, np.newaxis]
+    found |= masks & get_unique_masks(masks.swapaxes(1, 2))[:, np.newaxis]
+
+    sqr_masks = to_sqrs(masks)
+    found |= to_sqrs(
+        sqr_masks & get_unique_masks(sqr_masks)[:, :, np.newaxis])
+
+    # two values for the same cell only happen in unsolvable puzzles,
+    # the repeated value they leave behind is caught by is_valid_batch
+    return MASK_VAL[found]
+
+
+def propagate(grids):
+    """ Applies the solving algorithms to a stack of puzzles until they
+        stop finding values. Puzzles drop out as soon as a pass finds
+        nothing in them.
+
+        Args:
+            - grids (numpy.ndarray): (N, 9, 9), filled in place.
+    """
+    active = np.arange(len(grids))
+
+    while len(active):
+        sub = grids[active]
+        found = get_singles(get_cand_masks(sub))
+        progress = (found != 0).any(axis=(1, 2))
+
+        active = active[progress]
+        grids[active] = np.where(found != 0, found, sub)[progress]
+
+
+def get_invalid_units(grids):
+    """ Finds the rows, columns and squares where a value repeats in a
+        stack of puzzles: a unit's values mask has fewer bits than it has
+        known values.
+
+        Args:
+            - grids (numpy.ndarray): (N, 9, 9), 0 means unknown value.
+
+        Returns:
+            - numpy.ndarray: (N, 27) booleans, rows then columns then
+                squares, as in units.UNITS.
+    """
+    bits = BIT[grids]
+    known = grids != 0
+    invalid = []
+
+    for unit_bits, unit_known in ((bits, known),
+                                  (bits.swapaxes(1, 2), known.swapaxes(1, 2)),
+                                  (to_sqrs(bits), to_sqrs(known))):
+        masks = np.bitwise_or.reduce(unit_bits, axis=2)
+        invalid.append(POPCOUNT[masks] != unit_known.sum(axis=2))
+
+    return np.concatenate(invalid, axis=1)
+
+
+def get_first_invalid_units(grids):
+    """ Gets the first unit where a value repeats in every puzzle.
+
+        Args:
+            - grids (numpy.ndarray): (N, 9, 9), 0 means unknown value.
+
+        Returns:
+            - numpy.ndarray: (N,) indexes into units.UNITS, -1 for valid
+                puzzles.
+    """
+    invalid = get_invalid_units(grids)
+    return np.where(invalid.any(axis=1), invalid.argmax(axis=1), -1)
+
+
+def is_valid_batch(grids):
+    """ Checks that no value repeats in a row, column or square.
+
+        Args:
+            - grids (numpy.ndarray): (N, 9, 9), 0 means unknown value.
+
+        Returns:
+            - numpy.ndarray: (N,) booleans.
+    """
+    return ~get_invalid_units(grids).any(axis=1)
+
+
+def solve_batch(puzzles, chunk_size=10000):
+    """ Solves a stack of puzzles. Single candidate and single position
+        run vectorized over all of them; only the puzzles they can't
+        finish are searched one by one.
+
+        Args:
+            - puzzles (numpy.ndarray): (N, 9, 9), 0 means unknown value.
+            - chunk_size (int): puzzles propagated at once.
+
+        Returns:
+            - numpy.ndarray: (N, 9, 9) solved puzzles. Puzzles without a
+                solution are returned as given.
+    """
+    puzzles = np.asarray(puzzles).reshape(-1, 9, 9)
+
+    if ((puzzles < 0) | (puzzles > 9)).any():
+        raise ValueError("Invalid value")
+
+    solved = puzzles.astype(np.int8)
+
+    for start in range(0, len(solved), chunk_size):
+        grids = solved[start:start + chunk_size]
+        propagate(grids)
+        stalled = np.nonzero((grids == 0).any(axis=(1, 2)))[0]
+
+        for n in stalled:
+            try:
+                grids[n] = engine.solve(grids[n].tolist())[0]
+            except ContradictionError:
+                pass
+
+        failed = (grids == 0).any(axis=(1, 2)) | ~is_valid_batch(grids)
+        grids[failed] = puzzles[start:start + chunk_size][failed]
+
+    return solved.astype(puzzles.dtype)
@@ -0,0 +1,157 @@
+from __future__ import unicode_literals
+from collections import OrderedDict
+import resource
+from timeit import default_timer as timer
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+import numpy as np
+from sudoku_solver import utils
+from . import formats, generator
+from .exceptions import InvalidPuzzleError
+from .models import SudokuPuzzle
+
+# the test_solver puzzles, a corpus each
+STATIC_PATHS = tuple('static/txt/test_%s.txt' % difficulty
+                     for difficulty in ('easy', 'medium', 'hard'))
+# generated corpora, expert puzzles take seconds each to generate
+DIFFICULTIES = ('easy', 'medium', 'hard', 'extreme')
+PERCENTILES = (50, 95, 99)
+# result keys where a higher value is worse
+LOWER_IS_BETTER = ('p50_ms', 'p95_ms', 'p99_ms', 'queries_per_solve')
+
+
+def read_puzzles(path):
+    """ Reads the puzzles of a file, see formats.iter_records.
+
+        Returns:
+            - list: 9x9 nested lists.
+    """
+    with open(path, 'rb') as f:
+        return [utils.str_to_grid(record[2])
+                for record in formats.iter_records(f)]
+
+
+def get_corpora(count, seed=0, paths=()):
+    """ Builds the benchmark corpora: the STATIC_PATHS puzzles, named by
+        their path, and count puzzles of every difficulty, from
+        generator.generate with seeds from seed on. The same seed gives
+        the same corpora.
+
+        Args:
+            - count (int): puzzles per difficulty.
+            - seed (int)
+            - paths (iterable): more puzzle files, a corpus each.
+
+        Returns:
+            - OrderedDict: corpus name: list of 9x9 nested lists.
+    """
+    corpora = OrderedDict()
+
+    for path in STATIC_PATHS:
+        corpora[path] = read_puzzles(path)
+
+    for difficulty in DIFFICULTIES:
+        corpora[difficulty] = [
+            generator.generate(seed + i, difficulty)[0]
+            for i in range(count)]
+
+    for path in paths:
+        corpora[path] = read_puzzles(path)
+
+    return corpora
+
+
+def run(puzzles, method):
+    """ Solves puzzles one by one through SudokuPuzzle.solve, without
+        the solution cache. Nothing is left in the database.
+
+        Args:
+            - puzzles (list): 9x9 nested lists.
+            - method (str): one of engine.METHODS.
+
+        Returns:
+            - OrderedDict: the corpus results, zeroed for an empty
+                corpus.
+    """
+    if not puzzles:
+        result = OrderedDict(
+            (key, 0) for key in ('puzzles', 'solved', 'puzzles_per_sec'))
+        for percentile in PERCENTILES:
+            result['p%i_ms' % percentile] = 0.0
+        result['queries_per_solve'] = 0.0
+        return result
+
+    times = []
+    queries = 0
+    solved = 0
+
+    for grid in puzzles:
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as captured:
+                start = timer()
+                puzzle = SudokuPuzzle(unsolved_puzzle=grid)
+                try:
+                    solved += puzzle.solve(method=method, use_cache=False)
+                except InvalidPuzzleError:
+                    pass  # counted as not solved
+                times.append(timer() - start)
+
+            queries += len(captured)
+            transaction.set_rollback(True)
+
+    times = np.array(times) * 1000
+    result = OrderedDict((
+        ('puzzles', len(puzzles)),
+        ('solved', solved),
+        ('puzzles_per_sec', round(len(puzzles) / (times.sum() / 1000), 1)),
+    ))
+    for percentile in PERCENTILES:
+        result['p%i_ms' % percentile] = round(
+            np.percentile(times, percentile), 3)
+    result['queries_per_solve'] = round(float(queries) / len(puzzles), 2)
+
+    return result
+
+
+def get_peak_memory():
+    """ Gets the peak resident memory of the whole process so far, in
+        KB, not of any one corpus.
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def get_regressions(report, baseline, tolerance=0.1):
+    """ Compares a report with a baseline one.
+
+        Args:
+            - report (dict): from bench_solver.
+            - baseline (dict): from bench_solver.
+            - tolerance (float): fraction a result may be worse by.
+
+        Returns:
+            - list: one message per result that got worse.
+    """
+    regressions = []
+
+    for name, result in report['corpora'].items():
+        base = baseline['corpora'].get(name)
+
+        if base is None:
+            continue
+
+        for key, value in result.items():
+            if key not in base or key in ('puzzles', 'solved'):
+                continue
+            if key in LOWER_IS_BETTER:
+                worse = value > base[key] * (1 + tolerance)
+            else:
+                worse = value < base[key] * (1 - tolerance)
+            if worse:
+                regressions.append("%s %s: %s, baseline %s" % (
+                    name, key, value, base[key]))
+
+        if result['solved'] < base['solved']:
+            regressions.append("%s solved: %i, baseline %i" % (
+                name, result['solved'], base['solved']))
+
+    return regressions
@@ -0,0 +1,190 @@
+from __future__ import unicode_literals
+from collections import OrderedDict
+import threading
+from django.conf import settings
+from django.core.cache import caches
+from sudoku_solver import utils
+from . import symmetry
+
+KEY_PREFIX = 'solver:solution:'
+
+
+class CacheKey(object):
+    """ Key of a puzzle in a SolutionCache: the 81 digit fingerprint of
+        the puzzle, and the one of its symmetry.canonicalize form, which
+        takes milliseconds and is only worked out when needed.
+    """
+
+    def __init__(self, grid):
+        """
+            Args:
+                - grid (list): 9x9 unsolved puzzle, must not repeat
+                    values in a row, column or square.
+        """
+        self.grid = grid
+        self.fingerprint = utils.grid_to_str(grid)
+        self.canonical = None  # (fingerprint, symmetry.Transform)
+
+    def get_canonical(self):
+        """ Gets the canonical fingerprint and the transform giving it. """
+        if self.canonical is None:
+            grid, transform = symmetry.canonicalize(self.grid)
+            self.canonical = (utils.grid_to_str(grid), transform)
+        return self.canonical
+
+
+class SolutionCache(object):
+    """ In-process LRU cache of solved puzzles, keyed by the 81 digit
+        fingerprint of the unsolved puzzle. Optionally backed by a
+        django cache so processes can share solutions.
+
+        With canonical keys solutions are also stored under the
+        fingerprint of the puzzle's symmetry.canonicalize form, so
+        relabelled, transposed or permuted copies of a puzzle share it.
+        The exact fingerprint is looked up first, so repeated puzzles
+        are served without canonicalizing them.
+    """
+
+    def __init__(self, max_size=1024, shared_cache=None, canonical=False):
+        """
+            Args:
+                - max_size (int): solutions kept in memory.
+                - shared_cache (django cache or None): second tier,
+                    checked on in-process misses.
+                - canonical (bool): whether to key by canonical form.
+        """
+        self.max_size = max_size
+        self.shared_cache = shared_cache
+        self.canonical = canonical
+        self.solutions = OrderedDict()  # least recently used first
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0  # hits served by shared_cache
+        self.misses = 0
+
+    def get_key(self, grid):
+        """ Gets the cache key of a puzzle.
+
+            Args:
+                - grid (list): 9x9 unsolved puzzle, must not repeat
+                    values in a row, column or square.
+
+            Returns:
+                - CacheKey
+        """
+        return CacheKey(grid)
+
+    def get(self, key):
+        """ Gets the solution of a puzzle.
+
+            Args:
+                - key (CacheKey): from get_key.
+
+            Returns:
+                - list or None: 9x9 solved puzzle, None if not cached.
+        """
+        solution = self.lookup(key.fingerprint)
+
+        if solution is None and self.canonical:
+            fingerprint, transform = key.get_canonical()
+            solution = self.lookup(fingerprint)
+
+            if solution is not None:
+                solution = utils.grid_to_str(
+                    transform.revert(utils.str_to_grid(solution)))
+                # the next lookup of this puzzle is an exact one
+                self.save(key.fingerprint, solution)
+
+        if solution is None:
+            with self.lock:
+                self.misses += 1
+            return None
+
+        return utils.str_to_grid(solution)
+
+    def lookup(self, fingerprint):
+        """ Gets a solution string from either tier, counting hits. """
+        with self.lock:
+            solution = self.solutions.pop(fingerprint, None)
+
+            if solution is not None:
+                # most recently used now
+                self.solutions[fingerprint] = solution
+                self.hits += 1
+
+        if solution is None and self.shared_cache is not None:
+            solution = self.shared_cache.get(KEY_PREFIX + fingerprint)
+
+            if solution is not None:
+                self.store(fingerprint, solution)
+                with self.lock:
+                    self.hits += 1
+                    self.shared_hits += 1
+
+        return solution
+
+    def set(self, key, solution):
+        """ Caches the solution of a puzzle, under its exact and, for
+            canonical keys, its canonical fingerprint.
+
+            Args:
+                - key (CacheKey): from get_key.
+                - solution (list): 9x9 solved puzzle.
+        """
+        self.save(key.fingerprint, utils.grid_to_str(solution))
+
+        if self.canonical:
+            fingerprint, transform = key.get_canonical()
+            if fingerprint != key.fingerprint:
+                self.save(fingerprint, utils.grid_to_str(
+                    transform.apply(solution)))
+
+    def save(self, fingerprint, solution):
+        """ Stores a solution string in both tiers. """
+        self.store(fingerprint, solution)
+
+        if self.shared_cache is not None:
+            self.shared_cache.set(KEY_PREFIX + fingerprint, solution)
+
+    def store(self, key, solution):
+        with self.lock:
+            self.solutions.pop(key, None)
+            self.solutions[key] = solution
+
+            while len(self.solutions) > self.max_size:
+                self.solutions.popitem(last=False)
+
+    def clear(self):
+        """ Empties the in-process tier and resets the counters. """
+        with self.lock:
+            self.solutions.clear()
+            self.hits = 0
+            self.shared_hits = 0
+            self.misses = 0
+
+
+solution_cache = None
+
+
+def get_solution_cache():
+    """ Gets the process wide cache, built from the SOLVER_CACHE_SIZE,
+        SOLVER_CACHE_ALIAS and SOLVER_CACHE_CANONICAL settings on first
+        use.
+
+        Returns:
+            - SolutionCache or None: None if SOLVER_CACHE_SIZE is 0.
+    """
+    global solution_cache
+
+    if solution_cache is None:
+        max_size = getattr(settings, 'SOLVER_CACHE_SIZE', 1024)
+        alias = getattr(settings, 'SOLVER_CACHE_ALIAS', None)
+        canonical = getattr(settings, 'SOLVER_CACHE_CANONICAL', False)
+
+        if not max_size:
+            return None
+
+        solution_cache = SolutionCache(
+            max_size, caches[alias] if alias else None, canonical)
+
+    return solution_cache
@@ -0,0 +1,185 @@
+from __future__ import unicode_literals
+from .exceptions import ContradictionError
+from .units import CELLS, ROW_OF, COL_OF, SQR_OF
+
+# Exact cover columns. Every solution row (cell, value) covers one column
+# in each of these blocks of 81.
+CELL_COL = 0  # cell idx is filled
+ROW_COL = 81  # row i has value v
+COL_COL = 162  # column j has value v
+SQR_COL = 243  # square k has value v
+COLUMNS = 324
+
+
+class DancingLinks(object):
+    """ Sudoku as an exact cover problem, solved with Knuth's
+        Algorithm X on a dancing links matrix.
+
+        Node 0 is the root, nodes 1 to 324 are the column headers and
+        the rest are the (cell, value) rows. Columns already covered by
+        the clues, and rows clashing with them, are left out of the
+        matrix.
+    """
+
+    def __init__(self, grid):
+        """
+            Args:
+                - grid (list): 9x9 nested list, 0 means unknown value.
+
+            Raises:
+                - ContradictionError: if the clues repeat a value.
+        """
+        self.values = [grid[ROW_OF[idx]][COL_OF[idx]] for idx in CELLS]
+        self.nodes = 0  # search nodes, rows tried
+
+        covered = set()
+        for idx in CELLS:
+            if self.values[idx] != 0:
+                for col in self.get_columns(idx, self.values[idx]):
+                    if col in covered:
+                        raise ContradictionError("Repeated value")
+                    covered.add(col)
+
+        header = [col for col in range(COLUMNS) if col not in covered]
+        size = len(header) + 1
+
+        self.left = [i - 1 for i in range(size)]
+        self.right = [i + 1 for i in range(size)]
+        self.left[0] = size - 1
+        self.right[size - 1] = 0
+        self.up = list(range(size))
+        self.down = list(range(size))
+        self.col = list(range(size))
+        self.size = [0] * size
+        self.row = [None] * size  # (cell idx, value) of every node
+
+        node_of = dict((col, i + 1) for i, col in enumerate(header))
+
+        for idx in CELLS:
+            if self.values[idx] == 0:
+                for val in range(1, 10):
+                    cols = self.get_columns(idx, val)
+                    if not covered.intersection(cols):
+                        self.add_row((idx, val), [node_of[c] for c in cols])
+
+    def get_columns(self, idx, val):
+        """ Gets the four columns covered by placing val in cell idx. """
+        return (CELL_COL + idx,
+                ROW_COL + ROW_OF[idx] * 9 + val - 1,
+                COL_COL + COL_OF[idx] * 9 + val - 1,
+                SQR_COL + SQR_OF[idx] * 9 + val - 1)
+
+    def add_row(self, row, cols):
+        first = len(self.col)
+
+        for i, col in enumerate(cols):
+            node = first + i
+            self.col.append(col)
+            self.row.append(row)
+            self.up.append(self.up[col])
+            self.down.append(col)
+            self.down[self.up[col]] = node
+            self.up[col] = node
+            self.size[col] += 1
+            self.left.append(node - 1 if i else first + len(cols) - 1)
+            self.right.append(node + 1 if i < len(cols) - 1 else first)
+
+    def cover(self, col):
+        left, right, up, down = self.left, self.right, self.up, self.down
+        right[left[col]] = right[col]
+        left[right[col]] = left[col]
+
+        i = down[col]
+        while i != col:
+            j = right[i]
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                self.size[self.col[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def uncover(self, col):
+        left, right, up, down = self.left, self.right, self.up, self.down
+
+        i = up[col]
+        while i != col:
+            j = left[i]
+            while j != i:
+                self.size[self.col[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+
+        right[left[col]] = col
+        left[right[col]] = col
+
+    def iter_solutions(self):
+        """ Generates every solution of the puzzle.
+
+            Returns:
+                - generator: 9x9 nested lists
+        """
+        right = self.right
+
+        if right[0] == 0:
+            yield [self.values[i*9:i*9+9] for i in range(9)]
+            return
+
+        # column with the fewest rows left
+        col = right[0]
+        j = right[col]
+        while j != 0:
+            if self.size[j] < self.size[col]:
+                col = j
+            j = right[j]
+
+        if self.size[col] == 0:
+            return
+
+        self.cover(col)
+
+        i = self.down[col]
+        while i != col:
+            self.nodes += 1
+            idx, val = self.row[i]
+            self.values[idx] = val
+
+            j = right[i]
+            while j != i:
+                self.cover(self.col[j])
+                j = right[j]
+
+            for solution in self.iter_solutions():
+                yield solution
+
+            j = self.left[i]
+            while j != i:
+                self.uncover(self.col[j])
+                j = self.left[j]
+
+            self.values[idx] = 0
+            i = self.down[i]
+
+        self.uncover(col)
+
+
+def solve(grid):
+    """ Solves a puzzle with dancing links.
+
+        Args:
+            - grid (list): 9x9 nested list, 0 means unknown value.
+
+        Returns:
+            - tuple: (solved 9x9 nested list, dict with solving stats)
+
+        Raises:
+            - ContradictionError: if the puzzle has no solution.
+    """
+    links = DancingLinks(grid)
+
+    for solution in links.iter_solutions():
+        return solution, {'nodes': links.nodes}
+
+    raise ContradictionError("Puzzle has no solution")
@@ -0,0 +1,716 @@
+from __future__ import unicode_literals
+from collections import OrderedDict
+from itertools import combinations
+from timeit import default_timer as timer
+from . import dlx, profiling
+from .exceptions import ContradictionError
+from .units import (CELLS, ROW_OF, COL_OF, SQR_OF, ROWS, COLS, SQRS, UNITS,
+                    CELL_UNITS)
+
+ALL_POSS = frozenset(range(1, 10))  # all possibilities
+METHODS = ('logic', 'dlx')  # solving methods
+# SolvingEngine methods applied by run, easiest first, and their stats keys
+TECHNIQUES = ('single_cand', 'single_pos', 'naked_pairs', 'hidden_pairs',
+              'pointing_pairs', 'box_line', 'naked_triples', 'hidden_triples',
+              'x_wing', 'swordfish')
+# applied after every search guess, the rest rarely pay for themselves there
+SEARCH_TECHNIQUES = TECHNIQUES[:6]
+TECHNIQUE_STATS = ('calls', 'placements', 'eliminations', 'time')
+
+# Values are kept as 9-bit masks, value v is bit (v - 1).
+ALL_MASK = 0x1ff
+BIT = (0,) + tuple(1 << (val - 1) for val in range(1, 10))  # BIT[val]
+MASK_VALS = tuple(tuple(val for val in range(1, 10) if mask & BIT[val])
+                  for mask in range(ALL_MASK + 1))
+POPCOUNT = tuple(len(vals) for vals in MASK_VALS)
+UNIT_TYPES = ('row', 'col', 'sqr')  # order of units.CELL_UNITS
+# (cells in both, rest of the line, rest of the square) of every row or
+# column crossing a square
+INTERSECTIONS = tuple(
+    (tuple(idx for idx in line if idx in sqr),
+     tuple(idx for idx in line if idx not in sqr),
+     tuple(idx for idx in sqr if idx not in line))
+    for sqr in SQRS for line in ROWS + COLS if set(sqr) & set(line))
+
+
+class SolvingEngine(object):
+    """ Solves a puzzle entirely in memory. No database access is done
+        here, callers decide what to persist once solving is over.
+    """
+
+    def __init__(self, grid):
+        """
+            Args:
+                - grid (list): 9x9 nested list, 0 means unknown value.
+        """
+        self.values = [0] * 81
+        self.rows = [0] * 9  # known values masks
+        self.cols = [0] * 9
+        self.sqrs = [0] * 9
+        self.eliminated = [0] * 81  # masks of values ruled out per cell
+        # placed cells and (cell, eliminated mask) tuples, in order
+        self.trail = []
+        self.stats = {
+            'iterations': 0,
+            'nodes': 0,
+            'guesses': 0,
+            'backtracks': 0,
+            'techniques': OrderedDict(
+                (name, dict.fromkeys(TECHNIQUE_STATS, 0))
+                for name in TECHNIQUES)}
+
+        for idx in CELLS:
+            if grid[ROW_OF[idx]][COL_OF[idx]] != 0:
+                self.place(idx, grid[ROW_OF[idx]][COL_OF[idx]])
+
+    def get_grid(self):
+        """ Returns the current values as a 9x9 nested list. """
+        return [self.values[i*9:i*9+9] for i in range(9)]
+
+    def get_known_vals_qty(self):
+        return 81 - self.values.count(0)
+
+    def get_cand_mask(self, idx):
+        """ Gets the possible values mask of an unknown cell.
+
+            Args:
+                - idx (int): flat cell index
+
+            Returns:
+                - int: 9-bit mask, bit (v - 1) set if v is possible
+        """
+        return ALL_MASK & ~(self.rows[ROW_OF[idx]] | self.cols[COL_OF[idx]] |
+                            self.sqrs[SQR_OF[idx]] | self.eliminated[idx])
+
+    def get_candidates(self, idx):
+        """ Gets the possible values of an unknown cell.
+
+            Args:
+                - idx (int): flat cell index
+
+            Returns:
+                - set: possible values for the cell
+        """
+        return set(MASK_VALS[self.get_cand_mask(idx)])
+
+    def place(self, idx, val):
+        bit = BIT[val]
+        self.values[idx] = val
+        self.rows[ROW_OF[idx]] |= bit
+        self.cols[COL_OF[idx]] |= bit
+        self.sqrs[SQR_OF[idx]] |= bit
+        self.trail.append(idx)
+
+    def eliminate(self, idx, mask):
+        """ Rules values out of an unknown cell's possibilities.
+
+            Args:
+                - idx (int): flat cell index
+                - mask (int): values to rule out
+
+            Returns:
+                - int: quantity of values ruled out, those that were
+                    still possible.
+        """
+        mask &= self.get_cand_mask(idx)
+
+        if mask:
+            self.eliminated[idx] |= mask
+            self.trail.append((idx, mask))
+
+        return POPCOUNT[mask]
+
+    def undo(self, mark):
+        """ Removes the values placed, and restores the ones eliminated,
+            after the trail had mark items.
+
+            Args:
+                - mark (int): trail length to go back to
+        """
+        while len(self.trail) > mark:
+            idx = self.trail.pop()
+
+            if idx.__class__ is tuple:
+                self.eliminated[idx[0]] &= ~idx[1]
+                continue
+
+            bit = ~BIT[self.values[idx]]
+            self.values[idx] = 0
+            self.rows[ROW_OF[idx]] &= bit
+            self.cols[COL_OF[idx]] &= bit
+            self.sqrs[SQR_OF[idx]] &= bit
+
+    def single_cand(self):
+        """ Fills every cell that has only one possible value.
+
+            Returns:
+                - int: quantity of values found
+        """
+        found = 0
+
+        for idx in CELLS:
+            if self.values[idx] == 0:
+                mask = self.get_cand_mask(idx)
+
+                if mask == 0:
+                    raise ContradictionError(
+                        "Invalid number of possibilities")
+                elif POPCOUNT[mask] == 1:
+                    self.place(idx, MASK_VALS[mask][0])
+                    found += 1
+
+        return found
+
+    def single_pos(self):
+        """ Fills every value that fits in only one cell of a
+            row, column or square.
+
+            Returns:
+                - int: quantity of values found
+        """
+        found = 0
+
+        for unit in UNITS:
+            known = 0
+            once = 0  # values possible in at least one cell
+            twice = 0  # values possible in at least two cells
+
+            for idx in unit:
+                if self.values[idx] == 0:
+                    mask = self.get_cand_mask(idx)
+                    twice |= once & mask
+                    once |= mask
+                else:
+                    known |= BIT[self.values[idx]]
+
+            if known | once != ALL_MASK:
+                raise ContradictionError("Value without position")
+
+            unique = once & ~twice
+
+            if unique:
+                for idx in unit:
+                    # a previous placement may have used the value
+                    mask = self.get_cand_mask(idx) & unique
+                    if self.values[idx] == 0 and mask:
+                        if POPCOUNT[mask] > 1:
+                            raise ContradictionError(
+                                "Invalid number of unique possiblities")
+                        self.place(idx, MASK_VALS[mask][0])
+                        unique &= ~mask
+                        found += 1
+
+        return found
+
+    def get_cand_masks(self):
+        """ Gets the possible values masks of every cell, 0 for known
+            ones, for techniques that look at them many times.
+
+            Returns:
+                - list: 81 9-bit masks
+        """
+        return [0 if self.values[idx] else self.get_cand_mask(idx)
+                for idx in CELLS]
+
+    def naked_pairs(self):
+        return self.naked_subsets(2)
+
+    def naked_triples(self):
+        return self.naked_subsets(3)
+
+    def naked_subsets(self, size):
+        """ Finds groups of size cells of a unit whose possibilities are
+            size values between them. Those values have to go in those
+            cells, so they're ruled out of the rest of the unit.
+
+            Args:
+                - size (int): 2 for pairs, 3 for triples.
+
+            Returns:
+                - int: quantity of values ruled out
+        """
+        found = 0
+        masks = self.get_cand_masks()
+
+        for unit in UNITS:
+            cells = [idx for idx in unit if masks[idx]]
+            if len(cells) <= size:
+                continue
+
+            for subset in combinations(
+                    [idx for idx in cells if POPCOUNT[masks[idx]] <= size],
+                    size):
+                mask = 0
+                for idx in subset:
+                    mask |= masks[idx]
+
+                if POPCOUNT[mask] < size:
+                    raise ContradictionError("Too few possibilities")
+                elif POPCOUNT[mask] == size:
+                    for idx in cells:
+                        if idx not in subset:
+                            found += self.eliminate(idx, mask)
+
+        return found
+
+    def hidden_pairs(self):
+        return self.hidden_subsets(2)
+
+    def hidden_triples(self):
+        return self.hidden_subsets(3)
+
+    def hidden_subsets(self, size):
+        """ Finds groups of size values that fit in only size cells of a
+            unit. Those cells have to take those values, so their other
+            possibilities are ruled out.
+
+            Args:
+                - size (int): 2 for pairs, 3 for triples.
+
+            Returns:
+                - int: quantity of values ruled out
+        """
+        found = 0
+        masks = self.get_cand_masks()
+
+        for unit in UNITS:
+            once = twice = thrice = four_times = 0
+            for idx in unit:
+                mask = masks[idx]
+                four_times |= thrice & mask
+                thrice |= twice & mask
+                twice |= once & mask
+                once |= mask
+
+            # values possible in 2 to size cells
+            few = twice & ~(thrice if size == 2 else four_times)
+            if POPCOUNT[few] < size:
+                continue
+
+            positions = []  # (value bit, mask of its cells in the unit)
+            for val in MASK_VALS[few]:
+                cells = 0
+                for pos, idx in enumerate(unit):
+                    if masks[idx] & BIT[val]:
+                        cells |= 1 << pos
+                positions.append((BIT[val], cells))
+
+            for subset in combinations(positions, size):
+                vals = 0
+                cells = 0
+                for bit, val_cells in subset:
+                    vals |= bit
+                    cells |= val_cells
+
+                if POPCOUNT[cells] < size:
+                    raise ContradictionError("Too few positions")
+                elif POPCOUNT[cells] == size:
+                    for pos in MASK_VALS[cells]:
+                        found += self.eliminate(
+                            unit[pos - 1], ALL_MASK & ~vals)
+
+        return found
+
+    def pointing_pairs(self):
+        """ Finds values whose possible cells in a square are all in one
+            row or column, and rules them out of the rest of that line.
+
+            Returns:
+                - int: quantity of values ruled out
+        """
+        found = 0
+        masks = self.get_cand_masks()
+
+        for shared, line_rest, sqr_rest in INTERSECTIONS:
+            mask = 0
+            for idx in shared:
+                mask |= masks[idx]
+            for idx in sqr_rest:
+                mask &= ~masks[idx]
+
+            if mask:
+                for idx in line_rest:
+                    if masks[idx]:
+                        found += self.eliminate(idx, mask)
+
+        return found
+
+    def box_line(self):
+        """ Box/line reduction: finds values whose possible cells in a
+            row or column are all in one square, and rules them out of
+            the rest of that square.
+
+            Returns:
+                - int: quantity of values ruled out
+        """
+        found = 0
+        masks = self.get_cand_masks()
+
+        for shared, line_rest, sqr_rest in INTERSECTIONS:
+            mask = 0
+            for idx in shared:
+                mask |= masks[idx]
+            for idx in line_rest:
+                mask &= ~masks[idx]
+
+            if mask:
+                for idx in sqr_rest:
+                    if masks[idx]:
+                        found += self.eliminate(idx, mask)
+
+        return found
+
+    def x_wing(self):
+        return self.fish(2)
+
+    def swordfish(self):
+        return self.fish(3)
+
+    def fish(self, size):
+        """ Finds size rows where a value fits only in the same size
+            columns, or the other way round. The value has to go in
+            those columns in those rows, so it's ruled out of the rest
+            of the columns.
+
+            Args:
+                - size (int): 2 for X-wing, 3 for Swordfish.
+
+            Returns:
+                - int: quantity of values ruled out
+        """
+        found = 0
+        masks = self.get_cand_masks()
+        # per value and row, mask of the columns it fits in, and the
+        # other way round
+        row_cols = [[0] * 9 for val in range(10)]
+        col_rows = [[0] * 9 for val in range(10)]
+
+        for idx in CELLS:
+            for val in MASK_VALS[masks[idx]]:
+                row_cols[val][ROW_OF[idx]] |= 1 << COL_OF[idx]
+                col_rows[val][COL_OF[idx]] |= 1 << ROW_OF[idx]
+
+        for val in range(1, 10):
+            for lines, cross_lines, line_of in (
+                    (row_cols[val], COLS, ROW_OF),
+                    (col_rows[val], ROWS, COL_OF)):
+                base = [(i, cross) for i, cross in enumerate(lines)
+                        if 1 < POPCOUNT[cross] <= size]
+
+                for subset in combinations(base, size):
+                    cross = 0
+                    for i, line_cross in subset:
+                        cross |= line_cross
+                    if POPCOUNT[cross] != size:
+                        continue
+
+                    members = [i for i, line_cross in subset]
+                    for j in MASK_VALS[cross]:
+                        for idx in cross_lines[j - 1]:
+                            if masks[idx] & BIT[val] and \
+                                    line_of[idx] not in members:
+                                found += self.eliminate(idx, BIT[val])
+
+        return found
+
+    def get_supporting_units(self, name, idx, val):
+        """ Gets the units of a cell that justify placing a value in it:
+            for single_pos the units where no other cell can take the
+            value, otherwise the units with known values, which rule out
+            the other ones.
+
+            Args:
+                - name (str): technique that found the value.
+                - idx (int): flat cell index
+                - val (int)
+
+            Returns:
+                - list: (unit type, unit zero index) tuples.
+        """
+        found = []
+        indexes = (ROW_OF[idx], COL_OF[idx], SQR_OF[idx])
+
+        for kind, index, unit in zip(UNIT_TYPES, indexes, CELL_UNITS[idx]):
+            if name == 'single_pos':
+                supports = not any(
+                    i != idx and self.values[i] == 0 and
+                    self.get_cand_mask(i) & BIT[val] for i in unit)
+            else:
+                supports = any(self.values[i] for i in unit)
+
+            if supports:
+                found.append((kind, index))
+
+        return found
+
+    def apply(self, name):
+        """ Applies one of the TECHNIQUES and adds up its stats.
+
+            Args:
+                - name (str): technique method name.
+
+            Returns:
+                - int: quantity of values found or ruled out
+        """
+        stats = self.stats['techniques'][name]
+        stats['calls'] += 1
+        mark = len(self.trail)
+        start = timer()
+
+        try:
+            found = getattr(self, name)()
+        finally:
+            stats['time'] += timer() - start
+
+        for idx in self.trail[mark:]:
+            if idx.__class__ is tuple:
+                stats['eliminations'] += POPCOUNT[idx[1]]
+            else:
+                stats['placements'] += 1
+        return found
+
+    def run(self, techniques=TECHNIQUES):
+        """ Applies solving techniques in order until they stop finding
+            or ruling out values, going back to the first one, the
+            cheapest, every time one does.
+
+            Args:
+                - techniques (tuple): TECHNIQUES names.
+
+            Returns:
+                - bool: True if all values are known
+        """
+        while self.get_known_vals_qty() < 81:
+            self.stats['iterations'] += 1
+
+            for name in techniques:
+                if self.apply(name):
+                    break
+            else:
+                break
+
+        return self.get_known_vals_qty() == 81
+
+    def search(self):
+        """ Depth-first search for the missing values, see iter_search.
+            Stops at the first solution, leaving its values in place.
+
+            Returns:
+                - bool: True if all values are known
+        """
+        for solution in self.iter_search():
+            return True
+        return False
+
+    def iter_search(self):
+        """ Depth-first search for every solution. Branches on the cell
+            with the fewest possibilities and applies the
+            SEARCH_TECHNIQUES after every guess. Wrong guesses are taken
+            back with undo so the grid is never copied.
+
+            Returns:
+                - generator: 9x9 nested lists, the solutions.
+        """
+        self.stats['nodes'] += 1
+        best_idx = None
+        best_mask = 0
+
+        for idx in CELLS:
+            if self.values[idx] == 0:
+                mask = self.get_cand_mask(idx)
+
+                if best_idx is None or POPCOUNT[mask] < POPCOUNT[best_mask]:
+                    best_idx = idx
+                    best_mask = mask
+
+                    if POPCOUNT[mask] <= 2:
+                        break
+
+        if best_idx is None:
+            yield self.get_grid()
+            return
+
+        mark = len(self.trail)
+
+        for val in MASK_VALS[best_mask]:
+            self.stats['guesses'] += 1
+            self.place(best_idx, val)
+
+            try:
+                solved = self.run(SEARCH_TECHNIQUES)
+            except ContradictionError:
+                solved = None
+
+            if solved:
+                yield self.get_grid()
+            elif solved is not None:
+                for solution in self.iter_search():
+                    yield solution
+
+            self.undo(mark)
+            self.stats['backtracks'] += 1
+
+    def has_repeated_values(self):
+        """ Tells whether the known values repeat in a row, column or
+            square, which the techniques don't check.
+        """
+        known = self.get_known_vals_qty()
+
+        return any(sum(POPCOUNT[mask] for mask in masks) != known
+                   for masks in (self.rows, self.cols, self.sqrs))
+
+
+def solve(grid, search=True, method='logic', profile=None, trace=None):
+    """ Solves a puzzle without touching the database.
+
+        Args:
+            - grid (list): 9x9 nested list, 0 means unknown value.
+            - search (bool): whether to search for the values the
+                solving algorithms can't find. Only used by the logic
+                method.
+            - method (str): 'logic' for the human style algorithms
+                followed by search, 'dlx' for dancing links.
+            - profile (profiling.Profile or None): gets the setup,
+                technique and search timings.
+            - trace (trace.Trace or None): records the steps. Only used
+                by the logic method.
+
+        Returns:
+            - tuple: (solved 9x9 nested list, dict with solving stats)
+
+        Raises:
+            - ContradictionError: if the puzzle has no solution.
+    """
+    if method == 'dlx':
+        with profiling.phase(profile, 'dlx'):
+            return dlx.solve(grid)
+    elif method != 'logic':
+        raise ValueError("Invalid solving method")
+
+    with profiling.phase(profile, 'setup'):
+        engine = SolvingEngine(grid)
+
+    if profile is not None:
+        for name in TECHNIQUES + ('search',):
+            profile.wrap(engine, name, name)
+    if trace is not None:
+        trace.attach(engine)
+
+    if not engine.run() and search and not engine.search():
+        raise ContradictionError("Puzzle has no solution")
+
+    return engine.get_grid(), engine.stats
+
+
+def get_hint(grid):
+    """ Finds the next value the solving techniques place, applying them
+        as run does until one places something, instead of solving the
+        whole puzzle. If they get stuck, the hint is the solution's value
+        for the cell with the fewest possibilities, found by search.
+
+        Args:
+            - grid (list): 9x9 nested list, 0 means unknown value.
+
+        Returns:
+            - tuple or None: (flat cell index, value, technique name or
+                'search', supporting units, see get_supporting_units),
+                None if every value is known. The technique is the
+                hardest one needed to find the value.
+
+        Raises:
+            - ContradictionError: if the puzzle has no solution.
+    """
+    engine = SolvingEngine(grid)
+
+    if engine.has_repeated_values():
+        raise ContradictionError("Repeated value")
+    if engine.get_known_vals_qty() == 81:
+        return None
+
+    hardest = 0  # TECHNIQUES index
+
+    while True:
+        for i, name in enumerate(TECHNIQUES):
+            mark = len(engine.trail)
+            if getattr(engine, name)():
+                break
+        else:
+            break
+
+        hardest = max(hardest, i)
+        for pos in range(mark, len(engine.trail)):
+            idx = engine.trail[pos]
+
+            if idx.__class__ is not tuple:
+                val = engine.values[idx]
+                engine.undo(pos)
+                return (idx, val, TECHNIQUES[hardest],
+                        engine.get_supporting_units(name, idx, val))
+
+    idx = min((idx for idx in CELLS if engine.values[idx] == 0),
+              key=lambda idx: POPCOUNT[engine.get_cand_mask(idx)])
+    solution = solve(grid)[0]
+    return idx, solution[ROW_OF[idx]][COL_OF[idx]], 'search', []
+
+
+def iter_solutions(grid, limit=None):
+    """ Generates the solutions of a puzzle, finding each one only when
+        it's asked for.
+
+        Args:
+            - grid (list): 9x9 nested list, 0 means unknown value.
+            - limit (int or None): solutions to stop after.
+
+        Returns:
+            - generator: 9x9 nested lists
+    """
+    engine = SolvingEngine(grid)
+    if engine.has_repeated_values():
+        return
+
+    try:
+        solved = engine.run()
+    except ContradictionError:
+        return
+
+    solutions = [engine.get_grid()] if solved else engine.iter_search()
+    for count, solution in enumerate(solutions, 1):
+        yield solution
+
+        if count == limit:
+            return
+
+
+def count_solutions(grid, limit=2):
+    """ Counts the solutions of a puzzle, stopping at limit. With the
+        default limit, tells apart puzzles with no solution, 0, with a
+        unique one, 1, and ambiguous ones, 2.
+
+        Args:
+            - grid (list): 9x9 nested list, 0 means unknown value.
+            - limit (int or None): count to stop at, None for all.
+
+        Returns:
+            - int
+    """
+    return sum(1 for solution in iter_solutions(grid, limit))
+
+
+def get_cell_candidates(grid, i, j):
+    """ Gets the possible values of a cell straight from a 9x9 grid.
+
+        Args:
+            - grid (list): 9x9 nested list, 0 means unknown value.
+            - i (int): row zero index
+            - j (int): column zero index
+
+        Returns:
+            - set: possible values for the cell
+    """
+    known = 0
+
+    for unit in CELL_UNITS[i * 9 + j]:
+        for k in unit:
+            known |= BIT[grid[ROW_OF[k]][COL_OF[k]]]
+
+    return set(MASK_VALS[ALL_MASK & ~known])
@@ -0,0 +1,22 @@
+class ContradictionError(ValueError):
+    """ Raised when a cell or a unit runs out of possibilities. """
+    pass
+
+
+class InvalidPuzzleError(ValueError):
+    """ Raised when a puzzle breaks the rules, see validation.validate. """
+
+    def __init__(self, message, unit=None):
+        """
+            Args:
+                - message (str)
+                - unit (tuple or None): (unit type, zero index) of the
+                    failing unit, see engine.UNIT_TYPES.
+        """
+        super(InvalidPuzzleError, self).__init__(message)
+        self.unit = unit
+
+
+class NotUniqueError(ValueError):
+    """ Raised when a puzzle has no solution or several. """
+    pass
@@ -1,6 +1,6 @@
 import factory
 import copy
-from . import models
+from . import generator, grading, models
 
 EASY_PUZZLE = (
     (0, 0, 0, 7, 0, 0, 4, 2, 8),
@@ -13,15 +13,55 @@ EASY_PUZZLE = (
     (0, 5, 0, 0, 0, 2, 1, 7, 4),
     (4, 6, 9, 0, 0, 7, 0, 0, 0))
 
+EASY_SOLUTION = (
+    (9, 3, 6, 7, 5, 1, 4, 2, 8),
+    (7, 1, 4, 8, 2, 3, 9, 5, 6),
+    (2, 8, 5, 9, 4, 6, 3, 1, 7),
+    (8, 9, 3, 4, 7, 5, 2, 6, 1),
+    (5, 4, 2, 1, 6, 9, 7, 8, 3),
+    (6, 7, 1, 2, 3, 8, 5, 4, 9),
+    (1, 2, 7, 3, 8, 4, 6, 9, 5),
+    (3, 5, 8, 6, 9, 2, 1, 7, 4),
+    (4, 6, 9, 5, 1, 7, 8, 3, 2))
+
+HARD_PUZZLE = (
+    # few clues, stalls single candidate and single position
+    (8, 0, 0, 0, 0, 0, 0, 0, 0),
+    (0, 0, 3, 6, 0, 0, 0, 0, 0),
+    (0, 7, 0, 0, 9, 0, 2, 0, 0),
+    (0, 5, 0, 0, 0, 7, 0, 0, 0),
+    (0, 0, 0, 0, 4, 5, 7, 0, 0),
+    (0, 0, 0, 1, 0, 0, 0, 3, 0),
+    (0, 0, 1, 0, 0, 0, 0, 6, 8),
+    (0, 0, 8, 5, 0, 0, 0, 1, 0),
+    (0, 9, 0, 0, 0, 0, 4, 0, 0))
+
 
 class SudokuPuzzleFactory(factory.django.DjangoModelFactory):
     class Meta:
         model = models.SudokuPuzzle
 
-    unsolved_puzzle = factory.LazyFunction(
-        lambda: [list(item) for item in EASY_PUZZLE])
+    class Params:
+        # one of grading.DIFFICULTIES: the puzzle is generated from the
+        # sequence number, with its solution and rating
+        grade = None
+        generated = factory.LazyAttributeSequence(
+            lambda obj, n: generator.generate(n, obj.grade)
+            if obj.grade else None)
+        rating = factory.LazyAttribute(
+            lambda obj: grading.rate(obj.generated[0]) if obj.generated
+            else ('', None))
+
+    unsolved_puzzle = factory.LazyAttribute(
+        lambda obj: obj.generated[0] if obj.generated
+        else [list(item) for item in EASY_PUZZLE])
     solved_puzzle = factory.LazyAttribute(
-        lambda obj: copy.deepcopy(obj.unsolved_puzzle))
+        lambda obj: obj.generated[1] if obj.generated
+        else copy.deepcopy(obj.unsolved_puzzle))
+    # generated puzzles come with their solution
+    solved = factory.LazyAttribute(lambda obj: bool(obj.generated))
+    difficulty = factory.LazyAttribute(lambda obj: obj.rating[0])
+    difficulty_score = factory.LazyAttribute(lambda obj: obj.rating[1])
 
 
 class PuzzleCellFactory(factory.django.DjangoModelFactory):
@@ -0,0 +1,92 @@
+from __future__ import unicode_literals
+from django.core.exceptions import ValidationError
+from django.db import models
+from sudoku_solver import utils
+
+
+class GridField(models.CharField):
+    """ A 9x9 grid stored as its 81 digit string, row by row. Values are
+        9x9 nested lists of ints, an empty list is stored as ''. Forms
+        show and take the 81 digit string.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs['max_length'] = 81
+        super(GridField, self).__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super(GridField, self).deconstruct()
+        del kwargs['max_length']
+        return name, path, args, kwargs
+
+    def from_db_value(self, value, expression, connection, context):
+        return self.to_python(value)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, list):
+            return value
+        if isinstance(value, tuple):
+            return [list(row) for row in value]
+        if value == '':
+            return []
+        try:
+            return utils.str_to_grid(value)
+        except ValueError as e:
+            raise ValidationError(str(e), code='invalid')
+
+    def get_prep_value(self, value):
+        if value is None:
+            return None
+        if len(value) == 0:
+            return ''
+
+        string = utils.grid_to_str(value)
+        if len(string) != 81:  # values out of 0-9 take other widths
+            raise ValueError("Invalid grid")
+        return string
+
+    def value_from_object(self, obj):
+        """ Gets the stored string, which forms show and take back. """
+        return self.get_prep_value(getattr(obj, self.attname))
+
+    def value_to_string(self, obj):
+        return self.value_from_object(obj)
+
+
+class CellsField(models.CharField):
+    """ A list of [i, j] cell positions stored as a string of row and
+        column digit pairs, e.g. [[0, 1], [8, 3]] as '0183', which is
+        also what forms show and take.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs['max_length'] = 162
+        super(CellsField, self).__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super(CellsField, self).deconstruct()
+        del kwargs['max_length']
+        return name, path, args, kwargs
+
+    def from_db_value(self, value, expression, connection, context):
+        return self.to_python(value)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, list):
+            return value
+        if len(value) % 2 or not (value.isdigit() or value == ''):
+            raise ValidationError("Invalid cells string", code='invalid')
+        return [[int(value[k]), int(value[k + 1])]
+                for k in range(0, len(value), 2)]
+
+    def get_prep_value(self, value):
+        if value is None:
+            return None
+        return ''.join('%i%i' % (i, j) for i, j in value)
+
+    def value_from_object(self, obj):
+        """ Gets the stored string, which forms show and take back. """
+        return self.get_prep_value(getattr(obj, self.attname))
+
+    def value_to_string(self, obj):
+        return self.value_from_object(obj)
@@ -0,0 +1,165 @@
+from __future__ import unicode_literals
+from collections import OrderedDict
+import json
+import zlib
+from sudoku_solver import utils
+
+BLOCK_START = 'UNSOLVED'
+BLOCK_SOLVED = 'SOLVED'
+# export formats and their content types
+EXPORT_FORMATS = OrderedDict((
+    ('lines', 'text/plain'),
+    ('csv', 'text/csv'),
+    ('ndjson', 'application/x-ndjson'),
+))
+EXPORT_FIELDS = ('id', 'unsolved_puzzle', 'solved_puzzle', 'solving_time')
+
+
+def iter_lines(f, offset=0):
+    """ Reads a binary file line by line from a byte offset on.
+
+        Args:
+            - f (file): opened in binary mode.
+            - offset (int): where to start reading.
+
+        Returns:
+            - generator: (line start offset, line) tuples.
+    """
+    f.seek(offset)
+
+    for line in f:
+        yield offset, line
+        offset += len(line)
+
+
+def iter_records(f, offset=0):
+    """ Reads the puzzles of a file in either of these formats, which
+        may be mixed:
+
+        - blocks, as in static/txt: an UNSOLVED line and 9 lines of 9
+          digits, optionally followed by a SOLVED line and 9 more.
+        - lines: the puzzle's 81 characters, optionally followed by a
+          comma or spaces and the solution's 81 characters.
+
+        Blank lines and lines starting with # are skipped. Records are
+        only split, not validated: see utils.str_to_grid.
+
+        Args:
+            - f (file): opened in binary mode.
+            - offset (int): where to start reading, must be the start of
+                a record.
+
+        Returns:
+            - generator: (start offset, end offset, unsolved string,
+                solved string or None) tuples. Reading again from the
+                end offset goes on with the next record.
+    """
+    block = None  # [start, end, unsolved rows, solved rows or None]
+
+    for start, line in iter_lines(f, offset):
+        text = line.decode('ascii', 'replace').strip()
+
+        if block is not None:
+            rows = block[2] if block[3] is None else block[3]
+
+            if len(rows) < 9:
+                rows.append(text)
+                block[1] = start + len(line)
+                continue
+
+            if block[3] is None and text.upper() == BLOCK_SOLVED:
+                block[3] = []
+                continue
+
+            yield get_block_record(block)
+            block = None
+
+        if not text or text.startswith('#'):
+            continue
+
+        if text.upper() == BLOCK_START:
+            block = [start, start + len(line), [], None]
+            continue
+
+        fields = text.replace(',', ' ').split()
+        yield (start, start + len(line), fields[0],
+               ' '.join(fields[1:]) or None)
+
+    if block is not None:
+        yield get_block_record(block)
+
+
+def get_block_record(block):
+    start, end, unsolved, solved = block
+    return (start, end, ''.join(unsolved),
+            None if solved is None else ''.join(solved))
+
+
+def iter_export(rows, fmt):
+    """ Writes puzzles in an export format:
+
+        - lines: the puzzle and the solution, 81 characters each, as read
+            by iter_records.
+        - csv: EXPORT_FIELDS, with a header.
+        - ndjson: an object with EXPORT_FIELDS per line.
+
+        Args:
+            - rows (iterable): EXPORT_FIELDS values of every puzzle.
+            - fmt (str): one of EXPORT_FORMATS.
+
+        Returns:
+            - generator: one line of text per puzzle.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError("Invalid export format")
+
+    if fmt == 'csv':
+        yield ','.join(EXPORT_FIELDS) + '\n'
+
+    for pk, unsolved, solved, solving_time in rows:
+        unsolved = utils.grid_to_str(unsolved)
+        solved = utils.grid_to_str(solved)
+
+        if fmt == 'lines':
+            yield '%s %s\n' % (unsolved, solved)
+        elif fmt == 'csv':
+            yield '%i,%s,%s,%r\n' % (pk, unsolved, solved, solving_time)
+        else:
+            yield json.dumps(OrderedDict(zip(
+                EXPORT_FIELDS, (pk, unsolved, solved, solving_time)))) + '\n'
+
+
+def iter_bytes(lines, compress=False, chunk_size=65536):
+    """ Encodes lines of text into chunks of about chunk_size bytes.
+
+        Args:
+            - lines (iterable): str.
+            - compress (bool): whether to gzip the chunks.
+            - chunk_size (int)
+
+        Returns:
+            - generator: bytes.
+    """
+    # 16 + MAX_WBITS gives a gzip header and trailer
+    compressor = zlib.compressobj(
+        6, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if compress else None
+    chunk = []
+    size = 0
+
+    for line in lines:
+        chunk.append(line.encode('utf-8'))
+        size += len(chunk[-1])
+
+        if size >= chunk_size:
+            data = b''.join(chunk)
+            chunk = []
+            size = 0
+            data = compressor.compress(data) if compressor else data
+            if data:
+                yield data
+
+    data = b''.join(chunk)
+    if compressor:
+        data = compressor.compress(data) + compressor.flush()
+    if data:
+        yield data
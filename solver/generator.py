@@ -0,0 +1,91 @@
+from __future__ import unicode_literals
+import random
+from . import engine, grading, symmetry
+from .units import CELLS, ROW_OF, COL_OF, SQRS
+
+
+def get_full_grid(rng=random):
+    """ Builds a random solved grid: the three diagonal squares, which
+        don't share units, are filled with random permutations, the rest
+        is left to search and the result is shuffled with a random
+        symmetry.
+
+        Args:
+            - rng (random.Random)
+
+        Returns:
+            - list: 9x9 nested list.
+    """
+    grid = [[0] * 9 for i in range(9)]
+
+    for sqr in (0, 4, 8):
+        for idx, val in zip(SQRS[sqr], rng.sample(range(1, 10), 9)):
+            grid[ROW_OF[idx]][COL_OF[idx]] = val
+
+    solution = next(engine.iter_solutions(grid))
+    return symmetry.get_random_transform(rng).apply(solution)
+
+
+def remove_clues(solution, rng=random, max_difficulty=None):
+    """ Empties the cells of a solved grid in random order, putting back
+        every value whose removal leaves the puzzle without a unique
+        solution, or harder than max_difficulty.
+
+        Args:
+            - solution (list): 9x9 solved grid.
+            - rng (random.Random)
+            - max_difficulty (str or None): one of grading.DIFFICULTIES.
+
+        Returns:
+            - tuple: (9x9 puzzle, its grading difficulty)
+    """
+    puzzle = [list(row) for row in solution]
+    cells = list(CELLS)
+    rng.shuffle(cells)
+    max_level = grading.DIFFICULTIES.index(max_difficulty or 'extreme')
+    difficulty = 'easy'
+
+    for idx in cells:
+        i, j = ROW_OF[idx], COL_OF[idx]
+        val = puzzle[i][j]
+        puzzle[i][j] = 0
+
+        # puzzles the techniques finish are unique, the rest need a count
+        level = grading.DIFFICULTIES.index(grading.grade(puzzle))
+        if level > max_level or (grading.DIFFICULTIES[level] == 'extreme' and
+                                 engine.count_solutions(puzzle) != 1):
+            puzzle[i][j] = val
+        else:
+            difficulty = grading.DIFFICULTIES[level]
+
+    return puzzle, difficulty
+
+
+def generate(seed, difficulty=None, max_attempts=1000):
+    """ Generates a graded puzzle with a unique solution. The same seed
+        gives the same puzzle.
+
+        Args:
+            - seed (int)
+            - difficulty (str or None): one of grading.DIFFICULTIES,
+                None for any.
+            - max_attempts (int): full grids to try for the difficulty.
+                Expert puzzles are the rarest, about one grid in 150
+                gives one.
+
+        Returns:
+            - tuple: (9x9 puzzle, 9x9 solution, difficulty)
+
+        Raises:
+            - ValueError: if no attempt gives the difficulty.
+    """
+    rng = random.Random(seed)
+
+    for attempt in range(max_attempts):
+        solution = get_full_grid(rng)
+        puzzle, found = remove_clues(solution, rng, difficulty)
+
+        if difficulty is None or found == difficulty:
+            return puzzle, solution, found
+
+    raise ValueError("No %s puzzle found" % difficulty)
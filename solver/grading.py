@@ -0,0 +1,117 @@
+from __future__ import unicode_literals
+from . import engine
+
+# puzzle difficulties, easiest first
+DIFFICULTIES = ('easy', 'medium', 'hard', 'expert', 'extreme')
+# difficulty of every technique, extreme puzzles need search
+TECHNIQUE_DIFFICULTIES = {
+    'single_cand': 'easy',
+    'single_pos': 'medium',
+    'naked_pairs': 'hard',
+    'hidden_pairs': 'hard',
+    'pointing_pairs': 'hard',
+    'box_line': 'hard',
+    'naked_triples': 'expert',
+    'hidden_triples': 'expert',
+    'x_wing': 'expert',
+    'swordfish': 'expert',
+}
+# rating scores are the difficulty's index times SCORE_LEVEL plus the
+# steps, so they sort by difficulty first
+SCORE_LEVEL = 10 ** 6
+
+
+def get_hardest_technique(stats):
+    """ Gets the last of the TECHNIQUES that found or ruled out a value.
+
+        Args:
+            - stats (dict): from engine.solve.
+
+        Returns:
+            - str or None: None if the puzzle had no values to find.
+    """
+    hardest = None
+
+    for name in engine.TECHNIQUES:
+        technique = stats['techniques'][name]
+        if technique['placements'] or technique['eliminations']:
+            hardest = name
+
+    return hardest
+
+
+def get_steps(stats):
+    """ Counts the steps of a solve: the values the techniques found or
+        ruled out, and the search guesses.
+
+        Args:
+            - stats (dict): from engine.solve.
+
+        Returns:
+            - int
+    """
+    return stats.get('guesses', 0) + sum(
+        technique['placements'] + technique['eliminations']
+        for technique in stats['techniques'].values())
+
+
+def get_difficulty(stats, finished):
+    """ Gets the difficulty of the hardest technique a solve used, or
+        extreme if the techniques didn't finish it.
+    """
+    if not finished:
+        return 'extreme'
+
+    hardest = get_hardest_technique(stats)
+    return TECHNIQUE_DIFFICULTIES[hardest] if hardest else 'easy'
+
+
+def rate_stats(stats):
+    """ Rates a puzzle from the stats of a logic engine.solve with search,
+        without solving it again.
+
+        Args:
+            - stats (dict): from engine.solve.
+
+        Returns:
+            - tuple: (one of DIFFICULTIES, int score)
+    """
+    difficulty = get_difficulty(stats, not stats.get('guesses'))
+    score = DIFFICULTIES.index(difficulty) * SCORE_LEVEL + min(
+        get_steps(stats), SCORE_LEVEL - 1)
+    return difficulty, score
+
+
+def rate(grid):
+    """ Rates a puzzle by the hardest technique it needs and the steps
+        it takes, see rate_stats.
+
+        Args:
+            - grid (list): 9x9 nested list, 0 means unknown value.
+
+        Returns:
+            - tuple: (one of DIFFICULTIES, int score)
+
+        Raises:
+            - ContradictionError: if the puzzle has no solution.
+    """
+    return rate_stats(engine.solve(grid)[1])
+
+
+def grade(grid):
+    """ Grades a puzzle by the hardest technique it needs, solving it
+        without search. Puzzles the techniques can't finish are extreme.
+        The techniques only find values every solution has, so a puzzle
+        they finish has a unique solution.
+
+        Args:
+            - grid (list): 9x9 nested list, 0 means unknown value.
+
+        Returns:
+            - str: one of DIFFICULTIES.
+
+        Raises:
+            - ContradictionError: if the puzzle has no solution.
+    """
+    solved, stats = engine.solve(grid, search=False)
+    return get_difficulty(stats, not any(0 in row for row in solved))
@@ -0,0 +1,37 @@
+from __future__ import unicode_literals
+from collections import OrderedDict
+import threading
+from django.conf import settings
+from sudoku_solver import utils
+from . import engine
+
+hints = OrderedDict()  # fingerprint: hint, least recently used first
+lock = threading.Lock()
+
+
+def get_hint(grid):
+    """ Same as engine.get_hint, memoized per utils.get_fingerprint of
+        the grid in an in-process LRU of SOLVER_HINT_CACHE_SIZE hints.
+    """
+    max_size = getattr(settings, 'SOLVER_HINT_CACHE_SIZE', 1024)
+    fingerprint = utils.get_fingerprint(grid)
+
+    with lock:
+        if fingerprint in hints:
+            hint = hints.pop(fingerprint)
+            hints[fingerprint] = hint  # most recently used now
+            return hint
+
+    hint = engine.get_hint(grid)
+
+    with lock:
+        hints[fingerprint] = hint
+        while len(hints) > max_size:
+            hints.popitem(last=False)
+
+    return hint
+
+
+def clear():
+    with lock:
+        hints.clear()
@@ -0,0 +1,176 @@
+from __future__ import unicode_literals
+from . import engine
+from .engine import ALL_MASK, BIT, MASK_VALS
+from .exceptions import ContradictionError
+from .units import CELLS, ROW_OF, COL_OF, SQR_OF, PEERS
+
+# solution statuses
+INVALID = 'invalid'  # a value is repeated in a unit
+UNSOLVABLE = 'unsolvable'
+SOLVABLE = 'solvable'
+
+# (row, col, sqr) unit numbers of every cell, 0-26
+CELL_UNIT_IDS = tuple((ROW_OF[idx], 9 + COL_OF[idx], 18 + SQR_OF[idx])
+                      for idx in CELLS)
+
+
+class EditState(object):
+    """ A puzzle being typed in, one cell at a time. Every edit only
+        updates the units of the edited cell, and the last solution is
+        kept for as long as the edits agree with it, so checking the
+        puzzle after each edit doesn't mean solving it again.
+    """
+
+    def __init__(self, grid, solution=None):
+        """
+            Args:
+                - grid (list): 9x9 nested list, 0 means unknown value.
+                - solution (list or None): 9x9 solution of the grid from
+                    a previous state. It's checked before being reused.
+        """
+        self.values = [0] * 81
+        self.counts = [[0] * 10 for i in range(27)]  # per unit and value
+        self.masks = [0] * 27  # known values masks, per unit
+        self.conflicts = 0  # repeated values
+        self.solution = None  # flat solved values
+        self.checked = False  # whether solution is up to date
+
+        for idx in CELLS:
+            val = grid[ROW_OF[idx]][COL_OF[idx]]
+            if val != 0:
+                self.add(idx, val)
+
+        if solution is not None:
+            solution = [value for row in solution for value in row]
+            if is_solution(solution, self.values):
+                self.solution = solution
+                self.checked = True
+
+    def add(self, idx, val):
+        self.values[idx] = val
+
+        for unit in CELL_UNIT_IDS[idx]:
+            counts = self.counts[unit]
+            counts[val] += 1
+            if counts[val] > 1:
+                self.conflicts += 1
+            self.masks[unit] |= BIT[val]
+
+    def remove(self, idx):
+        val = self.values[idx]
+        self.values[idx] = 0
+
+        for unit in CELL_UNIT_IDS[idx]:
+            counts = self.counts[unit]
+            counts[val] -= 1
+            if counts[val] > 0:
+                self.conflicts -= 1
+            else:
+                self.masks[unit] &= ~BIT[val]
+
+    def edit(self, idx, old, new):
+        """ Changes the value of a cell.
+
+            Args:
+                - idx (int): flat cell index
+                - old (int): value the cell had, 0 if it was unknown.
+                - new (int): value the cell gets, 0 to clear it.
+
+            Returns:
+                - dict: flat index: candidates set of the cell and its
+                    peers, the only cells whose candidates change.
+
+            Raises:
+                - ValueError: if old isn't the cell's value.
+        """
+        if not 0 <= new <= 9:
+            raise ValueError("Invalid value")
+        if self.values[idx] != old:
+            raise ValueError("Stale cell value")
+
+        if old != 0:
+            self.remove(idx)
+        if new != 0:
+            self.add(idx, new)
+
+        if self.solution is not None:
+            # clearing a cell, or filling in its solved value, leaves
+            # the solution valid
+            if new != 0 and self.solution[idx] != new:
+                self.solution = None
+                self.checked = False
+        elif old != 0:
+            # an unsolvable puzzle stays so until a value is taken out
+            self.checked = False
+
+        return dict((i, self.get_candidates(i))
+                    for i in (idx,) + PEERS[idx])
+
+    def get_cand_mask(self, idx):
+        """ Gets the possible values mask of a cell, 0 if it's known. """
+        if self.values[idx] != 0:
+            return 0
+
+        units = CELL_UNIT_IDS[idx]
+        return ALL_MASK & ~(self.masks[units[0]] | self.masks[units[1]] |
+                            self.masks[units[2]])
+
+    def get_candidates(self, idx):
+        """ Gets the possible values of a cell, empty if it's known. """
+        return set(MASK_VALS[self.get_cand_mask(idx)])
+
+    def get_status(self):
+        """ Tells whether the puzzle can be solved, solving it only if
+            the edits since the last solve may have changed that.
+
+            Returns:
+                - str: INVALID, UNSOLVABLE or SOLVABLE.
+        """
+        if self.conflicts:
+            return INVALID
+
+        if not self.checked:
+            try:
+                solution = engine.solve(self.get_grid())[0]
+                self.solution = [val for row in solution for val in row]
+            except ContradictionError:
+                self.solution = None
+            self.checked = True
+
+        return UNSOLVABLE if self.solution is None else SOLVABLE
+
+    def get_grid(self):
+        return [self.values[i*9:i*9+9] for i in range(9)]
+
+    def get_solution(self):
+        """ Returns the solution as a 9x9 nested list, None if there is
+            none or it's out of date.
+        """
+        if self.conflicts or not self.checked or self.solution is None:
+            return None
+        return [self.solution[i*9:i*9+9] for i in range(9)]
+
+
+def is_solution(solution, values):
+    """ Checks a full grid is a valid solution of a puzzle.
+
+        Args:
+            - solution (list): 81 flat values.
+            - values (list): 81 flat values, 0 means unknown value.
+
+        Returns:
+            - bool
+    """
+    if len(solution) != 81 or any(
+            val != 0 and val != solution[idx]
+            for idx, val in enumerate(values)):
+        return False
+
+    masks = [0] * 27
+    for idx in CELLS:
+        if not 1 <= solution[idx] <= 9:
+            return False
+        for unit in CELL_UNIT_IDS[idx]:
+            masks[unit] |= BIT[solution[idx]]
+
+    return all(mask == ALL_MASK for mask in masks)
@@ -0,0 +1,120 @@
+from __future__ import unicode_literals
+import logging
+import traceback
+from django.db import transaction
+from django.utils import timezone
+from . import engine, validation
+from .exceptions import NotUniqueError
+from .models import (
+    SudokuPuzzle, SolveJob, PENDING, RUNNING, DONE, FAILED, MIN_CLUES)
+
+logger = logging.getLogger(__name__)
+
+
+def submit(grid, method=''):
+    """ Queues a puzzle to be solved. Puzzles solved before are done
+        straight away.
+
+        Args:
+            - grid (list): 9x9 unsolved puzzle.
+            - method (str): one of engine.METHODS, '' for the
+                SOLVER_METHOD setting.
+
+        Returns:
+            - SolveJob
+
+        Raises:
+            - InvalidPuzzleError: if a value repeats in a unit or there
+                are too few clues, see validation.validate.
+            - NotUniqueError: see check_solutions.
+    """
+    validation.validate(grid, min_clues=MIN_CLUES)
+    check_solutions(grid)
+    puzzle = SudokuPuzzle.get_or_create_puzzle(grid)[0]
+
+    if puzzle.solved:
+        return SolveJob.objects.create(
+            puzzle=puzzle, method=method, status=DONE,
+            started=timezone.now(), finished=timezone.now())
+
+    return SolveJob.objects.create(puzzle=puzzle, method=method)
+
+
+def check_solutions(grid):
+    """ Checks a puzzle has exactly one solution, counting them up to
+        the second one, see engine.count_solutions.
+
+        Args:
+            - grid (list): 9x9 unsolved puzzle.
+
+        Raises:
+            - NotUniqueError: if the puzzle has no solution or several.
+    """
+    solutions = engine.count_solutions(grid, limit=2)
+
+    if solutions == 0:
+        raise NotUniqueError("Puzzle has no solution")
+    elif solutions > 1:
+        raise NotUniqueError("Puzzle has several solutions")
+
+
+def claim(limit, stale_after=None):
+    """ Marks up to limit pending jobs as running for this worker.
+        Rows other workers are claiming are skipped, not waited for.
+
+        Args:
+            - limit (int)
+            - stale_after (timedelta or None): jobs running for longer
+                are taken as abandoned by a dead worker and claimed
+                again.
+
+        Returns:
+            - list: claimed job ids, oldest first.
+    """
+    now = timezone.now()
+
+    with transaction.atomic():
+        jobs = SolveJob.objects.select_for_update(skip_locked=True)
+        pending = jobs.filter(status=PENDING)
+
+        if stale_after is not None:
+            pending = pending | jobs.filter(
+                status=RUNNING, started__lt=now - stale_after)
+
+        ids = list(pending.order_by('id').values_list('id', flat=True)[
+            :limit])
+        SolveJob.objects.filter(id__in=ids).update(
+            status=RUNNING, started=now)
+
+    return ids
+
+
+def run(job_id):
+    """ Solves a claimed job and stores its result. Run by the worker
+        processes. Jobs whose puzzle hasn't got exactly one solution,
+        see check_solutions, fail without being solved.
+
+        Args:
+            - job_id (int)
+
+        Returns:
+            - str: the job's final status.
+    """
+    job = SolveJob.objects.select_related('puzzle').get(id=job_id)
+
+    try:
+        # submit checks it too, this catches jobs queued some other way
+        check_solutions(job.puzzle.unsolved_puzzle)
+        job.puzzle.solve(method=job.method or None)
+        job.status = DONE
+    except NotUniqueError as e:
+        job.status = FAILED
+        job.error = str(e)
+    except Exception:
+        logger.exception("Solve job %i failed", job_id)
+        job.status = FAILED
+        job.error = traceback.format_exc()
+
+    job.finished = timezone.now()
+    job.save(update_fields=('status', 'error', 'finished'))
+    return job.status
@@ -0,0 +1,71 @@
+from __future__ import unicode_literals
+import argparse
+from collections import OrderedDict
+import json
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from solver import bench, engine
+
+
+def positive_int(value):
+    """ argparse type of counts that must be at least 1. """
+    count = int(value)
+    if count < 1:
+        raise argparse.ArgumentTypeError("must be at least 1")
+    return count
+
+
+class Command(BaseCommand):
+    help = ("Benchmarks the solver on the static/txt puzzles and seeded "
+            "corpora of generated puzzles of each difficulty, see "
+            "solver.bench.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='*', help="More puzzle files to benchmark.")
+        parser.add_argument(
+            '--count', type=positive_int, default=100,
+            help="Generated puzzles per difficulty.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--method', choices=engine.METHODS,
+            default=getattr(settings, 'SOLVER_METHOD', 'logic'))
+        parser.add_argument(
+            '--output', help="File to write the JSON report to.")
+        parser.add_argument(
+            '--baseline',
+            help="JSON report to compare with, fails if worse.")
+        parser.add_argument(
+            '--tolerance', type=float, default=0.1,
+            help="Fraction a result may be worse than the baseline by.")
+
+    def handle(self, *args, **options):
+        report = OrderedDict((
+            ('method', options['method']),
+            ('count', options['count']),
+            ('seed', options['seed']),
+            ('corpora', OrderedDict()),
+        ))
+        corpora = bench.get_corpora(
+            options['count'], options['seed'], options['paths'])
+
+        for name, puzzles in corpora.items():
+            report['corpora'][name] = bench.run(puzzles, options['method'])
+        report['process_peak_memory_kb'] = bench.get_peak_memory()
+
+        output = json.dumps(report, indent=2, separators=(',', ': '))
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+
+            regressions = bench.get_regressions(
+                report, baseline, options['tolerance'])
+            if regressions:
+                raise CommandError(
+                    "Worse than the baseline:\n" + '\n'.join(regressions))
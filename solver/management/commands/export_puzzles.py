@@ -0,0 +1,33 @@
+from __future__ import unicode_literals
+import sys
+from django.core.management.base import BaseCommand
+from solver import formats
+from solver.models import SudokuPuzzle
+
+
+class Command(BaseCommand):
+    help = "Streams the solved puzzles to a file, see solver.formats."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Output file, - for stdout.")
+        parser.add_argument(
+            '--format', default='lines',
+            choices=list(formats.EXPORT_FORMATS))
+        parser.add_argument(
+            '--gzip', action='store_true', help="Compress the output.")
+
+    def handle(self, *args, **options):
+        rows = SudokuPuzzle.objects.filter(solved=True).order_by(
+            'pk').values_list(*formats.EXPORT_FIELDS).iterator()
+        chunks = formats.iter_bytes(
+            formats.iter_export(rows, options['format']), options['gzip'])
+
+        if options['path'] == '-':
+            out = getattr(sys.stdout, 'buffer', sys.stdout)
+            for chunk in chunks:
+                out.write(chunk)
+            return
+
+        with open(options['path'], 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
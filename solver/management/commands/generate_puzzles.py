@@ -0,0 +1,90 @@
+from __future__ import unicode_literals
+from collections import OrderedDict
+import json
+from multiprocessing import cpu_count
+import random
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from sudoku_solver import utils
+from solver import generator, grading, pool
+
+GENERATE_FORMATS = ('lines', 'ndjson')
+
+
+def generate_puzzle(args):
+    """ Pool task, gives back (seed, puzzle, solution, difficulty). """
+    seed, difficulty = args
+    return (seed,) + generator.generate(seed, difficulty)
+
+
+def format_puzzle(seed, puzzle, solution, difficulty, fmt):
+    """ Writes a generated puzzle as a line of text:
+
+        - lines: the puzzle and the solution, 81 characters each, as read
+            by import_puzzles.
+        - ndjson: an object with the puzzle, the solution, the
+            difficulty, the clue count and the seed that gives it back.
+    """
+    unsolved = utils.grid_to_str(puzzle)
+    solved = utils.grid_to_str(solution)
+
+    if fmt == 'lines':
+        return '%s %s\n' % (unsolved, solved)
+
+    return json.dumps(OrderedDict((
+        ('unsolved_puzzle', unsolved),
+        ('solved_puzzle', solved),
+        ('difficulty', difficulty),
+        ('clues', 81 - unsolved.count('0')),
+        ('seed', seed),
+    ))) + '\n'
+
+
+class Command(BaseCommand):
+    help = ("Generates random puzzles with a unique solution, graded by "
+            "the techniques they need, see solver.generator. Puzzles are "
+            "written as they come, in seed order.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('count', type=int, help="Puzzles to generate.")
+        parser.add_argument(
+            '--output', default='-', help="Output file, - for stdout.")
+        parser.add_argument(
+            '--difficulty', choices=grading.DIFFICULTIES,
+            help="Only puzzles of this difficulty, any by default.")
+        parser.add_argument(
+            '--format', default='lines', choices=GENERATE_FORMATS)
+        parser.add_argument(
+            '--seed', type=int,
+            help="Seed of the first puzzle, the next ones get the "
+                 "following seeds. Random by default.")
+        parser.add_argument(
+            '--processes', type=int, default=cpu_count(),
+            help="Worker processes, 0 to generate in this process.")
+
+    def handle(self, *args, **options):
+        seed = options['seed']
+        if seed is None:
+            seed = random.SystemRandom().randint(0, 2 ** 31)
+        tasks = [(seed + i, options['difficulty'])
+                 for i in range(options['count'])]
+
+        if options['output'] == '-':
+            out = getattr(sys.stdout, 'buffer', sys.stdout)
+        else:
+            out = open(options['output'], 'wb')
+
+        try:
+            with pool.get_pool(options['processes']) as workers:
+                # imap keeps the seed order, so a seed gives the same file
+                results = workers.imap(generate_puzzle, tasks) if workers \
+                    else (generate_puzzle(task) for task in tasks)
+                for result in results:
+                    out.write(format_puzzle(
+                        *result, fmt=options['format']).encode('utf-8'))
+                    out.flush()
+        except ValueError as e:
+            raise CommandError(str(e))
+        finally:
+            if options['output'] != '-':
+                out.close()
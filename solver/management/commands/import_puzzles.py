@@ -0,0 +1,119 @@
+from __future__ import unicode_literals
+from collections import OrderedDict
+from django.core.management.base import BaseCommand
+from django.db import transaction
+import numpy as np
+from sudoku_solver import utils
+from solver import batch, formats
+from solver.models import SudokuPuzzle, MIN_CLUES
+
+
+def get_valid(puzzles, solutions, solved):
+    """ Checks a chunk of puzzles, and their solutions, at once.
+
+        Args:
+            - puzzles (numpy.ndarray): (N, 9, 9), 0 means unknown value.
+            - solutions (numpy.ndarray): (N, 9, 9), the puzzle itself
+                where the solution isn't known.
+            - solved (numpy.ndarray): (N,) booleans, whether the record
+                carries a solution, which must then be complete.
+
+        Returns:
+            - numpy.ndarray: (N,) booleans.
+    """
+    valid = batch.is_valid_batch(puzzles) & (
+        (puzzles != 0).sum(axis=(1, 2)) >= MIN_CLUES)
+    given = (puzzles == 0) | (puzzles == solutions)  # clues kept
+    complete = ~solved | (solutions != 0).all(axis=(1, 2))
+
+    return valid & batch.is_valid_batch(solutions) & \
+        given.all(axis=(1, 2)) & complete
+
+
+class Command(BaseCommand):
+    help = ("Imports puzzles from a file of UNSOLVED/SOLVED blocks or of "
+            "81 character lines, see solver.formats.iter_records.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument(
+            '--offset', type=int, default=0,
+            help="Byte offset to start at, e.g. the last one printed by "
+                 "an interrupted import.")
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help="Puzzles validated and inserted at once.")
+
+    def handle(self, *args, **options):
+        self.counts = OrderedDict(
+            (key, 0) for key in ('imported', 'repeated', 'invalid'))
+        records = []  # (start offset, puzzle, solution or None)
+        offset = options['offset']
+
+        with open(options['path'], 'rb') as f:
+            for start, end, unsolved, solved in formats.iter_records(
+                    f, offset):
+                try:
+                    records.append((start, utils.str_to_grid(unsolved),
+                                    solved and utils.str_to_grid(solved)))
+                except ValueError as e:
+                    self.report_invalid(start, e)
+
+                if len(records) >= options['batch_size']:
+                    self.insert(records, end)
+                    records = []
+                offset = end
+
+        self.insert(records, offset)
+
+    def report_invalid(self, offset, error):
+        self.counts['invalid'] += 1
+        self.stderr.write("Byte %i: %s" % (offset, error))
+
+    def insert(self, records, offset):
+        """ Saves the valid puzzles that aren't stored yet, then reports
+            the offset to resume from.
+
+            Args:
+                - records (list): (start offset, puzzle, solution or
+                    None) tuples.
+                - offset (int): end of the last record read.
+        """
+        new = OrderedDict()
+
+        if records:
+            puzzles = np.array([record[1] for record in records])
+            solutions = np.array([record[2] or record[1]
+                                  for record in records])
+            solved = np.array([record[2] is not None for record in records])
+            valid = get_valid(puzzles, solutions, solved)
+
+            for (start, puzzle, solution), ok in zip(records, valid):
+                if not ok:
+                    self.report_invalid(start, "Invalid puzzle")
+                    continue
+
+                fingerprint = utils.get_fingerprint(puzzle)
+                if fingerprint in new:
+                    self.counts['repeated'] += 1
+                    continue
+
+                # bulk_create doesn't call save(), which sets fingerprint
+                new[fingerprint] = SudokuPuzzle(
+                    unsolved_puzzle=puzzle, solved_puzzle=solution or [],
+                    solved=solution is not None, fingerprint=fingerprint)
+
+        with transaction.atomic():
+            stored = SudokuPuzzle.objects.filter(
+                fingerprint__in=list(new)).values_list(
+                'fingerprint', flat=True)
+            for fingerprint in stored:
+                del new[fingerprint]
+                self.counts['repeated'] += 1
+
+            SudokuPuzzle.objects.bulk_create(new.values())
+
+        self.counts['imported'] += len(new)
+        self.stdout.write("%s, offset %i" % (', '.join(
+            '%i %s' % (count, key) for key, count in self.counts.items()),
+            offset))
@@ -0,0 +1,61 @@
+from __future__ import unicode_literals
+from multiprocessing import cpu_count
+from django.core.management.base import BaseCommand
+from solver import grading, pool
+from solver.exceptions import ContradictionError
+from solver.models import SudokuPuzzle
+
+
+def rate_puzzle(args):
+    """ Pool task, gives back (puzzle id, rating or None if the puzzle
+        has no solution).
+    """
+    pk, grid = args
+    try:
+        return pk, grading.rate(grid)
+    except ContradictionError:
+        return pk, None
+
+
+class Command(BaseCommand):
+    help = ("Rates the stored puzzles that have no difficulty yet, e.g. "
+            "those only solved from the cache or by dancing links.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=cpu_count(),
+            help="Worker processes, 0 to rate in this process.")
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help="Puzzles read at once.")
+        parser.add_argument(
+            '--all', action='store_true',
+            help="Rate every puzzle again.")
+
+    def handle(self, *args, **options):
+        puzzles = SudokuPuzzle.objects.filter(correct=True)
+        if not options['all']:
+            puzzles = puzzles.filter(difficulty='')
+        last_pk = 0
+        rated = 0
+
+        with pool.get_pool(options['processes']) as workers:
+            while True:
+                tasks = list(puzzles.filter(pk__gt=last_pk).order_by(
+                    'pk').values_list('pk', 'unsolved_puzzle')[
+                        :options['batch_size']])
+                if not tasks:
+                    break
+                last_pk = tasks[-1][0]
+
+                results = workers.imap_unordered(rate_puzzle, tasks) \
+                    if workers else (rate_puzzle(task) for task in tasks)
+                for pk, rating in results:
+                    if rating is None:
+                        self.stderr.write("Puzzle %i has no solution" % pk)
+                        continue
+                    SudokuPuzzle.objects.filter(pk=pk).update(
+                        difficulty=rating[0], difficulty_score=rating[1])
+                    rated += 1
+
+        self.stdout.write("Rated %i puzzles" % rated)
@@ -0,0 +1,73 @@
+from __future__ import unicode_literals
+from datetime import timedelta
+import logging
+import time
+from django.core.management.base import BaseCommand
+from django.db import connections
+from solver import jobs, pool
+from solver.models import FAILED
+
+logger = logging.getLogger(__name__)
+
+
+def run_job(job_id):
+    """ Runs a job, giving back (job id, status) as results come out of
+        order. Errors jobs.run can't store, e.g. when the job can't be
+        loaded, are logged and reported as a failure, so one bad job
+        doesn't stop the others.
+    """
+    try:
+        return job_id, jobs.run(job_id)
+    except Exception:
+        logger.exception("Solve job %i failed", job_id)
+        return job_id, FAILED
+
+
+def run_pool_job(job_id):
+    """ Pool task, see run_job. """
+    try:
+        return run_job(job_id)
+    finally:
+        connections.close_all()  # workers don't keep idle connections
+
+
+class Command(BaseCommand):
+    help = ("Solves the queued SolveJobs in a process pool. Any number of "
+            "these may run at once, on any host, against the same database.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=2,
+            help="Worker processes, 0 to solve in this process.")
+        parser.add_argument(
+            '--batch-size', type=int, default=20,
+            help="Jobs claimed at once.")
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help="Seconds to wait when no jobs are pending.")
+        parser.add_argument(
+            '--stale-after', type=float, default=600,
+            help="Seconds after which a running job is taken as "
+                 "abandoned and claimed again, 0 to never.")
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Exit when no jobs are pending.")
+
+    def handle(self, *args, **options):
+        stale_after = timedelta(seconds=options['stale_after']) \
+            if options['stale_after'] else None
+
+        with pool.get_pool(options['processes']) as workers:
+            while True:
+                ids = jobs.claim(options['batch_size'], stale_after)
+
+                if not ids:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                results = workers.imap_unordered(run_pool_job, ids) \
+                    if workers else (run_job(job_id) for job_id in ids)
+                for job_id, status in results:
+                    self.stdout.write("Job %i %s" % (job_id, status))
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+from sudoku_solver import utils
+
+
+def set_fingerprints(apps, schema_editor):
+    """ Fingerprints every puzzle and deletes the repeated ones, keeping
+        the first correctly solved copy, or else the oldest one.
+    """
+    SudokuPuzzle = apps.get_model('solver', 'SudokuPuzzle')
+    kept = {}  # fingerprint: pk
+    repeated = []
+
+    puzzles = SudokuPuzzle.objects.order_by('-solved', '-correct', 'pk')
+    for pk, unsolved_puzzle in puzzles.values_list(
+            'pk', 'unsolved_puzzle').iterator():
+        fingerprint = utils.get_fingerprint(unsolved_puzzle)
+
+        if fingerprint in kept:
+            repeated.append(pk)
+        else:
+            kept[fingerprint] = pk
+            SudokuPuzzle.objects.filter(pk=pk).update(
+                fingerprint=fingerprint)
+
+    for start in range(0, len(repeated), 1000):
+        SudokuPuzzle.objects.filter(
+            pk__in=repeated[start:start + 1000]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solver', '0004_sudokupuzzle_correct'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sudokupuzzle',
+            name='fingerprint',
+            field=models.CharField(editable=False, max_length=64, null=True),
+        ),
+        migrations.RunPython(set_fingerprints, migrations.RunPython.noop),
+    ]
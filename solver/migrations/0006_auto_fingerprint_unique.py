@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solver', '0005_sudokupuzzle_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='sudokupuzzle',
+            name='fingerprint',
+            field=models.CharField(editable=False, max_length=64, unique=True),
+        ),
+    ]
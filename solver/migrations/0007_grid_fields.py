@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import solver.fields
+
+# array field: packed field
+FIELDS = (
+    ('unsolved_puzzle', 'unsolved_grid'),
+    ('solved_puzzle', 'solved_grid'),
+    ('missing_vals_pos', 'missing_cells'),
+)
+
+
+def copy_fields(apps, sources, targets):
+    SudokuPuzzle = apps.get_model('solver', 'SudokuPuzzle')
+    rows = SudokuPuzzle.objects.values_list('pk', *sources)
+
+    for row in rows.iterator():
+        SudokuPuzzle.objects.filter(pk=row[0]).update(
+            **dict(zip(targets, row[1:])))
+
+
+def pack_grids(apps, schema_editor):
+    copy_fields(apps, *zip(*FIELDS))
+
+
+def unpack_grids(apps, schema_editor):
+    targets, sources = zip(*FIELDS)
+    copy_fields(apps, sources, targets)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solver', '0006_auto_fingerprint_unique'),
+    ]
+
+    operations = [
+        # nullable while both fields exist, so that unpack_grids can
+        # fill it back when going backwards
+        migrations.AlterField(
+            model_name='sudokupuzzle',
+            name='unsolved_puzzle',
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=django.contrib.postgres.fields.ArrayField(
+                    base_field=models.IntegerField(), size=9),
+                null=True, size=9),
+        ),
+        migrations.AddField(
+            model_name='sudokupuzzle',
+            name='unsolved_grid',
+            field=solver.fields.GridField(null=True),
+        ),
+        migrations.AddField(
+            model_name='sudokupuzzle',
+            name='solved_grid',
+            field=solver.fields.GridField(blank=True, default=list,
+                                          null=True),
+        ),
+        migrations.AddField(
+            model_name='sudokupuzzle',
+            name='missing_cells',
+            field=solver.fields.CellsField(blank=True, null=True),
+        ),
+        migrations.RunPython(pack_grids, unpack_grids),
+    ]
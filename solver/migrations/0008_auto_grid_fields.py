@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+import solver.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solver', '0007_grid_fields'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='sudokupuzzle',
+            name='unsolved_puzzle',
+        ),
+        migrations.RemoveField(
+            model_name='sudokupuzzle',
+            name='solved_puzzle',
+        ),
+        migrations.RemoveField(
+            model_name='sudokupuzzle',
+            name='missing_vals_pos',
+        ),
+        migrations.RenameField(
+            model_name='sudokupuzzle',
+            old_name='unsolved_grid',
+            new_name='unsolved_puzzle',
+        ),
+        migrations.RenameField(
+            model_name='sudokupuzzle',
+            old_name='solved_grid',
+            new_name='solved_puzzle',
+        ),
+        migrations.RenameField(
+            model_name='sudokupuzzle',
+            old_name='missing_cells',
+            new_name='missing_vals_pos',
+        ),
+        migrations.AlterField(
+            model_name='sudokupuzzle',
+            name='unsolved_puzzle',
+            field=solver.fields.GridField(),
+        ),
+    ]
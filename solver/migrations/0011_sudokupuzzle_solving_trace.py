@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.7 on 2026-10-18 18:48
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solver', '0010_solvejob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sudokupuzzle',
+            name='solving_trace',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.7 on 2026-10-18 19:12
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solver', '0011_sudokupuzzle_solving_trace'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sudokupuzzle',
+            name='difficulty',
+            field=models.CharField(blank=True, choices=[('easy', 'Easy'), ('medium', 'Medium'), ('hard', 'Hard'), ('expert', 'Expert'), ('extreme', 'Extreme')], db_index=True, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='sudokupuzzle',
+            name='difficulty_score',
+            field=models.IntegerField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -1,118 +1,231 @@
 from __future__ import unicode_literals
+from collections import OrderedDict
+from django.conf import settings
 from django.db import models
 import numpy as np
 from sudoku_solver import utils
-from django.contrib.postgres.fields import ArrayField
+from . import cache, engine, grading, profiling, trace, units, validation
+from .exceptions import InvalidPuzzleError
+from .fields import GridField, CellsField
+from .units import SQUARE_DEFS
+from django.contrib.postgres.fields import ArrayField, JSONField
+from django.contrib.postgres.fields.jsonb import KeyTextTransform, KeyTransform
+from django.db.models import Sum
+from django.db.models.functions import Cast
 import copy
 from timeit import default_timer as timer
 from django.db.models import Q
-from silk.profiling.profiler import silk_profile
-
-SQUARE_DEFS = (
-    # (first_cell_row, first_cell_col, last_cell_row, last_cell_col) # SQR#
-    (0, 0, 2, 2),  # SQR0
-    (0, 3, 2, 5),  # SQR1
-    (0, 6, 2, 8),  # SQR2
-    (3, 0, 5, 2),  # SQR3
-    (3, 3, 5, 5),  # SQR4
-    (3, 6, 5, 8),  # SQR5
-    (6, 0, 8, 2),  # SQR6
-    (6, 3, 8, 5),  # SQR7
-    (6, 6, 8, 8))  # SQR8
 
 ALL_POSS = frozenset(range(1, 10))  # all possibilities
 MIN_CLUES = 17  # minimum clue count
+# SolveJob statuses
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
 
 
 class SudokuPuzzle(models.Model):
-    unsolved_puzzle = ArrayField(
-        base_field=ArrayField(
-            base_field=models.IntegerField(), size=9),
-        size=9)
-
-    solved_puzzle = ArrayField(
-        base_field=ArrayField(
-            base_field=models.IntegerField(), size=9, blank=True, null=True,
-            default=list()),
-        size=9, blank=True, null=True, default=list())
+    DIFFICULTIES = tuple((difficulty, difficulty.capitalize())
+                         for difficulty in grading.DIFFICULTIES)
+
+    unsolved_puzzle = GridField()
+    solved_puzzle = GridField(blank=True, null=True, default=list)
     solved = models.BooleanField(default=False)
     correct = models.BooleanField(default=True)
-    missing_vals_pos = ArrayField(
-        base_field=ArrayField(
-                base_field=models.IntegerField(), size=2,
-                blank=True, null=True),
-        blank=True, null=True)
+    missing_vals_pos = CellsField(blank=True, null=True)
     solving_time = models.FloatField(default=float(0.0))
+    # engine stats of the last solve, see get_technique_totals
+    solving_stats = JSONField(blank=True, default=dict)
+    # utils.get_fingerprint of unsolved_puzzle, one row per puzzle
+    fingerprint = models.CharField(max_length=64, unique=True, editable=False)
+    # trace.Trace bytes of the last solve, if SOLVER_TRACE is on
+    solving_trace = models.BinaryField(blank=True, null=True, editable=False)
+    # grading.rate of unsolved_puzzle, set by logic solves and rate
+    difficulty = models.CharField(
+        max_length=10, choices=DIFFICULTIES, blank=True, db_index=True)
+    difficulty_score = models.IntegerField(
+        blank=True, null=True, db_index=True)
 
-    @silk_profile()
     def __str__(self):
         try:
             return "pk:%i - solved:%s" % (self.pk, self.solved)
         except TypeError:
             return "pk:unsaved - solved:%s" % self.solved
 
-    @silk_profile()
-    def solve(self):
-        #  MAIN SOLVING FLOW. CALL ALGO FUNCTIONS/METHODS FROM HERE
-        self.solved_puzzle = copy.deepcopy(self.unsolved_puzzle)
-        self.set_missing_vals_pos()
+    def save(self, *args, **kwargs):
+        self.fingerprint = utils.get_fingerprint(self.unsolved_puzzle)
+        super(SudokuPuzzle, self).save(*args, **kwargs)
 
-        if not self.is_correct():
-            self.save()
-            return False
+    @classmethod
+    def get_or_create_puzzle(cls, grid):
+        """ Gets the stored puzzle with the same clues as grid, with one
+            indexed lookup, or creates it.
 
-        start = timer()
-        self.create_puzzle_cells()
-        qty_vals_bef = 0
-        qty_vals_aft = 0
+            Args:
+                - grid (list): 9x9 unsolved puzzle.
 
-        # if values were found run again
-        while True:
-            qty_vals_bef = self.get_known_vals_qty()
-            # known vals qty BEFORE running solving methods
+            Returns:
+                - tuple: (SudokuPuzzle, bool whether it was created)
+        """
+        return cls.objects.get_or_create(
+            fingerprint=utils.get_fingerprint(grid),
+            defaults={'unsolved_puzzle': grid})
 
-            puzzle_cells = None
+    def solve(self, method=None, use_cache=True, commit=True):
+        """ MAIN SOLVING FLOW. CALL ALGO FUNCTIONS/METHODS FROM HERE
 
-            while True:
-                puzzle_cells = PuzzleCell.objects.filter(
-                    puzzle=self, filled=False)
+            Args:
+                - method (str or None): solving method, one of
+                    engine.METHODS. Defaults to settings.SOLVER_METHOD.
+                - use_cache (bool): whether to look the solution up in,
+                    and add it to, the solution cache.
+                - commit (bool): whether to save the puzzle. Without
+                    it the database isn't touched at all.
 
-                for cell in puzzle_cells:
-                    found = self.rec_sca_call(cell)
+            Returns:
+                - bool: whether the puzzle was solved correctly.
 
-                    if found:
-                        break
-                else:
-                    break
+            Raises:
+                - InvalidPuzzleError: if a value repeats in a unit or
+                    there are too few clues, see validation.validate.
+                    Nothing is saved, but stored puzzles are marked as
+                    not correct.
 
-            while True:
-                found = False
-                puzzle_cells = PuzzleCell.objects.filter(
-                    puzzle=self, filled=False)
-
-                for cell in puzzle_cells:
-                    cell.update_possibilities(
-                        cell.determine_possibilities(self))
-                    if self.single_pos_algo(cell) and not found:
-                        found = True
-                if not found:
-                    break
+            A SOLVER_PROFILE_RATE fraction of the solves is profiled,
+            see profiling.get_profile. Their timings are left in
+            self.profile.
+        """
+        if method is None:
+            method = getattr(settings, 'SOLVER_METHOD', 'logic')
+        if method not in engine.METHODS:
+            raise ValueError("Invalid solving method")
 
-            qty_vals_aft = self.get_known_vals_qty()
-            # known vals qty AFTER running solving methods
+        self.profile = profiling.get_profile()
+        try:
+            return self.run_solve(method, use_cache, commit)
+        finally:
+            if self.profile is not None:
+                profiling.record(self.profile)
+
+    def run_solve(self, method, use_cache, commit):
+        """ Body of solve, which also profiles it. """
+        profile = self.profile
+
+        with profiling.phase(profile, 'setup'):
+            self.solved_puzzle = copy.deepcopy(self.unsolved_puzzle)
+            self.set_missing_vals_pos()
+
+        with profiling.phase(profile, 'validation'):
+            try:
+                validation.validate(self.solved_puzzle, min_clues=MIN_CLUES)
+            except InvalidPuzzleError as e:
+                self.validation_error = e
+                self.correct = False
+                if commit and self.pk is not None:
+                    # stored puzzles keep the result, new ones aren't stored
+                    self.save()
+                raise
 
-            if not (qty_vals_bef < qty_vals_aft):
-                break
+        start = timer()
+        solution_cache = cache.get_solution_cache() if use_cache else None
+        solution = None
+
+        if solution_cache is not None:
+            with profiling.phase(profile, 'cache'):
+                cache_key = solution_cache.get_key(self.unsolved_puzzle)
+                solution = solution_cache.get(cache_key)
+
+        recorder = None
+        if solution is not None:
+            self.solved_puzzle = solution
+            self.solving_stats = {'cached': True}
+        else:
+            if method == 'logic' and getattr(settings, 'SOLVER_TRACE', False):
+                recorder = trace.Trace(self.unsolved_puzzle)
+            try:
+                self.solved_puzzle, self.solving_stats = engine.solve(
+                    self.solved_puzzle, method=method, profile=profile,
+                    trace=recorder)
+                if method == 'logic':
+                    # the stats rate the puzzle, no solving again
+                    self.difficulty, self.difficulty_score = \
+                        grading.rate_stats(self.solving_stats)
+            except engine.ContradictionError:
+                # the puzzle has no solution
+                self.correct = False
+                self.solving_stats = {}
+        self.solving_trace = None if recorder is None else recorder.to_bytes()
 
         end = timer()
+        self.solving_stats['method'] = method
+
+        if not self.correct:
+            if commit:
+                self.save()
+            return False
+
         self.solving_time = end - start
         self.solved = True
-        if not self.is_correct():
+        with profiling.phase(profile, 'validation'):
+            correct = self.is_correct()
+        if not correct:
             return False
-        self.save()
+        if solution_cache is not None and solution is None:
+            with profiling.phase(profile, 'cache'):
+                solution_cache.set(cache_key, self.solved_puzzle)
+        if commit:
+            with profiling.phase(profile, 'save'):
+                self.save()
         return True
 
-    @silk_profile()
+    def rate(self, commit=True):
+        """ Sets the difficulty of the puzzle, see grading.rate, for
+            puzzles not solved by the logic method.
+
+            Args:
+                - commit (bool): whether to save the rating.
+
+            Raises:
+                - ContradictionError: if the puzzle has no solution.
+        """
+        self.difficulty, self.difficulty_score = grading.rate(
+            self.unsolved_puzzle)
+
+        if commit:
+            self.save()
+
+    @classmethod
+    def get_technique_totals(cls, queryset=None):
+        """ Adds up the stats of every technique over stored solves, in
+            the database.
+
+            Args:
+                - queryset (QuerySet or None): puzzles to add up,
+                    defaults to all of them.
+
+            Returns:
+                - OrderedDict: technique: dict with engine.TECHNIQUE_STATS
+                    totals.
+        """
+        if queryset is None:
+            queryset = cls.objects.all()
+
+        aggregates = {}
+        for name in engine.TECHNIQUES:
+            technique = KeyTransform(
+                name, KeyTransform('techniques', 'solving_stats'))
+
+            for key in engine.TECHNIQUE_STATS:
+                aggregates['%s__%s' % (name, key)] = Sum(Cast(
+                    KeyTextTransform(key, technique), models.FloatField()))
+
+        totals = queryset.aggregate(**aggregates)
+        return OrderedDict((name, dict(
+            (key, totals['%s__%s' % (name, key)] or 0)
+            for key in engine.TECHNIQUE_STATS))
+            for name in engine.TECHNIQUES)
+
     def get_row_q(self, i):
         """ Gets the row's Q object
 
@@ -125,7 +238,6 @@ class SudokuPuzzle(models.Model):
         """
         return Q(row=i)
 
-    @silk_profile()
     def get_row(self, i):
         """ Gets the known numbers in the ith row. Doesn't use
             get_row_q to avoid unnecessary database hit.
@@ -138,7 +250,6 @@ class SudokuPuzzle(models.Model):
         """
         return utils.remove_zeroes(self.solved_puzzle[i])
 
-    @silk_profile()
     def get_col_q(self, j):
         """ Gets the column's Q object.
 
@@ -151,7 +262,6 @@ class SudokuPuzzle(models.Model):
         """
         return Q(col=j)
 
-    @silk_profile()
     def get_col(self, j):
         """ Gets the known numbers in the jth column. Doesn't use
             get_col_q to avoid unnecessary database hit.
@@ -162,42 +272,27 @@ class SudokuPuzzle(models.Model):
             Returns:
                 - list: contains the column's known numbers
         """
-        np_arr = np.array(self.solved_puzzle)
-        return utils.remove_zeroes(np_arr[:, j].tolist())
+        return utils.remove_zeroes(
+            [self.solved_puzzle[i][j] for i in range(9)])
 
-    @silk_profile()
     def get_sqr_def(self, i, j):
-        sqr_boundaries = [0, 0, 0, 0]
-
-        # get square row boundaries
-        if (i >= 0 and i <= 2):
-            sqr_boundaries[0] = 0
-            sqr_boundaries[2] = 2
-        elif (i >= 3 and i <= 5):
-            sqr_boundaries[0] = 3
-            sqr_boundaries[2] = 5
-        elif (i >= 6 and i <= 8):
-            sqr_boundaries[0] = 6
-            sqr_boundaries[2] = 8
-
-        # get square col boundaries
-        if (j >= 0 and j <= 2):
-            sqr_boundaries[1] = 0
-            sqr_boundaries[3] = 2
-        elif (j >= 3 and j <= 5):
-            sqr_boundaries[1] = 3
-            sqr_boundaries[3] = 5
-        elif (j >= 6 and j <= 8):
-            sqr_boundaries[1] = 6
-            sqr_boundaries[3] = 8
-
-        # assert that sqr is valid
-        if (tuple(sqr_boundaries) not in SQUARE_DEFS):
+        """ Gets the boundaries of the square containing cell (i, j).
+
+            Args:
+                - i (int): row zero index
+                - j (int): column zero index
+
+            Returns:
+                - list: [first_cell_row, first_cell_col,
+                    last_cell_row, last_cell_col]
+        """
+        try:
+            idx = units.get_idx(i, j)
+        except ValueError:
             raise ValueError("Invalid square")
 
-        return sqr_boundaries
+        return list(SQUARE_DEFS[units.SQR_OF[idx]])
 
-    @silk_profile()
     def get_sqr_q(self, i, j):
         """ Gets the square's Q object.
 
@@ -214,7 +309,6 @@ class SudokuPuzzle(models.Model):
         return Q(row__gte=sqr_def[0],  col__gte=sqr_def[1]) & \
             Q(row__lte=sqr_def[2], col__lte=sqr_def[3])
 
-    @silk_profile()
     def get_sqr(self, i, j):
         """ Gets the square's known values. Doesn't use
             qet_sqr_q to avoid extra database hit.
@@ -226,17 +320,12 @@ class SudokuPuzzle(models.Model):
             Returns:
                 - list: contains known square numbers.
         """
-        sqr_boundaries = self.get_sqr_def(i, j)
-
-        np_arr = np.array(self.solved_puzzle)
-        sqr = np_arr[
-            sqr_boundaries[0]:sqr_boundaries[2]+1,
-            sqr_boundaries[1]:sqr_boundaries[3]+1]
+        sqr = units.SQRS[units.SQR_OF[units.get_idx(i, j)]]
 
-        # np.ravel puts array values in a 1D list
-        return utils.remove_zeroes(np.ravel(sqr).tolist())
+        return utils.remove_zeroes([
+            self.solved_puzzle[units.ROW_OF[idx]][units.COL_OF[idx]]
+            for idx in sqr])
 
-    @silk_profile()
     def create_puzzle_cells(self, auto_fill=True):
         to_create = []
         for i in range(9):
@@ -257,7 +346,6 @@ class SudokuPuzzle(models.Model):
                 to_create.append(cell)
         PuzzleCell.objects.bulk_create(to_create)
 
-    @silk_profile()
     def single_cand_algo(self, cell, save=True):
         """ Applies the single candidate algorithm to a cell.
 
@@ -281,7 +369,6 @@ class SudokuPuzzle(models.Model):
         else:
             return cell
 
-    @silk_profile()
     def set_missing_vals_pos(self):
         self.missing_vals_pos = list()
 
@@ -290,7 +377,6 @@ class SudokuPuzzle(models.Model):
                 if self.solved_puzzle[i][j] == 0:
                     self.missing_vals_pos.append(list([i, j]))
 
-    @silk_profile()
     def get_known_vals_qty(self):
         """ Gets the quantity of known values in the puzzle.
 
@@ -299,7 +385,24 @@ class SudokuPuzzle(models.Model):
         return len(utils.remove_zeroes(np.ravel(
             self.solved_puzzle).tolist()))
 
-    @silk_profile()
+    def get_cells_by_idx(self, filled=None):
+        """ Gets the puzzle's cells with a single query.
+
+            Args:
+                - filled (bool or None): True if only filled cells
+                    are desired. False if only unfilled cells are desired.
+                    None if all cells are desired.
+
+            Returns:
+                - dict: PuzzleCell objects by flat cell index.
+        """
+        cells = PuzzleCell.objects.filter(puzzle=self)
+
+        if filled in [True, False]:
+            cells = cells.filter(filled=filled)
+
+        return {units.get_idx(cell.row, cell.col): cell for cell in cells}
+
     def get_related_cells(self, cell, filled=False):
         """ Gets the related cells of a given cell.
 
@@ -310,22 +413,13 @@ class SudokuPuzzle(models.Model):
                     None if all related cells are desired.
 
             Returns:
-                - django.db.models.query.QuerySet: contains all
-                    related cell objects.
+                - list: contains all related cell objects.
         """
-        gen_dict = {'puzzle': self}
-
-        if filled in [True, False]:
-            gen_dict['filled'] = filled
-
-        q_gen = Q(**gen_dict)
+        cells = self.get_cells_by_idx(filled)
 
-        return PuzzleCell.objects.filter(
-            q_gen, (self.get_row_q(cell.row) | self.get_col_q(cell.col) |
-                    self.get_sqr_q(cell.row, cell.col))).\
-            distinct().exclude(pk=cell.pk)
+        return [cells[idx] for idx in units.PEERS[
+            units.get_idx(cell.row, cell.col)] if idx in cells]
 
-    @silk_profile()
     def rec_sca_call(self, cell):
         """
             Recursive single candidate algorithm (single_cand_algo) call.
@@ -347,7 +441,6 @@ class SudokuPuzzle(models.Model):
 
         return vals_found
 
-    @silk_profile()
     def single_pos_algo(self, cell):
         """
             Applies the single position algorithm to the provided cell.
@@ -359,23 +452,13 @@ class SudokuPuzzle(models.Model):
                 - bool: True if values found
         """
 
-        q_gen = Q(puzzle=self)
-        q_col = self.get_col_q(cell.col)
-        q_row = self.get_row_q(cell.row)
-        q_sqr = self.get_sqr_q(cell.col, cell.row)
-
-        col_cells = PuzzleCell.objects.filter(
-            q_gen, q_col).exclude(pk=cell.pk)
-        row_cells = PuzzleCell.objects.filter(
-            q_gen, q_row).exclude(pk=cell.pk)
-        sqr_cells = PuzzleCell.objects.filter(
-            q_gen, q_sqr).exclude(pk=cell.pk)
-        related_cells_lst = [
-            list(col_cells),
-            list(row_cells),
-            list(sqr_cells)]
-
-        for related_cells in related_cells_lst:
+        cell_idx = units.get_idx(cell.row, cell.col)
+        cells = self.get_cells_by_idx()
+
+        for unit in units.CELL_UNITS[cell_idx]:
+            related_cells = [
+                cells[idx] for idx in unit
+                if idx != cell_idx and idx in cells]
             poss = set(cell.possibilities)
 
             for related_cell in related_cells:
@@ -397,35 +480,27 @@ class SudokuPuzzle(models.Model):
                 else:
                     raise ValueError("Invalid number of unique possiblities")
 
-    @silk_profile()
     def is_correct(self):
         """
             Determines if numbers in puzzle don't repeat in the same square,
-            row or col. For solved puzzles also checks if amount of solved
-            cells is 81.
+            row or col, in a single pass, see validation.validate. For
+            solved puzzles also checks if amount of solved cells is 81.
+            The reason a puzzle isn't correct is left in
+            self.validation_error.
 
             Args:
                 None
             Returns:
                 - bool: whether puzzle is correct or not.
          """
-        if self.get_known_vals_qty() < MIN_CLUES:
+        try:
+            validation.validate(self.solved_puzzle, complete=self.solved,
+                                min_clues=MIN_CLUES)
+        except InvalidPuzzleError as e:
+            self.validation_error = e
             self.correct = False
-
         else:
-            for idx in range(9):
-                sqr = self.get_sqr(SQUARE_DEFS[idx][0], SQUARE_DEFS[idx][1])
-                row = self.get_row(idx)
-                col = self.get_col(idx)
-
-                for lst in [sqr, row, col]:
-                    unique_vals = set(lst)
-
-                    if not unique_vals.issubset(ALL_POSS) or\
-                            len(lst) != len(unique_vals) or\
-                            (self.solved and (len(unique_vals) != 9)):
-                        self.correct = False
-                        return self.correct
+            self.validation_error = None
             self.correct = True
         return self.correct
 
@@ -444,7 +519,6 @@ class PuzzleCell(models.Model):
     def __str__(self):
         return "v:%i - r:%i - c:%i" % (self.value, self.row, self.col)
 
-    @silk_profile()
     def determine_possibilities(self, puzzle):
         """ Determines all possibilities for a given cell.
 
@@ -454,20 +528,40 @@ class PuzzleCell(models.Model):
                     may not be saved.
         """
 
-        cell_poss = set(ALL_POSS)
-        row = puzzle.get_row(self.row)
-        col = puzzle.get_col(self.col)
-        sqr = puzzle.get_sqr(self.row, self.col)
-
-        cell_poss = cell_poss.difference(set(row))
-        cell_poss = cell_poss.difference(set(col))
-        cell_poss = cell_poss.difference(set(sqr))
+        cell_poss = engine.get_cell_candidates(
+            puzzle.solved_puzzle, self.row, self.col)
 
         if len(cell_poss) < 1 or len(cell_poss) > 9:
             raise ValueError("Invalid number of possibilities")
 
         return cell_poss
 
-    @silk_profile()
     def update_possibilities(self, cell_poss):
         self.possibilities = list(cell_poss)
+
+
+class SolveJob(models.Model):
+    """ A puzzle waiting to be solved, or being solved, by
+        run_solver_workers. See solver.jobs.
+    """
+    STATUSES = (
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    )
+
+    puzzle = models.ForeignKey(SudokuPuzzle, on_delete=models.CASCADE)
+    method = models.CharField(max_length=10, blank=True)
+    status = models.CharField(
+        max_length=10, choices=STATUSES, default=PENDING)
+    error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    started = models.DateTimeField(blank=True, null=True)
+    finished = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        index_together = [('status', 'id')]  # workers claim in id order
+
+    def __str__(self):
+        return "pk:%s - %s" % (self.pk, self.status)
@@ -0,0 +1,29 @@
+from __future__ import unicode_literals
+from contextlib import contextmanager
+from multiprocessing import Pool
+from django.db import connections
+
+
+@contextmanager
+def get_pool(processes):
+    """ Starts the process pool of a management command, terminated on
+        exit. This process' database connections are closed first, as
+        forked children must not share them.
+
+        Args:
+            - processes (int): worker processes, 0 for no pool.
+
+        Returns:
+            - context manager: giving a Pool, or None for 0 processes.
+    """
+    if not processes:
+        yield None
+        return
+
+    connections.close_all()
+    pool = Pool(processes)
+    try:
+        yield pool
+    finally:
+        pool.terminate()
+        pool.join()
@@ -0,0 +1,140 @@
+from __future__ import unicode_literals
+from collections import OrderedDict
+import logging
+import random
+import threading
+from timeit import default_timer as timer
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Profile(object):
+    """ Per-phase timings of one solve, e.g. setup, single_cand,
+        single_pos, search and validation. Nested phases are only
+        counted once: their time is taken out of the enclosing phase.
+    """
+
+    def __init__(self):
+        self.timings = OrderedDict()  # phase: seconds
+        self.nested = []  # time spent in nested phases, per open phase
+
+    def phase(self, name):
+        """ Times a block of code, used as a context manager. """
+        return Phase(self, name)
+
+    def add(self, name, elapsed):
+        nested = self.nested.pop()
+        self.timings[name] = self.timings.get(name, 0.0) + elapsed - nested
+
+        if self.nested:
+            self.nested[-1] += elapsed
+
+    def wrap(self, obj, name, phase):
+        """ Times every call to one of an object's methods, leaving the
+            class untouched.
+
+            Args:
+                - obj (object)
+                - name (str): method name.
+                - phase (str): phase the calls are counted in.
+        """
+        method = getattr(obj, name)
+
+        def timed(*args, **kwargs):
+            with Phase(self, phase):
+                return method(*args, **kwargs)
+
+        setattr(obj, name, timed)
+
+
+class Phase(object):
+    def __init__(self, profile, name):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self):
+        self.profile.nested.append(0.0)
+        self.start = timer()
+
+    def __exit__(self, *exc_info):
+        self.profile.add(self.name, timer() - self.start)
+
+
+class NullPhase(object):
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+NULL_PHASE = NullPhase()
+
+
+def phase(profile, name):
+    """ Times a block of code if profile isn't None.
+
+        Args:
+            - profile (Profile or None): from get_profile.
+            - name (str): phase name.
+
+        Returns:
+            - context manager
+    """
+    return NULL_PHASE if profile is None else profile.phase(name)
+
+
+def get_profile():
+    """ Decides whether to profile a solve, as set by SOLVER_PROFILE_RATE:
+        the fraction of solves profiled, 0 to never profile.
+
+        Returns:
+            - Profile or None
+    """
+    rate = getattr(settings, 'SOLVER_PROFILE_RATE', 0)
+
+    if rate and random.random() < rate:
+        return Profile()
+    return None
+
+
+class Totals(object):
+    """ Phase timings added up over the profiled solves of the process. """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def add(self, profile):
+        with self.lock:
+            self.samples += 1
+            for name, elapsed in profile.timings.items():
+                self.timings[name] = self.timings.get(name, 0.0) + elapsed
+
+    def get_means(self):
+        """ Gets the mean time of every phase per profiled solve.
+
+            Returns:
+                - OrderedDict: phase: seconds.
+        """
+        with self.lock:
+            return OrderedDict(
+                (name, elapsed / self.samples)
+                for name, elapsed in self.timings.items())
+
+    def clear(self):
+        with self.lock:
+            self.samples = 0
+            self.timings = OrderedDict()
+
+
+totals = Totals()
+
+
+def record(profile):
+    """ Adds a finished profile to the totals and logs it. """
+    totals.add(profile)
+    logger.debug("Solve profile: %s", ', '.join(
+        '%s %.3fms' % (name, elapsed * 1000)
+        for name, elapsed in profile.timings.items()))
@@ -0,0 +1,236 @@
+from __future__ import unicode_literals
+from itertools import permutations, product
+import random
+
+MAX_STATES = 1024  # partial transforms kept per row, bounds the work
+
+
+class Transform(object):
+    """ A sudoku symmetry: optional transpose, then a row and a column
+        permutation that keep bands and stacks together, then a
+        relabelling of the values.
+    """
+
+    def __init__(self, transpose, rows, cols, labels):
+        """
+            Args:
+                - transpose (bool): whether the grid is transposed first.
+                - rows (tuple): rows[r] is the row moved to row r.
+                - cols (tuple): cols[c] is the column moved to column c.
+                - labels (tuple): labels[v] is the new value of v,
+                    labels[0] is always 0.
+        """
+        self.transpose = transpose
+        self.rows = rows
+        self.cols = cols
+        self.labels = labels
+
+    def apply(self, grid):
+        """ Transforms a 9x9 grid.
+
+            Returns:
+                - list: transformed 9x9 nested list.
+        """
+        if self.transpose:
+            grid = list(zip(*grid))
+
+        return [[self.labels[grid[i][j]] for j in self.cols]
+                for i in self.rows]
+
+    def revert(self, grid):
+        """ Undoes apply, e.g. to bring a solution of the transformed
+            puzzle back to the orientation of the original one.
+
+            Returns:
+                - list: 9x9 nested list.
+        """
+        values = [0] * 10
+        for val, label in enumerate(self.labels):
+            values[label] = val
+
+        reverted = [[0] * 9 for i in range(9)]
+        for r, i in enumerate(self.rows):
+            for c, j in enumerate(self.cols):
+                reverted[i][j] = values[grid[r][c]]
+
+        if self.transpose:
+            reverted = [list(row) for row in zip(*reverted)]
+
+        return reverted
+
+
+def get_random_transform(rng=random):
+    """ Picks a transform uniformly at random.
+
+        Args:
+            - rng (random.Random): source of randomness, for repeatable
+                picks.
+
+        Returns:
+            - Transform
+    """
+    lines = []
+    for k in range(2):  # rows, then columns
+        lines.append(tuple(
+            band * 3 + i for band in rng.sample(range(3), 3)
+            for i in rng.sample(range(3), 3)))
+
+    return Transform(rng.random() < 0.5, lines[0], lines[1],
+                     tuple([0] + rng.sample(range(1, 10), 9)))
+
+
+def get_next_rows(rows):
+    """ Gets the rows that may be placed after the given ones while
+        keeping bands together.
+
+        Args:
+            - rows (tuple): rows placed so far.
+
+        Returns:
+            - list: row indexes.
+    """
+    if len(rows) % 3:
+        band = rows[-1] // 3
+        return [i for i in range(band * 3, band * 3 + 3) if i not in rows]
+
+    used_bands = set(i // 3 for i in rows)
+    return [i for i in range(9) if i // 3 not in used_bands]
+
+
+def get_min_row(values, groups, labels, next_label):
+    """ Gets the smallest relabelled row that the still undecided column
+        orders allow.
+
+        Args:
+            - values (list): the row's values, by original column.
+            - groups (tuple): column groups, left to right. Columns in
+                the same group may still be reordered.
+            - labels (dict): labels of the values seen so far.
+            - next_label (int): label of the next new value.
+
+        Returns:
+            - list: the relabelled row.
+    """
+    row = []
+
+    for group in groups:
+        seen = sorted(labels[values[j]] for j in group
+                      if values[j] in labels)
+        new = len(set(values[j] for j in group
+                      if values[j] and values[j] not in labels))
+        row.extend([0] * sum(1 for j in group if not values[j]))
+        row.extend(seen)
+        row.extend(range(next_label, next_label + new))
+        next_label += new
+
+    return row
+
+
+def split_groups(values, groups, labels, next_label):
+    """ Reorders the columns as get_min_row does. New values in the same
+        group give the same row in any order, so every order is
+        returned.
+
+        Args:
+            - same as get_min_row.
+
+        Returns:
+            - list: (groups, labels, next_label) tuples.
+    """
+    splits = []  # every group's ways of splitting
+
+    for group in groups:
+        zeros = tuple(j for j in group if not values[j])
+        seen = sorted(set(values[j] for j in group if values[j] in labels),
+                      key=labels.get)
+        new = sorted(set(values[j] for j in group
+                         if values[j] and values[j] not in labels))
+        head = ((zeros,) if zeros else ()) + tuple(
+            tuple(j for j in group if values[j] == val) for val in seen)
+        splits.append([(head, order) for order in permutations(new)])
+
+    results = []
+
+    for split in product(*splits):
+        new_groups = ()
+        new_labels = dict(labels)
+        label = next_label
+
+        for group, (head, order) in zip(groups, split):
+            new_groups += head
+            for val in order:
+                new_groups += (tuple(j for j in group if values[j] == val),)
+                new_labels[val] = label
+                label += 1
+
+        results.append((new_groups, new_labels, label))
+
+    return results
+
+
+def canonicalize(grid):
+    """ Gets the canonical form of a puzzle: the lexicographically
+        smallest grid, read row by row with 0 first, among all the
+        transposes, band, stack, row and column swaps and relabellings
+        of it. Equivalent puzzles share it.
+
+        The search goes one row at a time and keeps only the partial
+        transforms giving the smallest rows so far. Columns that no row
+        has told apart yet are kept as groups instead of being tried
+        in every order. Past MAX_STATES partial transforms the rest are
+        dropped: the result is still a transform of the puzzle, but
+        equivalent puzzles may then get different forms.
+
+        Args:
+            - grid (list): 9x9 nested list, 0 means unknown value.
+
+        Returns:
+            - tuple: (canonical 9x9 nested list, Transform)
+    """
+    states = []  # (grid, transpose, rows, groups, labels, next_label)
+
+    for transpose, grid_t in ((False, grid), (True, list(zip(*grid)))):
+        for stacks in permutations(range(3)):
+            groups = tuple(tuple(range(k * 3, k * 3 + 3)) for k in stacks)
+            states.append((grid_t, transpose, (), groups, {}, 1))
+
+    for r in range(9):
+        best_row = None
+        best = []
+
+        for state in states:
+            grid_t, transpose, rows, groups, labels, next_label = state
+
+            for i in get_next_rows(rows):
+                row = get_min_row(grid_t[i], groups, labels, next_label)
+
+                if best_row is None or row < best_row:
+                    best_row = row
+                    best = []
+                if row == best_row:
+                    best.append((state, i))
+
+        states = []
+
+        for state, i in best:
+            grid_t, transpose, rows, groups, labels, next_label = state
+
+            for split in split_groups(grid_t[i], groups, labels, next_label):
+                states.append((grid_t, transpose, rows + (i,)) + split)
+
+            if len(states) >= MAX_STATES:
+                break
+
+    grid_t, transpose, rows, groups, labels, next_label = states[0]
+    cols = tuple(j for group in groups for j in sorted(group))
+
+    # values missing from the puzzle take the labels left
+    for val in range(1, 10):
+        if val not in labels:
+            labels[val] = next_label
+            next_label += 1
+
+    transform = Transform(transpose, rows, cols, tuple(
+        [0] + [labels[val] for val in range(1, 10)]))
+
+    return transform.apply(grid), transform
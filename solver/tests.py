@@ -1,17 +1,39 @@
 import copy
-from django.test import TestCase, Client
+from datetime import timedelta
+import gzip
+import io
+import json
+import random
+import tempfile
+import time
+from django.contrib.auth.models import User
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command, CommandError
+from django.db import IntegrityError, transaction
+from django.forms import modelform_factory
+from django.utils import timezone
+from django.utils.six import StringIO
+from django.test import TestCase, Client, override_settings
 from factories import (
-    SudokuPuzzleFactory, PuzzleCellFactory)
+    SudokuPuzzleFactory, PuzzleCellFactory, EASY_PUZZLE, EASY_SOLUTION,
+    HARD_PUZZLE)
 import numpy as np
-from . import models, views
+from . import (models, views, engine, units, dlx, batch, cache,
+               symmetry, formats, bench, profiling, jobs, incremental,
+               trace, hints, generator, grading, validation)
+from .management.commands import import_puzzles, run_solver_workers
+from .exceptions import (
+    ContradictionError, InvalidPuzzleError, NotUniqueError)
 from .templatetags.return_item import return_item
 from .templatetags.sudoku_grid import sudoku_grid
 from django.db.models import Q
+from sudoku_solver import utils
 
 
 class SudokuPuzzleTestCase(TestCase):
     def setUp(self):
         self.puzzle = SudokuPuzzleFactory.create()
+        cache.get_solution_cache().clear()
 
     def test_str_with_saved_puzzle(self):
         pk = self.puzzle.pk
@@ -36,7 +58,15 @@ class SudokuPuzzleTestCase(TestCase):
         self.assertTrue(self.puzzle.correct)
         self.assertTrue(self.puzzle.solving_time > 0.0)
 
-    def test_puzzle_solve_incorrect(self):
+    def test_solve_does_not_create_puzzle_cells(self):
+        self.puzzle.solve()
+        cells = models.PuzzleCell.objects.filter(puzzle=self.puzzle)
+
+        self.assertEqual(cells.count(), 0)
+        self.assertEqual(self.puzzle.solved_puzzle,
+                         [list(row) for row in EASY_SOLUTION])
+
+    def test_puzzle_solve_with_search(self):
         self.assertFalse(self.puzzle.solved)
         known_vals = self.puzzle.get_known_vals_qty()
         self.assertTrue(known_vals < 81)
@@ -49,6 +79,121 @@ class SudokuPuzzleTestCase(TestCase):
         self.puzzle.save()
         self.puzzle.solve()
         self.assertTrue(self.puzzle.solved)
+        self.assertTrue(self.puzzle.correct)
+        self.assertEqual(self.puzzle.get_known_vals_qty(), 81)
+
+    def test_solve_uses_solution_cache(self):
+        self.assertTrue(self.puzzle.solve())
+        # same puzzle with the values shifted, which the cache shares
+        relabel = symmetry.Transform(
+            False, range(9), range(9), (0, 2, 3, 4, 5, 6, 7, 8, 9, 1))
+        puzzle = SudokuPuzzleFactory.create(
+            unsolved_puzzle=relabel.apply(EASY_PUZZLE))
+
+        self.assertTrue(puzzle.solve())
+        self.assertTrue(puzzle.solving_stats['cached'])
+        self.assertEqual(puzzle.solved_puzzle,
+                         relabel.apply(self.puzzle.solved_puzzle))
+        self.assertEqual(cache.get_solution_cache().hits, 1)
+
+    def test_solve_without_cache(self):
+        self.assertTrue(self.puzzle.solve())
+        puzzle = SudokuPuzzleFactory.create(
+            unsolved_puzzle=[list(row) for row in HARD_PUZZLE])
+
+        self.assertTrue(puzzle.solve(use_cache=False))
+        self.assertFalse('cached' in puzzle.solving_stats)
+        self.assertEqual(cache.get_solution_cache().hits, 0)
+
+    def test_solve_without_commit(self):
+        puzzle = models.SudokuPuzzle(unsolved_puzzle=EASY_PUZZLE)
+
+        with self.assertNumQueries(0):
+            self.assertTrue(puzzle.solve(use_cache=False, commit=False))
+        self.assertEqual(utils.grid_to_str(puzzle.solved_puzzle),
+                         utils.grid_to_str(EASY_SOLUTION))
+        self.assertTrue(puzzle.pk is None)
+
+    def test_save_sets_fingerprint(self):
+        self.assertEqual(self.puzzle.fingerprint,
+                         utils.get_fingerprint(EASY_PUZZLE))
+
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic():
+                SudokuPuzzleFactory.create()
+
+    def test_grids_round_trip(self):
+        self.puzzle.solve()
+        puzzle = models.SudokuPuzzle.objects.get(pk=self.puzzle.pk)
+
+        self.assertEqual(puzzle.unsolved_puzzle,
+                         [list(row) for row in EASY_PUZZLE])
+        self.assertEqual(puzzle.solved_puzzle,
+                         [list(row) for row in EASY_SOLUTION])
+        self.assertEqual(puzzle.missing_vals_pos[:2], [[0, 0], [0, 1]])
+        self.assertEqual(len(puzzle.missing_vals_pos), 46)
+
+        puzzle = SudokuPuzzleFactory.create(
+            unsolved_puzzle=[list(row) for row in HARD_PUZZLE],
+            solved_puzzle=[])
+        self.assertEqual(models.SudokuPuzzle.objects.get(
+            pk=puzzle.pk).solved_puzzle, [])
+
+    def test_get_or_create_puzzle(self):
+        puzzle, created = models.SudokuPuzzle.get_or_create_puzzle(
+            [list(row) for row in EASY_PUZZLE])
+        self.assertFalse(created)
+        self.assertEqual(puzzle.pk, self.puzzle.pk)
+
+        puzzle, created = models.SudokuPuzzle.get_or_create_puzzle(
+            [list(row) for row in HARD_PUZZLE])
+        self.assertTrue(created)
+        self.assertEqual(puzzle.fingerprint,
+                         utils.get_fingerprint(HARD_PUZZLE))
+
+    def test_solve_stores_solving_stats(self):
+        self.puzzle.solve(use_cache=False)
+        stats = models.SudokuPuzzle.objects.get(
+            pk=self.puzzle.pk).solving_stats
+
+        self.assertEqual(stats['method'], 'logic')
+        self.assertTrue(stats['iterations'] > 0)
+        self.assertEqual(stats['techniques']['single_cand']['placements'] +
+                         stats['techniques']['single_pos']['placements'], 46)
+
+    def test_get_technique_totals(self):
+        self.puzzle.solve(use_cache=False)
+        puzzle = SudokuPuzzleFactory.create(
+            unsolved_puzzle=[list(row) for row in HARD_PUZZLE])
+        puzzle.solve(use_cache=False)
+        totals = models.SudokuPuzzle.get_technique_totals()
+
+        self.assertEqual(list(totals), list(engine.TECHNIQUES))
+        for name in engine.TECHNIQUES:
+            self.assertEqual(totals[name]['calls'], sum(
+                p.solving_stats['techniques'][name]['calls']
+                for p in (self.puzzle, puzzle)))
+        self.assertEqual(models.SudokuPuzzle.get_technique_totals(
+            models.SudokuPuzzle.objects.filter(pk=puzzle.pk))[
+            'single_pos']['placements'],
+            puzzle.solving_stats['techniques']['single_pos']['placements'])
+
+    def test_solve_with_dlx(self):
+        self.assertTrue(self.puzzle.solve(method='dlx'))
+        self.assertTrue(self.puzzle.solving_stats['nodes'] > 0)
+
+    @override_settings(SOLVER_METHOD='dlx')
+    def test_solve_uses_solver_method_setting(self):
+        self.puzzle.solve()
+        self.assertFalse('guesses' in self.puzzle.solving_stats)
+
+    def test_puzzle_solve_incorrect(self):
+        self.assertFalse(self.puzzle.solved)
+        self.puzzle.unsolved_puzzle[0][0] = 3  # solution value is 9
+        self.puzzle.save()
+
+        self.assertFalse(self.puzzle.solve())
+        self.assertFalse(self.puzzle.solved)
         self.assertFalse(self.puzzle.correct)
 
     def test_puzzle_not_solved(self):
@@ -62,9 +207,22 @@ class SudokuPuzzleTestCase(TestCase):
             self.puzzle.unsolved_puzzle[i] = list(lst)
 
         self.puzzle.save()
-        self.puzzle.solve()
+        with self.assertRaises(InvalidPuzzleError):
+            self.puzzle.solve()
         self.assertFalse(self.puzzle.solved)
-        self.assertFalse(self.puzzle.correct)
+        self.assertFalse(models.SudokuPuzzle.objects.get(
+            pk=self.puzzle.pk).correct)
+
+    def test_solve_invalid_not_saved(self):
+        grid = [list(row) for row in EASY_PUZZLE]
+        grid[0][0] = 7  # repeated in the first row
+        puzzle = models.SudokuPuzzle(unsolved_puzzle=grid)
+
+        with self.assertRaises(InvalidPuzzleError) as context:
+            puzzle.solve()
+        self.assertEqual(context.exception.unit, ('row', 0))
+        self.assertTrue(puzzle.pk is None)
+        self.assertEqual(models.SudokuPuzzle.objects.count(), 1)
 
     def test_get_row(self):
         expected_row = [7, 4, 2, 8]
@@ -316,6 +474,38 @@ class SudokuPuzzleTestCase(TestCase):
 
         self.assertFalse(first_cell.filled)
 
+    def test_single_pos_algo_uses_cell_square(self):
+        i = 1
+        j = 4
+        CELL_VAL = 2  # only (1, 4) allows it within its square
+        self.puzzle.create_puzzle_cells(auto_fill=False)
+        cells = self.puzzle.get_cells_by_idx(filled=False)
+        cell_idx = units.get_idx(i, j)
+        sqr = units.CELL_UNITS[cell_idx][2]
+
+        for idx in units.PEERS[cell_idx]:
+            if idx in cells:
+                cell = cells[idx]
+                cell.possibilities = list(range(1, 10))
+                if idx in sqr:
+                    cell.possibilities.remove(CELL_VAL)
+                cell.save()
+
+        self.assertTrue(self.puzzle.single_pos_algo(cells[cell_idx]))
+        cell = models.PuzzleCell.objects.get(
+            puzzle=self.puzzle, row=i, col=j)
+        self.assertEqual(cell.value, CELL_VAL)
+
+    def test_get_cells_by_idx(self):
+        self.puzzle.create_puzzle_cells(auto_fill=False)
+
+        cells = self.puzzle.get_cells_by_idx()
+        self.assertEqual(len(cells), 81)
+        self.assertEqual((cells[10].row, cells[10].col), (1, 1))
+
+        cells = self.puzzle.get_cells_by_idx(filled=True)
+        self.assertEqual(len(cells), 35)
+
     def test_get_row_q(self):
         """ Tests that get_row_q returns correct Q object """
         DESIRED_ROW = 0
@@ -412,10 +602,11 @@ class SudokuPuzzleTestCase(TestCase):
     def test_is_correct_unsolved_failure1(self):
         lst = [10, 12, 20, 0, 0, 0, 0, 0, 0]
         self.puzzle.solved_puzzle[0] = list(lst)
-        self.puzzle.save()
 
         self.assertFalse(self.puzzle.is_correct())
         self.assertFalse(self.puzzle.correct)
+        with self.assertRaises(ValueError):  # can't be stored either
+            self.puzzle.save()
 
     def test_is_correct_unsolved_failure2(self):
         lst = [0, 0, 0, 0, 1, 1, 0, 0, 0]
@@ -456,6 +647,1430 @@ class SudokuPuzzleTestCase(TestCase):
         self.assertFalse(self.puzzle.correct)
 
 
+class SolvingEngineTestCase(TestCase):
+    def setUp(self):
+        self.engine = engine.SolvingEngine(EASY_PUZZLE)
+
+    def test_get_grid(self):
+        self.assertEqual(self.engine.get_grid(),
+                         [list(row) for row in EASY_PUZZLE])
+
+    def test_get_candidates(self):
+        exp_poss = set([3, 5, 9])  # expected possibilities of cell (0, 0)
+        self.assertEqual(self.engine.get_candidates(0), exp_poss)
+
+    def test_get_cand_mask(self):
+        exp_mask = 0b100010100  # 3, 5 and 9
+        self.assertEqual(self.engine.get_cand_mask(0), exp_mask)
+
+    def test_place_updates_masks(self):
+        self.engine.place(0, 9)
+
+        self.assertEqual(self.engine.values[0], 9)
+        self.assertEqual(self.engine.get_cand_mask(1) & engine.BIT[9], 0)
+        self.assertEqual(self.engine.get_cand_mask(27) & engine.BIT[9], 0)
+        self.assertEqual(self.engine.get_cand_mask(20) & engine.BIT[9], 0)
+
+    def test_single_cand(self):
+        exp_vals = 45  # same as create_puzzle_cells with auto_fill on
+        found = self.engine.single_cand()
+
+        self.assertEqual(found, 10)
+        self.assertEqual(self.engine.get_known_vals_qty(), exp_vals)
+
+    def test_single_pos(self):
+        found = self.engine.single_pos()
+
+        self.assertTrue(found > 0)
+        self.assertEqual(self.engine.get_known_vals_qty(), 35 + found)
+
+    def test_single_cand_raises_value_error(self):
+        for idx, val in enumerate([3, 6, 7, 5, 1, 4, 2, 8]):
+            self.engine.place(idx + 1, val)
+        self.engine.place(9, 9)
+
+        with self.assertRaises(ValueError):
+            self.engine.single_cand()
+
+    def test_apply(self):
+        found = self.engine.apply('single_cand')
+        stats = self.engine.stats['techniques']['single_cand']
+
+        self.assertEqual(stats['calls'], 1)
+        self.assertEqual(stats['placements'], found)
+        self.assertEqual(stats['eliminations'], 0)
+        self.assertTrue(stats['time'] > 0)
+
+    def test_apply_contradiction(self):
+        for idx, val in enumerate([3, 6, 7, 5, 1, 4, 2, 8]):
+            self.engine.place(idx + 1, val)
+        self.engine.place(9, 9)
+
+        with self.assertRaises(engine.ContradictionError):
+            self.engine.apply('single_cand')
+        self.assertTrue(
+            self.engine.stats['techniques']['single_cand']['time'] > 0)
+
+    def test_run(self):
+        self.assertTrue(self.engine.run())
+        self.assertTrue(self.engine.stats['iterations'] > 0)
+
+    def test_undo(self):
+        mark = len(self.engine.trail)
+        self.engine.place(0, 9)
+        self.engine.place(1, 3)
+        self.engine.undo(mark)
+
+        self.assertEqual(self.engine.get_grid(),
+                         [list(row) for row in EASY_PUZZLE])
+        self.assertEqual(self.engine.get_cand_mask(0), 0b100010100)
+
+    def test_single_pos_raises_contradiction(self):
+        grid = [[0] * 9 for i in range(9)]
+        grid[0] = [1, 2, 3, 4, 5, 6, 7, 8, 0]
+        grid[5][8] = 9  # 9 can't go anywhere in the first row
+        bad_engine = engine.SolvingEngine(grid)
+
+        with self.assertRaises(engine.ContradictionError):
+            bad_engine.single_pos()
+
+    def test_search(self):
+        grid = [list(row) for row in EASY_SOLUTION]
+        for i in range(3):
+            grid[i] = [0] * 9
+        hard_engine = engine.SolvingEngine(grid)
+
+        self.assertTrue(hard_engine.search())
+        self.assertEqual(hard_engine.get_known_vals_qty(), 81)
+        self.assertTrue(hard_engine.stats['guesses'] > 0)
+
+    def test_solve_hard_puzzle(self):
+        grid, stats = engine.solve(HARD_PUZZLE)
+
+        self.assertEqual(grid[0], [8, 1, 2, 7, 5, 3, 6, 4, 9])
+        self.assertTrue(stats['guesses'] > 0)
+
+    def test_solve_without_search(self):
+        grid = [list(row) for row in EASY_SOLUTION]
+        for i in range(3):
+            grid[i] = [0] * 9
+
+        grid, stats = engine.solve(grid, search=False)
+        self.assertEqual(stats['guesses'], 0)
+
+    def test_solve_raises_contradiction(self):
+        grid = [list(row) for row in EASY_PUZZLE]
+        grid[0][0] = 3
+
+        with self.assertRaises(engine.ContradictionError):
+            engine.solve(grid)
+
+    def test_solve(self):
+        grid, stats = engine.solve(EASY_PUZZLE)
+
+        self.assertEqual(grid, [list(row) for row in EASY_SOLUTION])
+        self.assertEqual(list(stats['techniques']), list(engine.TECHNIQUES))
+        self.assertTrue(
+            stats['techniques']['single_cand']['placements'] > 0)
+
+    def test_solve_with_dlx(self):
+        grid, stats = engine.solve(HARD_PUZZLE, method='dlx')
+        exp_grid, exp_stats = engine.solve(HARD_PUZZLE)
+
+        self.assertEqual(grid, exp_grid)
+        self.assertTrue(stats['nodes'] > 0)
+
+    def test_solve_with_invalid_method(self):
+        with self.assertRaises(ValueError):
+            engine.solve(EASY_PUZZLE, method='whatever')
+
+    def test_iter_solutions(self):
+        grid = [list(row) for row in EASY_SOLUTION]
+        grid[0][0] = grid[0][1] = grid[1][0] = grid[1][1] = 0
+        solutions = engine.iter_solutions(grid)
+
+        self.assertEqual(next(solutions),
+                         [list(row) for row in EASY_SOLUTION])
+        self.assertEqual(list(solutions), [])
+
+    def test_iter_solutions_limit(self):
+        grid = [[0] * 9 for i in range(9)]
+        solutions = list(engine.iter_solutions(grid, limit=3))
+
+        self.assertEqual(len(solutions), 3)
+        self.assertEqual(len(set(utils.grid_to_str(solution)
+                                 for solution in solutions)), 3)
+        self.assertTrue(batch.is_valid_batch(np.array(solutions)).all())
+
+    def test_count_solutions(self):
+        ambiguous = [list(row) for row in HARD_PUZZLE]
+        ambiguous[0][0] = 0
+        repeated = [list(row) for row in EASY_PUZZLE]
+        repeated[0][0] = 3
+
+        self.assertEqual(engine.count_solutions(HARD_PUZZLE), 1)
+        self.assertEqual(engine.count_solutions(EASY_SOLUTION), 1)
+        self.assertEqual(engine.count_solutions(ambiguous), 2)
+        self.assertEqual(engine.count_solutions(ambiguous, limit=5), 5)
+        self.assertEqual(engine.count_solutions(repeated), 0)
+
+    def test_get_cell_candidates(self):
+        exp_poss = set([3, 5, 9])
+        act_poss = engine.get_cell_candidates(EASY_PUZZLE, 0, 0)
+        self.assertEqual(exp_poss, act_poss)
+
+    def test_popcount(self):
+        self.assertEqual(engine.POPCOUNT[0], 0)
+        self.assertEqual(engine.POPCOUNT[engine.ALL_MASK], 9)
+        self.assertEqual(engine.MASK_VALS[0b100010100], (3, 5, 9))
+
+
+class EliminationTechniquesTestCase(TestCase):
+    def setUp(self):
+        self.engine = engine.SolvingEngine([[0] * 9 for i in range(9)])
+
+    def keep_only(self, cells, vals):
+        mask = sum(engine.BIT[val] for val in vals)
+        for idx in cells:
+            self.engine.eliminate(idx, engine.ALL_MASK & ~mask)
+
+    def rule_out(self, cells, vals):
+        mask = sum(engine.BIT[val] for val in vals)
+        for idx in cells:
+            self.engine.eliminate(idx, mask)
+
+    def test_eliminate_and_undo(self):
+        mark = len(self.engine.trail)
+
+        self.assertEqual(self.engine.eliminate(0, 0b11), 2)
+        self.assertEqual(self.engine.eliminate(0, 0b11), 0)
+        self.assertEqual(self.engine.get_candidates(0), set(range(3, 10)))
+
+        self.engine.undo(mark)
+        self.assertEqual(self.engine.get_cand_mask(0), engine.ALL_MASK)
+
+    def test_naked_pairs(self):
+        self.keep_only((0, 1), (1, 2))
+
+        self.assertTrue(self.engine.naked_pairs())
+        self.assertEqual(self.engine.get_candidates(8), set(range(3, 10)))
+        self.assertEqual(self.engine.get_candidates(20), set(range(3, 10)))
+        self.assertTrue(1 in self.engine.get_candidates(9 * 8))
+
+    def test_naked_triples(self):
+        self.keep_only((0,), (1, 2))
+        self.keep_only((1,), (2, 3))
+        self.keep_only((2,), (1, 3))
+
+        self.assertTrue(self.engine.naked_triples())
+        self.assertEqual(self.engine.get_candidates(8), set(range(4, 10)))
+
+    def test_naked_subsets_contradiction(self):
+        self.keep_only((0, 1, 2), (1, 2))
+
+        with self.assertRaises(engine.ContradictionError):
+            self.engine.naked_triples()
+
+    def test_hidden_pairs(self):
+        self.rule_out(range(2, 9), (1, 2))
+
+        self.assertTrue(self.engine.hidden_pairs())
+        self.assertEqual(self.engine.get_candidates(0), set([1, 2]))
+        self.assertEqual(self.engine.get_candidates(1), set([1, 2]))
+
+    def test_hidden_triples(self):
+        self.rule_out(range(3, 9), (1, 2, 3))
+
+        self.assertTrue(self.engine.hidden_triples())
+        self.assertEqual(self.engine.get_candidates(2), set([1, 2, 3]))
+
+    def test_pointing_pairs(self):
+        self.rule_out((9, 10, 11, 18, 19, 20), (1,))
+
+        self.assertTrue(self.engine.pointing_pairs())
+        self.assertFalse(1 in self.engine.get_candidates(8))
+        self.assertTrue(1 in self.engine.get_candidates(0))
+
+    def test_box_line(self):
+        self.rule_out(range(3, 9), (1,))
+
+        self.assertTrue(self.engine.box_line())
+        self.assertFalse(1 in self.engine.get_candidates(20))
+        self.assertTrue(1 in self.engine.get_candidates(27))
+
+    def test_x_wing(self):
+        self.rule_out([idx for idx in range(9) if idx not in (0, 4)] +
+                      [idx for idx in range(36, 45) if idx not in (36, 40)],
+                      (1,))
+
+        self.assertTrue(self.engine.x_wing())
+        self.assertFalse(1 in self.engine.get_candidates(72))
+        self.assertFalse(1 in self.engine.get_candidates(76))
+        self.assertTrue(1 in self.engine.get_candidates(73))
+
+    def test_swordfish(self):
+        self.rule_out([idx for row in (0, 3, 6) for idx in units.ROWS[row]
+                       if idx % 9 not in (0, 3, 6)], (1,))
+
+        self.assertFalse(self.engine.x_wing())
+        self.assertTrue(self.engine.swordfish())
+        self.assertFalse(1 in self.engine.get_candidates(9))
+        self.assertTrue(1 in self.engine.get_candidates(10))
+
+    def test_run_counts_eliminations(self):
+        hard_engine = engine.SolvingEngine(HARD_PUZZLE)
+        hard_engine.search()
+        stats = hard_engine.stats['techniques']
+
+        self.assertEqual(list(stats), list(engine.TECHNIQUES))
+        self.assertTrue(sum(stats[name]['eliminations']
+                            for name in engine.TECHNIQUES) > 0)
+        self.assertEqual(stats['naked_pairs']['placements'], 0)
+
+
+class DancingLinksTestCase(TestCase):
+    def test_init_leaves_out_covered_columns(self):
+        links = dlx.DancingLinks(EASY_PUZZLE)
+        exp_cols = dlx.COLUMNS - 35 * 4  # 35 clues
+        act_cols = 0
+        col = links.right[0]
+
+        while col != 0:
+            act_cols += 1
+            col = links.right[col]
+
+        self.assertEqual(exp_cols, act_cols)
+
+    def test_init_raises_contradiction(self):
+        grid = [list(row) for row in EASY_PUZZLE]
+        grid[0][0] = 7  # already in the first row
+
+        with self.assertRaises(ContradictionError):
+            dlx.DancingLinks(grid)
+
+    def test_iter_solutions(self):
+        grid = [list(row) for row in EASY_SOLUTION]
+        grid[0][0:2] = [0, 0]
+        grid[1][0:2] = [0, 0]
+
+        solutions = list(dlx.DancingLinks(grid).iter_solutions())
+        self.assertEqual(len(solutions), 1)
+
+        grid = [list(row) for row in EASY_SOLUTION]
+        for i, j in [(0, 1), (0, 5), (1, 1), (1, 5)]:
+            grid[i][j] = 0  # 3 and 1 can be swapped
+
+        solutions = list(dlx.DancingLinks(grid).iter_solutions())
+        self.assertEqual(len(solutions), 2)
+
+    def test_solve(self):
+        grid, stats = dlx.solve(EASY_PUZZLE)
+
+        self.assertEqual(grid, [list(row) for row in EASY_SOLUTION])
+        self.assertTrue(stats['nodes'] >= 46)
+
+    def test_solve_raises_contradiction(self):
+        grid = [list(row) for row in EASY_PUZZLE]
+        grid[0][0] = 3
+
+        with self.assertRaises(ContradictionError):
+            dlx.solve(grid)
+
+
+class BatchTestCase(TestCase):
+    def setUp(self):
+        self.grids = np.array([EASY_PUZZLE, HARD_PUZZLE])
+
+    def test_to_sqrs(self):
+        sqrs = batch.to_sqrs(self.grids)
+
+        self.assertEqual(sqrs[0, 1].tolist(), [7, 0, 0, 8, 0, 0, 9, 4, 0])
+        self.assertTrue(np.array_equal(batch.to_sqrs(sqrs), self.grids))
+
+    def test_get_cand_masks(self):
+        masks = batch.get_cand_masks(self.grids)
+        exp_engine = engine.SolvingEngine(EASY_PUZZLE)
+
+        for idx in units.CELLS:
+            i, j = units.ROW_OF[idx], units.COL_OF[idx]
+            if EASY_PUZZLE[i][j] == 0:
+                self.assertEqual(
+                    masks[0, i, j], exp_engine.get_cand_mask(idx))
+            else:
+                self.assertEqual(masks[0, i, j], 0)
+
+    def test_get_singles(self):
+        found = batch.get_singles(batch.get_cand_masks(self.grids))
+        solution = np.array(EASY_SOLUTION)
+
+        self.assertTrue(found[0].any())
+        self.assertTrue(np.array_equal(
+            found[0][found[0] != 0], solution[found[0] != 0]))
+
+    def test_propagate(self):
+        batch.propagate(self.grids)
+
+        self.assertTrue(np.array_equal(self.grids[0], EASY_SOLUTION))
+        self.assertTrue((self.grids[1] == 0).any())  # needs search
+
+    def test_is_valid_batch(self):
+        grids = np.array([EASY_PUZZLE, EASY_PUZZLE, EASY_PUZZLE])
+        grids[1, 0, 0] = 7  # repeated in the first row
+        grids[2, 2, 2] = 1  # repeated in the first square
+
+        self.assertEqual(
+            batch.is_valid_batch(grids).tolist(), [True, False, False])
+
+    def test_solve_batch(self):
+        unsolvable = np.array(EASY_PUZZLE)
+        unsolvable[0, 0] = 3
+        puzzles = np.array([EASY_PUZZLE, HARD_PUZZLE, unsolvable])
+
+        solved = batch.solve_batch(puzzles, chunk_size=2)
+        self.assertTrue(np.array_equal(solved[0], EASY_SOLUTION))
+        self.assertEqual(solved[1].tolist(), engine.solve(HARD_PUZZLE)[0])
+        self.assertTrue(np.array_equal(solved[2], unsolvable))
+
+    def test_solve_batch_invalid_value(self):
+        with self.assertRaises(ValueError):
+            batch.solve_batch(np.full((1, 9, 9), 10))
+
+
+class SolutionCacheTestCase(TestCase):
+    def setUp(self):
+        self.cache = cache.SolutionCache(max_size=2)
+        self.easy_key = self.cache.get_key(EASY_PUZZLE)
+        self.hard_key = self.cache.get_key(HARD_PUZZLE)
+
+    def test_get_miss(self):
+        self.assertTrue(self.cache.get(self.easy_key) is None)
+        self.assertEqual(self.cache.misses, 1)
+
+    def test_get_hit(self):
+        self.cache.set(self.easy_key, EASY_SOLUTION)
+        solution = self.cache.get(self.easy_key)
+
+        self.assertEqual(solution, [list(row) for row in EASY_SOLUTION])
+        self.assertEqual(self.cache.hits, 1)
+
+        solution[0][0] = 0  # callers get their own copy
+        self.assertEqual(self.cache.get(self.easy_key)[0][0], 9)
+
+    def test_lru_eviction(self):
+        self.cache.set(self.easy_key, EASY_SOLUTION)
+        self.cache.set(self.hard_key, EASY_SOLUTION)
+        self.cache.get(self.easy_key)  # HARD_PUZZLE is now the oldest
+        self.cache.set(self.cache.get_key(EASY_SOLUTION), EASY_SOLUTION)
+
+        self.assertEqual(len(self.cache.solutions), 2)
+        self.assertTrue(self.cache.get(self.hard_key) is None)
+        self.assertFalse(self.cache.get(self.easy_key) is None)
+
+    def test_shared_cache(self):
+        shared = LocMemCache('solver-tests', {})
+        self.cache.shared_cache = shared
+        self.cache.set(self.easy_key, EASY_SOLUTION)
+
+        other = cache.SolutionCache(shared_cache=shared)
+        self.assertEqual(other.get(self.easy_key),
+                         [list(row) for row in EASY_SOLUTION])
+        self.assertEqual(other.shared_hits, 1)
+        self.assertEqual(len(other.solutions), 1)
+        shared.clear()
+
+    def test_canonical_keys(self):
+        self.cache = cache.SolutionCache(canonical=True)
+        self.cache.set(self.cache.get_key(EASY_PUZZLE), EASY_SOLUTION)
+
+        transform = symmetry.Transform(
+            True, (5, 3, 4, 2, 1, 0, 8, 6, 7), (0, 2, 1, 6, 7, 8, 3, 4, 5),
+            (0, 4, 7, 1, 9, 3, 2, 5, 8, 6))
+        key = self.cache.get_key(transform.apply(EASY_PUZZLE))
+
+        self.assertEqual(len(self.cache.solutions), 2)  # exact, canonical
+        self.assertEqual(self.cache.get(key),
+                         transform.apply(EASY_SOLUTION))
+        self.assertEqual(len(self.cache.solutions), 3)
+
+        # repeated puzzles are found without canonicalizing them
+        key = self.cache.get_key(transform.apply(EASY_PUZZLE))
+        self.assertEqual(self.cache.get(key),
+                         transform.apply(EASY_SOLUTION))
+        self.assertTrue(key.canonical is None)
+        self.assertEqual(self.cache.hits, 2)
+
+    def test_clear(self):
+        self.cache.set(self.easy_key, EASY_SOLUTION)
+        self.cache.get(self.easy_key)
+        self.cache.clear()
+
+        self.assertEqual(len(self.cache.solutions), 0)
+        self.assertEqual(self.cache.hits, 0)
+
+    def test_get_solution_cache(self):
+        orig_cache = cache.solution_cache
+        cache.solution_cache = None
+
+        with override_settings(SOLVER_CACHE_SIZE=0):
+            self.assertTrue(cache.get_solution_cache() is None)
+
+        with override_settings(SOLVER_CACHE_SIZE=10,
+                               SOLVER_CACHE_ALIAS='default'):
+            solution_cache = cache.get_solution_cache()
+            self.assertEqual(solution_cache.max_size, 10)
+            self.assertTrue(solution_cache.canonical)
+            self.assertFalse(solution_cache.shared_cache is None)
+            self.assertTrue(cache.get_solution_cache() is solution_cache)
+
+        cache.solution_cache = orig_cache
+
+
+class SymmetryTestCase(TestCase):
+    def setUp(self):
+        self.transform = symmetry.Transform(
+            True, (5, 3, 4, 2, 1, 0, 8, 6, 7), (0, 2, 1, 6, 7, 8, 3, 4, 5),
+            (0, 4, 7, 1, 9, 3, 2, 5, 8, 6))
+
+    def test_transform_apply(self):
+        grid = self.transform.apply(EASY_PUZZLE)
+
+        self.assertEqual(grid[0][0], self.transform.labels[
+            EASY_PUZZLE[0][5]])
+        self.assertEqual(self.transform.revert(grid),
+                         [list(row) for row in EASY_PUZZLE])
+
+    def test_get_next_rows(self):
+        self.assertEqual(symmetry.get_next_rows(()), list(range(9)))
+        self.assertEqual(symmetry.get_next_rows((4,)), [3, 5])
+        self.assertEqual(symmetry.get_next_rows((4, 3, 5)),
+                         [0, 1, 2, 6, 7, 8])
+
+    def test_get_min_row(self):
+        values = [0, 5, 0, 7, 0, 0, 3, 0, 4]
+        groups = ((0, 1, 2), (3, 4, 5), (6, 7, 8))
+
+        self.assertEqual(symmetry.get_min_row(values, groups, {7: 1}, 2),
+                         [0, 0, 2, 0, 0, 1, 0, 3, 4])
+
+    def test_canonicalize(self):
+        canonical, transform = symmetry.canonicalize(EASY_PUZZLE)
+
+        self.assertEqual(transform.apply(EASY_PUZZLE), canonical)
+        self.assertEqual(transform.revert(canonical),
+                         [list(row) for row in EASY_PUZZLE])
+        self.assertEqual(
+            symmetry.canonicalize(self.transform.apply(EASY_PUZZLE))[0],
+            canonical)
+        self.assertEqual(
+            symmetry.canonicalize(self.transform.apply(HARD_PUZZLE))[0],
+            symmetry.canonicalize(HARD_PUZZLE)[0])
+
+
+class FormatsTestCase(TestCase):
+    def test_iter_records(self):
+        with open('static/txt/test_easy.txt', 'rb') as f:
+            block = f.read()
+
+        f = io.BytesIO(block + b'\n# lines\n' + b'0' * 81 +
+                       b'\n' + b'1' * 81 + b',' + b'2' * 81 + b'\n')
+        records = list(formats.iter_records(f))
+
+        self.assertEqual(len(records), 3)
+        self.assertEqual(records[0][:2], (0, len(block)))
+        self.assertEqual(utils.str_to_grid(records[0][2]),
+                         [list(row) for row in EASY_PUZZLE])
+        self.assertEqual(utils.str_to_grid(records[0][3]),
+                         [list(row) for row in EASY_SOLUTION])
+        self.assertEqual(records[1][2:], ('0' * 81, None))
+        self.assertEqual(records[2][2:], ('1' * 81, '2' * 81))
+
+        # resuming after a record
+        self.assertEqual(list(formats.iter_records(f, records[1][1])),
+                         records[2:])
+
+    def test_iter_records_block_without_solution(self):
+        lines = [b'UNSOLVED'] + [b'000000000'] * 9 + [b'1' * 81]
+        records = list(formats.iter_records(io.BytesIO(b'\n'.join(lines))))
+
+        self.assertEqual(records[0][2:], ('0' * 81, None))
+        self.assertEqual(records[1][2:], ('1' * 81, None))
+
+    def test_iter_export(self):
+        rows = [(1, EASY_PUZZLE, EASY_SOLUTION, 0.5)]
+        easy = utils.grid_to_str(EASY_PUZZLE)
+        solution = utils.grid_to_str(EASY_SOLUTION)
+
+        self.assertEqual(list(formats.iter_export(rows, 'lines')),
+                         ['%s %s\n' % (easy, solution)])
+        self.assertEqual(list(formats.iter_export(rows, 'csv')), [
+            'id,unsolved_puzzle,solved_puzzle,solving_time\n',
+            '1,%s,%s,0.5\n' % (easy, solution)])
+        self.assertEqual(json.loads(next(formats.iter_export(
+            rows, 'ndjson'))), {'id': 1, 'unsolved_puzzle': easy,
+                                'solved_puzzle': solution,
+                                'solving_time': 0.5})
+
+        with self.assertRaises(ValueError):
+            next(formats.iter_export(rows, 'xml'))
+
+    def test_iter_bytes(self):
+        lines = ['%i\n' % i for i in range(1000)]
+        chunks = list(formats.iter_bytes(lines, chunk_size=100))
+
+        self.assertTrue(len(chunks) > 1)
+        self.assertEqual(b''.join(chunks), ''.join(lines).encode('ascii'))
+        self.assertEqual(
+            gzip.GzipFile(fileobj=io.BytesIO(b''.join(formats.iter_bytes(
+                lines, compress=True, chunk_size=100)))).read(),
+            ''.join(lines).encode('ascii'))
+
+
+class ImportPuzzlesTestCase(TestCase):
+    def setUp(self):
+        self.file = tempfile.NamedTemporaryFile(suffix='.txt')
+        lines = [utils.grid_to_str(EASY_PUZZLE) + ' ' +
+                 utils.grid_to_str(EASY_SOLUTION),
+                 utils.grid_to_str(HARD_PUZZLE),
+                 '0' * 81,  # too few clues
+                 utils.grid_to_str(EASY_PUZZLE)]
+        self.file.write('\n'.join(lines).encode('ascii'))
+        self.file.flush()
+
+    def tearDown(self):
+        self.file.close()
+
+    def call_command(self, *args):
+        out = StringIO()
+        call_command('import_puzzles', self.file.name, *args,
+                     stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    def test_import_puzzles(self):
+        out = self.call_command('--batch-size', '2')
+
+        # a batch after the 164 byte first line and the second one
+        self.assertTrue('2 imported, 0 repeated, 0 invalid, offset 246'
+                        in out)
+        self.assertTrue('2 imported, 1 repeated, 1 invalid, offset 409'
+                        in out)
+        puzzle = models.SudokuPuzzle.objects.get(
+            fingerprint=utils.get_fingerprint(EASY_PUZZLE))
+        self.assertTrue(puzzle.solved)
+        self.assertEqual(puzzle.solved_puzzle,
+                         [list(row) for row in EASY_SOLUTION])
+        self.assertFalse(models.SudokuPuzzle.objects.get(
+            fingerprint=utils.get_fingerprint(HARD_PUZZLE)).solved)
+
+    def test_import_puzzles_from_offset(self):
+        self.call_command('--offset', '164')  # skips the first line
+
+        self.assertEqual(models.SudokuPuzzle.objects.count(), 2)
+        self.assertFalse(models.SudokuPuzzle.objects.get(
+            fingerprint=utils.get_fingerprint(EASY_PUZZLE)).solved)
+
+    def test_get_valid(self):
+        puzzles = np.array([EASY_PUZZLE] * 5)
+        solutions = np.array([EASY_SOLUTION, EASY_PUZZLE, EASY_SOLUTION,
+                              EASY_SOLUTION, EASY_PUZZLE])
+        solved = np.array([True, True, True, True, False])
+        puzzles[2, 0, 0] = 3  # clue not in the solution
+        solutions[3, 0, 0] = 3  # repeated value
+
+        # the second solution is incomplete, the last record has none
+        self.assertEqual(
+            import_puzzles.get_valid(puzzles, solutions, solved).tolist(),
+            [True, False, False, False, True])
+
+
+class ExportPuzzlesTestCase(TestCase):
+    def setUp(self):
+        self.puzzle = SudokuPuzzleFactory.create(
+            solved_puzzle=[list(row) for row in EASY_SOLUTION], solved=True,
+            solving_time=0.5)
+        SudokuPuzzleFactory.create(
+            unsolved_puzzle=[list(row) for row in HARD_PUZZLE])
+        self.line = '%s %s\n' % (utils.grid_to_str(EASY_PUZZLE),
+                                 utils.grid_to_str(EASY_SOLUTION))
+
+    def test_export_puzzles_view(self):
+        response = Client().get('/solver/export/')
+
+        self.assertEqual(response['Content-Type'], 'text/plain')
+        self.assertEqual(b''.join(response.streaming_content),
+                         self.line.encode('ascii'))
+
+    def test_export_puzzles_view_gzip(self):
+        response = Client().get('/solver/export/?format=ndjson&gzip=1')
+        content = gzip.GzipFile(fileobj=io.BytesIO(
+            b''.join(response.streaming_content))).read()
+
+        self.assertTrue('puzzles.ndjson.gz' in
+                        response['Content-Disposition'])
+        self.assertEqual(json.loads(content.decode('ascii'))['id'],
+                         self.puzzle.pk)
+
+    def test_export_puzzles_view_invalid_format(self):
+        response = Client().get('/solver/export/?format=xml')
+        self.assertEqual(response.status_code, 400)
+
+    def test_export_puzzles_command(self):
+        with tempfile.NamedTemporaryFile() as f:
+            call_command('export_puzzles', f.name, format='csv')
+            lines = f.read().decode('ascii').splitlines()
+
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(lines[1], '%i,%s,0.5' % (
+            self.puzzle.pk, self.line.strip().replace(' ', ',')))
+
+
+class BenchTestCase(TestCase):
+    def test_get_corpora(self):
+        corpora = bench.get_corpora(2, seed=1)
+
+        self.assertEqual(list(corpora),
+                         list(bench.STATIC_PATHS + bench.DIFFICULTIES))
+        self.assertEqual(corpora['static/txt/test_easy.txt'],
+                         [[list(row) for row in EASY_PUZZLE]])
+        for difficulty in bench.DIFFICULTIES:
+            puzzles = corpora[difficulty]
+            self.assertEqual(len(puzzles), 2)
+            self.assertNotEqual(puzzles[0], puzzles[1])
+            self.assertEqual(grading.grade(puzzles[0]), difficulty)
+        self.assertEqual(bench.get_corpora(2, seed=1), corpora)
+
+    def test_run(self):
+        result = bench.run([EASY_PUZZLE, HARD_PUZZLE], 'logic')
+
+        self.assertEqual(result['solved'], 2)
+        self.assertTrue(result['p50_ms'] <= result['p99_ms'])
+        self.assertEqual(result['queries_per_solve'], 1)
+        self.assertEqual(models.SudokuPuzzle.objects.count(), 0)
+
+    def test_run_empty(self):
+        result = bench.run([], 'logic')
+
+        self.assertEqual(result['puzzles'], 0)
+        self.assertEqual(result['p99_ms'], 0)
+
+    def test_bench_solver_command_count(self):
+        with self.assertRaises(CommandError):
+            call_command('bench_solver', '--count', '0')
+
+    def test_get_regressions(self):
+        baseline = {'corpora': {'easy': {
+            'solved': 2, 'puzzles_per_sec': 100, 'p95_ms': 10}}}
+        report = {'corpora': {'easy': {
+            'solved': 1, 'puzzles_per_sec': 95, 'p95_ms': 12}}}
+
+        self.assertEqual(bench.get_regressions(report, baseline), [
+            'easy p95_ms: 12, baseline 10', 'easy solved: 1, baseline 2'])
+
+    def test_bench_solver_command(self):
+        with tempfile.NamedTemporaryFile(mode='w+') as f:
+            call_command('bench_solver', count=1, output=f.name)
+            report = json.load(f)
+
+            self.assertEqual(report['corpora']['medium']['solved'], 1)
+            self.assertTrue(report['process_peak_memory_kb'] > 0)
+
+            report['corpora']['medium']['p50_ms'] = 0.0
+            f.seek(0)
+            f.truncate()
+            json.dump(report, f)
+            f.flush()
+
+            with self.assertRaises(CommandError):
+                call_command('bench_solver', count=1, baseline=f.name,
+                             stdout=StringIO())
+
+
+class ProfilingTestCase(TestCase):
+    def setUp(self):
+        profiling.totals.clear()
+
+    def test_nested_phases(self):
+        profile = profiling.Profile()
+
+        with profile.phase('solve'):
+            with profile.phase('search'):
+                time.sleep(0.01)
+
+        self.assertTrue(profile.timings['search'] >= 0.01)
+        self.assertTrue(profile.timings['solve'] < 0.01)
+
+    def test_wrap(self):
+        profile = profiling.Profile()
+        solving_engine = engine.SolvingEngine(EASY_PUZZLE)
+        profile.wrap(solving_engine, 'single_cand', 'single_cand')
+
+        self.assertTrue(solving_engine.single_cand())
+        self.assertEqual(list(profile.timings), ['single_cand'])
+        self.assertFalse('single_cand' in vars(engine.SolvingEngine(
+            EASY_PUZZLE)))
+
+    def test_phase_without_profile(self):
+        with profiling.phase(None, 'setup'):
+            pass
+
+    def test_get_profile(self):
+        with override_settings(SOLVER_PROFILE_RATE=0):
+            self.assertTrue(profiling.get_profile() is None)
+        with override_settings(SOLVER_PROFILE_RATE=1):
+            self.assertTrue(isinstance(profiling.get_profile(),
+                                       profiling.Profile))
+
+    @override_settings(SOLVER_PROFILE_RATE=1)
+    def test_solve_is_profiled(self):
+        puzzle = SudokuPuzzleFactory.create(
+            unsolved_puzzle=[list(row) for row in HARD_PUZZLE])
+        puzzle.solve(use_cache=False)
+
+        self.assertTrue(set((
+            'setup', 'validation', 'single_cand', 'single_pos', 'search',
+            'save')) <= set(puzzle.profile.timings))
+        self.assertTrue(set(puzzle.profile.timings) <= set(
+            engine.TECHNIQUES + ('setup', 'validation', 'search', 'save')))
+        self.assertEqual(profiling.totals.samples, 1)
+        self.assertEqual(list(profiling.totals.get_means()),
+                         list(puzzle.profile.timings))
+
+    def test_solve_is_not_profiled(self):
+        SudokuPuzzleFactory.create().solve()
+        self.assertEqual(profiling.totals.samples, 0)
+
+
+class SolveJobTestCase(TestCase):
+    def setUp(self):
+        self.grid = [list(row) for row in HARD_PUZZLE]
+
+    def test_submit(self):
+        job = jobs.submit(self.grid)
+        self.assertEqual(job.status, models.PENDING)
+
+        job.puzzle.solve()
+        self.assertEqual(jobs.submit(self.grid).status, models.DONE)
+
+    def test_claim(self):
+        first = jobs.submit(self.grid)
+        second = jobs.submit(EASY_PUZZLE)
+
+        self.assertEqual(jobs.claim(1), [first.pk])
+        self.assertEqual(jobs.claim(5), [second.pk])
+        self.assertEqual(jobs.claim(5), [])
+        self.assertEqual(models.SolveJob.objects.get(
+            pk=first.pk).status, models.RUNNING)
+
+    def test_claim_stale(self):
+        job = jobs.submit(self.grid)
+        jobs.claim(1)
+
+        self.assertEqual(jobs.claim(1, timedelta(seconds=60)), [])
+        models.SolveJob.objects.filter(pk=job.pk).update(
+            started=timezone.now() - timedelta(seconds=120))
+        self.assertEqual(jobs.claim(1, timedelta(seconds=60)), [job.pk])
+
+    def test_run(self):
+        job = jobs.submit(self.grid)
+
+        self.assertEqual(jobs.run(job.pk), models.DONE)
+        job = models.SolveJob.objects.get(pk=job.pk)
+        self.assertTrue(job.puzzle.solved)
+        self.assertFalse(job.finished is None)
+
+    def test_submit_not_unique(self):
+        ambiguous = [list(row) for row in self.grid]
+        ambiguous[0][0] = 0
+        unsolvable = [list(row) for row in EASY_PUZZLE]
+        unsolvable[0][0] = 3  # solution value is 9
+
+        with self.assertRaises(NotUniqueError):
+            jobs.submit(ambiguous)
+        with self.assertRaises(NotUniqueError):
+            jobs.submit(unsolvable)
+        self.assertEqual(Client().post('/solver/jobs/', {
+            'puzzle': utils.grid_to_str(ambiguous)}).status_code, 400)
+        self.assertFalse(models.SolveJob.objects.exists())
+
+    def test_run_several_solutions(self):
+        self.grid[0][0] = 0
+        job = models.SolveJob.objects.create(
+            puzzle=models.SudokuPuzzle.get_or_create_puzzle(self.grid)[0])
+
+        self.assertEqual(jobs.run(job.pk), models.FAILED)
+        job = models.SolveJob.objects.get(pk=job.pk)
+        self.assertEqual(job.error, "Puzzle has several solutions")
+        self.assertFalse(job.puzzle.solved)
+
+    def test_run_failure(self):
+        job = models.SolveJob.objects.create(
+            puzzle=SudokuPuzzleFactory.create(), method='guess')
+
+        self.assertEqual(jobs.run(job.pk), models.FAILED)
+        self.assertTrue('Invalid solving method' in
+                        models.SolveJob.objects.get(pk=job.pk).error)
+
+    def test_run_solver_workers_bad_job(self):
+        # jobs.run can't load it, run_job reports it instead of raising
+        self.assertEqual(run_solver_workers.run_job(0), (0, models.FAILED))
+
+    def test_run_solver_workers_command(self):
+        ids = [jobs.submit(self.grid).pk, jobs.submit(EASY_PUZZLE).pk]
+        out = StringIO()
+        call_command('run_solver_workers', processes=0, once=True,
+                     stdout=out)
+
+        self.assertEqual(out.getvalue().count('done'), 2)
+        self.assertEqual(models.SolveJob.objects.filter(
+            pk__in=ids, status=models.DONE).count(), 2)
+
+    def test_submit_job_view(self):
+        response = Client().post(
+            '/solver/jobs/', json.dumps({'puzzle': utils.grid_to_str(
+                self.grid)}), content_type='application/json')
+        self.assertEqual(response.status_code, 202)
+        job_id = json.loads(response.content.decode('utf-8'))['id']
+
+        jobs.run(jobs.claim(1)[0])
+        response = Client().get('/solver/jobs/%i/' % job_id)
+        data = json.loads(response.content.decode('utf-8'))
+
+        self.assertEqual(data['status'], models.DONE)
+        self.assertTrue(data['correct'])
+        self.assertEqual(len(data['solution']), 81)
+
+    def test_submit_job_view_invalid(self):
+        client = Client()
+
+        self.assertEqual(client.post(
+            '/solver/jobs/', {'puzzle': '123'}).status_code, 400)
+        self.assertEqual(client.post(
+            '/solver/jobs/', {'puzzle': utils.grid_to_str(self.grid),
+                              'method': 'guess'}).status_code, 400)
+        self.assertEqual(client.post(
+            '/solver/jobs/', '[]',
+            content_type='application/json').status_code, 400)
+        self.assertEqual(client.post(
+            '/solver/jobs/', {'puzzle': '0' * 81}).status_code, 400)
+        self.assertEqual(client.get('/solver/jobs/').status_code, 405)
+        self.assertEqual(client.get('/solver/jobs/1/').status_code, 404)
+
+
+class SolveViewTestCase(TestCase):
+    def setUp(self):
+        self.client = Client()
+
+    def post(self, data):
+        response = self.client.post(
+            '/solver/solve/', json.dumps(data),
+            content_type='application/json')
+        return response.status_code, json.loads(
+            response.content.decode('utf-8'))
+
+    def test_solve_string(self):
+        status, data = self.post({'puzzle': utils.grid_to_str(EASY_PUZZLE)})
+
+        self.assertEqual(status, 200)
+        self.assertTrue(data['solved'])
+        self.assertEqual(data['solution'], utils.grid_to_str(EASY_SOLUTION))
+        self.assertTrue(models.SudokuPuzzle.objects.filter(
+            pk=data['id'], solved=True).exists())
+
+        # already solved puzzles aren't solved again
+        self.assertEqual(self.post({'puzzle': EASY_PUZZLE})[1]['id'],
+                         data['id'])
+
+    def test_solve_array(self):
+        status, data = self.post({'puzzle': EASY_PUZZLE, 'persist': False})
+
+        self.assertEqual(status, 200)
+        self.assertEqual(data['solution'],
+                         [list(row) for row in EASY_SOLUTION])
+        self.assertTrue(data['id'] is None)
+
+    def test_solve_without_persist(self):
+        with self.assertNumQueries(0):
+            status, data = self.post({
+                'puzzle': HARD_PUZZLE, 'persist': False, 'cache': False})
+
+        self.assertTrue(data['solved'])
+        self.assertFalse(models.SudokuPuzzle.objects.exists())
+
+    def test_solve_json_flags(self):
+        for value in (0, None):
+            status, data = self.post({'puzzle': EASY_PUZZLE,
+                                      'persist': value, 'cache': value})
+
+            self.assertTrue(data['solved'])
+            self.assertTrue(data['id'] is None)
+        self.assertFalse(models.SudokuPuzzle.objects.exists())
+
+    def test_solve_invalid(self):
+        grid = [list(row) for row in EASY_PUZZLE]
+        grid[0][0] = 10
+
+        self.assertEqual(self.post({'puzzle': grid})[0], 400)
+        self.assertEqual(self.post({'puzzle': '123'})[0], 400)
+        self.assertEqual(self.post({'puzzle': EASY_PUZZLE,
+                                    'method': 'guess'})[0], 400)
+        self.assertEqual(self.client.get('/solver/solve/').status_code, 405)
+
+
+class EditStateTestCase(TestCase):
+    def setUp(self):
+        self.state = incremental.EditState(EASY_PUZZLE)
+        self.solution = [val for row in EASY_SOLUTION for val in row]
+        self.idx = [val for row in EASY_PUZZLE for val in row].index(0)
+
+    def test_edit_updates_candidates(self):
+        peer = units.PEERS[self.idx][-1]
+        val = self.solution[self.idx]
+        self.assertTrue(val in self.state.get_candidates(self.idx))
+
+        candidates = self.state.edit(self.idx, 0, val)
+        self.assertEqual(len(candidates), 21)
+        self.assertEqual(candidates[self.idx], set())
+        self.assertFalse(val in candidates[peer])
+
+        self.state.edit(self.idx, val, 0)
+        self.assertTrue(val in self.state.get_candidates(self.idx))
+
+    def test_edit_keeps_solution(self):
+        self.assertEqual(self.state.get_status(), incremental.SOLVABLE)
+        self.state.edit(self.idx, 0, self.solution[self.idx])
+
+        self.assertTrue(self.state.checked)
+        self.assertEqual(self.state.get_solution(),
+                         [list(row) for row in EASY_SOLUTION])
+
+    def test_edit_to_unsolvable(self):
+        self.state.get_status()
+        val = min(self.state.get_candidates(self.idx) -
+                  set([self.solution[self.idx]]))
+        self.state.edit(self.idx, 0, val)
+
+        self.assertFalse(self.state.checked)
+        self.assertEqual(self.state.get_status(), incremental.UNSOLVABLE)
+        self.assertTrue(self.state.get_solution() is None)
+
+        self.state.edit(self.idx, val, 0)
+        self.assertEqual(self.state.get_status(), incremental.SOLVABLE)
+
+    def test_edit_conflict(self):
+        val = self.state.values[units.PEERS[self.idx][0]] or \
+            self.state.values[units.PEERS[self.idx][-1]]
+        self.state.edit(self.idx, 0, val)
+        self.assertEqual(self.state.get_status(), incremental.INVALID)
+
+        self.state.edit(self.idx, val, 0)
+        self.assertEqual(self.state.conflicts, 0)
+
+    def test_edit_stale_value(self):
+        with self.assertRaises(ValueError):
+            self.state.edit(self.idx, 5, 0)
+
+    def test_previous_solution(self):
+        state = incremental.EditState(EASY_PUZZLE, EASY_SOLUTION)
+        self.assertTrue(state.checked)
+
+        solution = [list(row) for row in EASY_SOLUTION]
+        solution[0], solution[1] = solution[1], solution[0]
+        state = incremental.EditState(EASY_PUZZLE, solution)
+        self.assertFalse(state.checked)
+
+    def test_edit_cell_view(self):
+        response = Client().post('/solver/edit/', json.dumps({
+            'puzzle': utils.grid_to_str(EASY_PUZZLE),
+            'solution': utils.grid_to_str(EASY_SOLUTION),
+            'row': self.idx // 9, 'col': self.idx % 9,
+            'old': 0, 'new': self.solution[self.idx]}),
+            content_type='application/json')
+        data = json.loads(response.content.decode('utf-8'))
+
+        self.assertEqual(data['status'], incremental.SOLVABLE)
+        self.assertEqual(data['solution'], utils.grid_to_str(EASY_SOLUTION))
+        self.assertEqual(data['puzzle'][self.idx],
+                         str(self.solution[self.idx]))
+        self.assertEqual(data['candidates'][str(self.idx)], [])
+
+    def test_edit_cell_view_invalid(self):
+        client = Client()
+        data = {'puzzle': utils.grid_to_str(EASY_PUZZLE),
+                'row': self.idx // 9, 'col': self.idx % 9, 'old': 0}
+
+        self.assertEqual(client.post('/solver/edit/', data).status_code, 400)
+        data.update(new=1, row=9)
+        self.assertEqual(client.post('/solver/edit/', data).status_code, 400)
+
+
+class TraceTestCase(TestCase):
+    def setUp(self):
+        self.recorder = trace.Trace(HARD_PUZZLE, keyframe_interval=16)
+        self.solution = engine.solve(HARD_PUZZLE, trace=self.recorder)[0]
+
+    def test_final_state(self):
+        values, eliminated = self.recorder.get_state(len(self.recorder))
+
+        self.assertEqual(values, [val for row in self.solution for val in row])
+        self.assertEqual(trace.get_candidates(values, eliminated),
+                         [[]] * 81)
+
+    def test_steps(self):
+        steps = [self.recorder.get_step(i)
+                 for i in range(len(self.recorder))]
+        ops = set(step[0] for step in steps)
+        techniques = set(step[1] for step in steps)
+
+        self.assertEqual(ops, set(trace.OPS))
+        self.assertTrue(set(['single_cand', 'single_pos', 'search']) <=
+                        techniques)
+        self.assertEqual(len(self.recorder.steps), len(steps) * 4)
+
+    def test_keyframes(self):
+        replay = trace.Trace(HARD_PUZZLE, keyframe_interval=10 ** 6)
+        replay.steps = self.recorder.steps
+        self.assertTrue(self.recorder.keyframes)
+
+        for step in (0, 15, 16, 17, len(self.recorder)):
+            self.assertEqual(self.recorder.get_state(step),
+                             replay.get_state(step))
+        with self.assertRaises(ValueError):
+            self.recorder.get_state(len(self.recorder) + 1)
+
+    def test_bytes(self):
+        data = self.recorder.to_bytes()
+        copied = trace.Trace.from_bytes(data)
+
+        self.assertEqual(copied.to_bytes(), data)
+        self.assertEqual(copied.get_step(3), self.recorder.get_step(3))
+        with self.assertRaises(ValueError):
+            trace.Trace.from_bytes(b'trace')
+
+    def test_untraced_engine(self):
+        solver = engine.SolvingEngine(HARD_PUZZLE)
+        self.assertFalse('place' in vars(solver))
+
+    @override_settings(SOLVER_TRACE=True)
+    def test_solving_trace_view(self):
+        client = Client()
+        puzzle = SudokuPuzzleFactory.create()
+        self.assertEqual(client.get(
+            '/solver/puzzles/%i/trace/' % puzzle.pk).status_code, 404)
+
+        puzzle.solve(use_cache=False)
+        response = client.get('/solver/puzzles/%i/trace/' % puzzle.pk)
+        recorder = trace.Trace.from_bytes(response.content)
+        self.assertEqual(recorder.get_state(len(recorder))[0],
+                         [val for row in EASY_SOLUTION for val in row])
+
+        response = client.get(
+            '/solver/puzzles/%i/trace/' % puzzle.pk, {'step': 0})
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual(data['op'], 'place')
+        self.assertEqual(data['puzzle'][data['row'] * 9 + data['col']],
+                         str(data['value']))
+        self.assertEqual(client.get(
+            '/solver/puzzles/%i/trace/' % puzzle.pk,
+            {'step': len(recorder)}).status_code, 400)
+
+
+class HintTestCase(TestCase):
+    def setUp(self):
+        hints.clear()
+
+    def test_get_hint(self):
+        idx, val, technique, supporting = engine.get_hint(EASY_PUZZLE)
+
+        self.assertEqual(EASY_PUZZLE[idx // 9][idx % 9], 0)
+        self.assertEqual(val, EASY_SOLUTION[idx // 9][idx % 9])
+        self.assertTrue(technique in engine.TECHNIQUES)
+        self.assertTrue(supporting)
+        self.assertTrue(all(kind in engine.UNIT_TYPES
+                            for kind, index in supporting))
+
+    def test_get_hint_single_pos(self):
+        solver = engine.SolvingEngine(EASY_PUZZLE)
+        mark = len(solver.trail)
+        self.assertTrue(solver.single_pos())
+        idx = solver.trail[mark]
+        val = solver.values[idx]
+        solver.undo(mark)
+
+        supporting = solver.get_supporting_units('single_pos', idx, val)
+        self.assertTrue(supporting)
+
+    def test_get_hint_search(self):
+        idx, val, technique, supporting = engine.get_hint(
+            [[0] * 9 for i in range(9)])
+
+        self.assertEqual(technique, 'search')
+        self.assertTrue(1 <= val <= 9)
+        self.assertEqual(supporting, [])
+
+    def test_get_hint_solved(self):
+        self.assertTrue(engine.get_hint(EASY_SOLUTION) is None)
+
+    def test_get_hint_repeated_value(self):
+        grid = [list(row) for row in EASY_PUZZLE]
+        grid[0] = [1] * 9
+
+        with self.assertRaises(ContradictionError):
+            engine.get_hint(grid)
+
+    def test_hints_memoized(self):
+        hint = hints.get_hint(EASY_PUZZLE)
+
+        self.assertTrue(hints.get_hint(EASY_PUZZLE) is hint)
+        self.assertEqual(list(hints.hints),
+                         [utils.get_fingerprint(EASY_PUZZLE)])
+
+    @override_settings(SOLVER_HINT_CACHE_SIZE=1)
+    def test_hints_max_size(self):
+        hints.get_hint(EASY_PUZZLE)
+        hints.get_hint(HARD_PUZZLE)
+
+        self.assertEqual(list(hints.hints),
+                         [utils.get_fingerprint(HARD_PUZZLE)])
+
+    def test_hint_view(self):
+        client = Client()
+        response = client.post('/solver/hint/', json.dumps(
+            {'puzzle': EASY_PUZZLE}), content_type='application/json')
+        data = json.loads(response.content.decode('utf-8'))['hint']
+
+        self.assertEqual(data['value'],
+                         EASY_SOLUTION[data['row']][data['col']])
+        self.assertTrue(data['units'])
+        self.assertFalse(models.SudokuPuzzle.objects.exists())
+
+        response = client.post(
+            '/solver/hint/', {'puzzle': utils.grid_to_str(EASY_SOLUTION)})
+        self.assertTrue(json.loads(
+            response.content.decode('utf-8'))['hint'] is None)
+        self.assertEqual(client.post(
+            '/solver/hint/', {'puzzle': '1' * 81}).status_code, 400)
+
+
+class GeneratorTestCase(TestCase):
+    def test_grade(self):
+        self.assertEqual(grading.grade(EASY_PUZZLE), 'easy')
+        self.assertEqual(grading.grade(HARD_PUZZLE), 'extreme')
+
+    def test_get_hardest_technique(self):
+        stats = engine.solve(EASY_PUZZLE, search=False)[1]
+        self.assertEqual(grading.get_hardest_technique(stats), 'single_cand')
+
+    def test_rate(self):
+        easy = grading.rate(EASY_PUZZLE)
+        hard = grading.rate(HARD_PUZZLE)
+
+        self.assertEqual(easy[0], 'easy')
+        self.assertEqual(hard[0], 'extreme')
+        self.assertTrue(easy[1] < grading.SCORE_LEVEL < hard[1])
+        self.assertEqual(easy[1], grading.get_steps(
+            engine.solve(EASY_PUZZLE)[1]))
+
+    def test_solve_rates_puzzle(self):
+        puzzle = SudokuPuzzleFactory.create(
+            unsolved_puzzle=[list(row) for row in HARD_PUZZLE])
+        puzzle.solve()
+        puzzle.refresh_from_db()
+
+        self.assertEqual((puzzle.difficulty, puzzle.difficulty_score),
+                         grading.rate(HARD_PUZZLE))
+
+    def test_rate_puzzles_command(self):
+        puzzle = SudokuPuzzleFactory.create()
+        puzzle.solve(method='dlx')
+        self.assertEqual(puzzle.difficulty, '')
+
+        out = StringIO()
+        call_command('rate_puzzles', processes=0, stdout=out)
+        puzzle.refresh_from_db()
+
+        self.assertEqual(puzzle.difficulty, 'easy')
+        self.assertTrue('Rated 1 puzzles' in out.getvalue())
+
+    def test_get_full_grid(self):
+        solution = generator.get_full_grid(random.Random(1))
+        self.assertTrue(incremental.is_solution(
+            [val for row in solution for val in row], [0] * 81))
+
+    def test_generate(self):
+        puzzle, solution, difficulty = generator.generate(1)
+
+        self.assertEqual(generator.generate(1), (puzzle, solution, difficulty))
+        self.assertEqual(engine.count_solutions(puzzle), 1)
+        self.assertEqual(engine.solve(puzzle)[0], solution)
+        self.assertEqual(grading.grade(puzzle), difficulty)
+
+    def test_generate_difficulty(self):
+        puzzle, solution, difficulty = generator.generate(1, 'medium')
+
+        self.assertEqual(difficulty, 'medium')
+        self.assertEqual(grading.grade(puzzle), 'medium')
+
+        with self.assertRaises(ValueError):
+            generator.generate(1, 'expert', max_attempts=1)
+
+    def test_generate_puzzles_command(self):
+        with tempfile.NamedTemporaryFile() as f:
+            call_command('generate_puzzles', 2, output=f.name, seed=1,
+                         format='ndjson', processes=0)
+            records = [json.loads(line) for line in
+                       f.read().decode('ascii').splitlines()]
+
+        self.assertEqual([record['seed'] for record in records], [1, 2])
+        puzzle, solution, difficulty = generator.generate(1)
+        self.assertEqual(records[0]['unsolved_puzzle'],
+                         utils.grid_to_str(puzzle))
+        self.assertEqual(records[0]['solved_puzzle'],
+                         utils.grid_to_str(solution))
+        self.assertEqual(records[0]['difficulty'], difficulty)
+
+    def test_factory_grade(self):
+        first, second = SudokuPuzzleFactory.create_batch(2, grade='easy')
+        first.refresh_from_db()
+
+        self.assertEqual(grading.grade(first.unsolved_puzzle), 'easy')
+        self.assertTrue(first.solved and first.is_correct())
+        self.assertEqual((first.difficulty, first.difficulty_score),
+                         grading.rate(first.unsolved_puzzle))
+        self.assertNotEqual(first.unsolved_puzzle, second.unsolved_puzzle)
+        self.assertEqual(engine.solve(first.unsolved_puzzle)[0],
+                         first.solved_puzzle)
+
+
+class ValidationTestCase(TestCase):
+    def setUp(self):
+        self.grid = [list(row) for row in EASY_PUZZLE]
+
+    def assertInvalid(self, grid, unit, **kwargs):
+        with self.assertRaises(InvalidPuzzleError) as context:
+            validation.validate(grid, **kwargs)
+        self.assertEqual(context.exception.unit, unit)
+
+    def test_validate(self):
+        self.assertEqual(validation.validate(self.grid), 35)
+        self.assertEqual(validation.validate(EASY_SOLUTION, complete=True),
+                         81)
+        self.assertTrue(validation.is_valid(self.grid))
+
+    def test_validate_repeated_value(self):
+        self.grid[0][0] = 7
+        self.assertInvalid(self.grid, ('row', 0))
+
+        self.grid[0][0] = 8
+        self.grid[0][8] = 0
+        self.assertInvalid(self.grid, ('col', 0))
+
+        self.grid[0][0] = 1
+        self.assertInvalid(self.grid, ('sqr', 0))
+        self.assertFalse(validation.is_valid(self.grid))
+
+    def test_validate_invalid_value(self):
+        self.grid[4][0] = 10
+        self.assertInvalid(self.grid, ('row', 4))
+
+    def test_validate_complete(self):
+        self.assertInvalid(self.grid, ('row', 0), complete=True)
+
+    def test_validate_min_clues(self):
+        self.assertInvalid(self.grid, None, min_clues=40)
+
+    def test_get_invalid_units(self):
+        grids = np.array([EASY_PUZZLE, EASY_PUZZLE, EASY_PUZZLE])
+        grids[1, 0, 0] = 7  # repeated in the first row
+        grids[2, 2, 2] = 1  # repeated in the third row and first square
+
+        invalid = batch.get_invalid_units(grids)
+        self.assertEqual(invalid.shape, (3, 27))
+        self.assertFalse(invalid[0].any())
+        self.assertTrue(invalid[1, 0] and invalid[2, 18])
+        self.assertEqual(batch.get_first_invalid_units(grids).tolist(),
+                         [-1, 0, 2])
+
+    def test_solve_view_rejects_invalid(self):
+        self.grid[0][0] = 7
+        response = Client().post('/solver/solve/', json.dumps(
+            {'puzzle': self.grid}), content_type='application/json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue('row 0' in json.loads(
+            response.content.decode('utf-8'))['error'])
+        self.assertFalse(models.SudokuPuzzle.objects.exists())
+
+    def test_is_correct_keeps_error(self):
+        puzzle = SudokuPuzzleFactory.build()
+        puzzle.solved_puzzle[8][8] = 4
+
+        self.assertFalse(puzzle.is_correct())
+        self.assertEqual(puzzle.validation_error.unit, ('row', 8))
+
+
+class GridFieldTestCase(TestCase):
+    def setUp(self):
+        self.puzzle = SudokuPuzzleFactory.create()
+        self.puzzle.set_missing_vals_pos()
+        self.puzzle.save()
+        self.form_class = modelform_factory(
+            models.SudokuPuzzle,
+            fields=('unsolved_puzzle', 'solved_puzzle', 'missing_vals_pos'))
+
+    def test_form_shows_strings(self):
+        form = self.form_class(instance=self.puzzle)
+
+        self.assertEqual(form.initial['unsolved_puzzle'],
+                         utils.grid_to_str(EASY_PUZZLE))
+        self.assertEqual(form.initial['missing_vals_pos'][:4], '0001')
+
+    def test_form_saves_unchanged(self):
+        form = self.form_class(dict(self.form_class(
+            instance=self.puzzle).initial), instance=self.puzzle)
+
+        self.assertTrue(form.is_valid(), form.errors)
+        form.save()
+        self.puzzle.refresh_from_db()
+        self.assertEqual(self.puzzle.unsolved_puzzle,
+                         [list(row) for row in EASY_PUZZLE])
+
+    def test_form_invalid_strings(self):
+        form = self.form_class({
+            'unsolved_puzzle': 'x' * 81, 'solved_puzzle': '',
+            'missing_vals_pos': '123'}, instance=self.puzzle)
+
+        self.assertFalse(form.is_valid())
+        self.assertEqual(sorted(form.errors),
+                         ['missing_vals_pos', 'unsolved_puzzle'])
+
+    def test_admin_change_form(self):
+        self.client.force_login(User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'))
+        response = self.client.get(
+            '/admin/solver/sudokupuzzle/%i/change/' % self.puzzle.pk)
+
+        self.assertContains(response, utils.grid_to_str(EASY_PUZZLE))
+
+
+class UnitsTestCase(TestCase):
+    def test_peers(self):
+        for idx in units.CELLS:
+            self.assertEqual(len(units.PEERS[idx]), 20)
+            self.assertFalse(idx in units.PEERS[idx])
+
+        self.assertEqual(units.PEERS[0][:8], (1, 2, 3, 4, 5, 6, 7, 8))
+
+    def test_cell_units(self):
+        row, col, sqr = units.CELL_UNITS[units.get_idx(4, 5)]
+
+        self.assertEqual(row, units.ROWS[4])
+        self.assertEqual(col, units.COLS[5])
+        self.assertEqual(sqr, (30, 31, 32, 39, 40, 41, 48, 49, 50))
+
+    def test_get_idx_with_invalid_cell(self):
+        with self.assertRaises(ValueError):
+            units.get_idx(9, 0)
+
+
 class PuzzleCellTestCase(TestCase):
     def setUp(self):
         self.puzzle = SudokuPuzzleFactory.create()
@@ -536,6 +2151,17 @@ class SolverViewsTestCase(TestCase):
         self.assertEqual(response.content.count(
             'test passed: True'), len(views.TESTS))
 
+    def test_test_solver_reuses_puzzles(self):
+        self.client.get('/solver/test_solver/')
+        pks = list(models.SudokuPuzzle.objects.values_list('pk', flat=True))
+        response = self.client.get('/solver/test_solver/')
+
+        self.assertEqual(response.content.count(
+            'test passed: True'), len(views.TESTS))
+        self.assertEqual(
+            list(models.SudokuPuzzle.objects.values_list('pk', flat=True)),
+            pks)
+
     def test_test_solver_failed_test(self):
         orig_tests = copy.copy(views.TESTS)
         views.TESTS = ('failure',)
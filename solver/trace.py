@@ -0,0 +1,246 @@
+from __future__ import unicode_literals
+from bisect import bisect_right
+import struct
+from .engine import TECHNIQUES, ALL_MASK, BIT, MASK_VALS
+from .units import CELLS, PEERS
+
+# step operations
+PLACE = 0
+ELIMINATE = 1
+REMOVE = 2  # a placement taken back by search
+RESTORE = 3  # an elimination taken back by search
+OPS = ('place', 'eliminate', 'remove', 'restore')
+
+KEYFRAME_INTERVAL = 64  # steps between keyframes
+MAGIC = b'SDKT'
+VERSION = 1
+# magic, version, keyframe interval, step count, keyframe count
+HEADER = struct.Struct('>4sBHII')
+KEYFRAME = struct.Struct('>I81B81H')  # step, values, eliminated masks
+
+
+class Trace(object):
+    """ Records the steps of a SolvingEngine as a compact byte string,
+        4 bytes per step: operation, technique, flat cell index and value.
+
+        Every KEYFRAME_INTERVAL steps the values and eliminated candidates
+        of every cell are stored, so get_state can seek to any step
+        without replaying the trace from the start.
+    """
+
+    def __init__(self, grid, techniques=TECHNIQUES,
+                 keyframe_interval=KEYFRAME_INTERVAL):
+        """
+            Args:
+                - grid (list): 9x9 unsolved puzzle.
+                - techniques (tuple): SolvingEngine technique method
+                    names, search is added last.
+                - keyframe_interval (int)
+        """
+        self.clues = bytearray(val for row in grid for val in row)
+        self.techniques = tuple(techniques) + ('search',)
+        self.keyframe_interval = keyframe_interval
+        self.steps = bytearray()
+        self.keyframes = []  # (step, values, eliminated masks)
+        self.values = bytearray(self.clues)  # state after the last step
+        self.eliminated = [0] * 81
+        self.current = []  # techniques being applied, innermost last
+
+    def __len__(self):
+        return len(self.steps) // 4
+
+    def attach(self, engine):
+        """ Records the placements, eliminations and undos of an engine
+            from now on. Only the engine instance is wrapped, like
+            profiling.Profile.wrap does, so engines that aren't traced
+            run untouched.
+
+            Args:
+                - engine (engine.SolvingEngine)
+        """
+        self.values = bytearray(engine.values)
+        self.eliminated = list(engine.eliminated)
+
+        for code, name in enumerate(self.techniques):
+            if hasattr(engine, name):
+                self.wrap_technique(engine, name, code)
+
+        place = engine.place
+        eliminate = engine.eliminate
+        undo = engine.undo
+
+        def traced_place(idx, val):
+            self.add(PLACE, idx, val)
+            place(idx, val)
+
+        def traced_eliminate(idx, mask):
+            for val in MASK_VALS[mask & engine.get_cand_mask(idx)]:
+                self.add(ELIMINATE, idx, val)
+            return eliminate(idx, mask)
+
+        def traced_undo(mark):
+            for idx in reversed(engine.trail[mark:]):
+                if idx.__class__ is tuple:
+                    for val in MASK_VALS[idx[1]]:
+                        self.add(RESTORE, idx[0], val)
+                else:
+                    self.add(REMOVE, idx, engine.values[idx])
+            undo(mark)
+
+        engine.place = traced_place
+        engine.eliminate = traced_eliminate
+        engine.undo = traced_undo
+
+    def wrap_technique(self, engine, name, code):
+        method = getattr(engine, name)
+
+        def traced(*args, **kwargs):
+            self.current.append(code)
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.current.pop()
+
+        setattr(engine, name, traced)
+
+    def add(self, op, idx, val):
+        step = len(self.steps) // 4
+
+        if step and step % self.keyframe_interval == 0:
+            self.keyframes.append(
+                (step, bytearray(self.values), list(self.eliminated)))
+
+        if op == PLACE:
+            self.values[idx] = val
+        elif op == REMOVE:
+            self.values[idx] = 0
+        elif op == ELIMINATE:
+            self.eliminated[idx] |= BIT[val]
+        else:
+            self.eliminated[idx] &= ~BIT[val]
+
+        self.steps.extend(
+            (op, self.current[-1] if self.current else 255, idx, val))
+
+    def get_step(self, step):
+        """ Gets a recorded step.
+
+            Args:
+                - step (int): zero index
+
+            Returns:
+                - tuple: (operation name, technique name or None, flat
+                    cell index, value)
+        """
+        op, code, idx, val = self.steps[step * 4:step * 4 + 4]
+        return (OPS[op], self.techniques[code] if code != 255 else None,
+                idx, val)
+
+    def get_state(self, step):
+        """ Replays the trace from the closest keyframe.
+
+            Args:
+                - step (int): steps to replay, 0 for the unsolved puzzle.
+
+            Returns:
+                - tuple: (81 flat values, 81 eliminated candidate masks)
+        """
+        if not 0 <= step <= len(self):
+            raise ValueError("Invalid step")
+
+        pos = bisect_right([frame[0] for frame in self.keyframes], step)
+        if pos:
+            start, values, eliminated = self.keyframes[pos - 1]
+            values = list(values)
+            eliminated = list(eliminated)
+        else:
+            start, values, eliminated = 0, list(self.clues), [0] * 81
+
+        for i in range(start * 4, step * 4, 4):
+            op, code, idx, val = self.steps[i:i + 4]
+
+            if op == PLACE:
+                values[idx] = val
+            elif op == REMOVE:
+                values[idx] = 0
+            elif op == ELIMINATE:
+                eliminated[idx] |= BIT[val]
+            else:
+                eliminated[idx] &= ~BIT[val]
+
+        return values, eliminated
+
+    def to_bytes(self):
+        """ Serializes the trace, see from_bytes. """
+        names = ','.join(self.techniques).encode('ascii')
+        chunks = [
+            HEADER.pack(MAGIC, VERSION, self.keyframe_interval, len(self),
+                        len(self.keyframes)),
+            struct.pack('>H', len(names)), names,
+            bytes(self.clues), bytes(self.steps)]
+
+        for step, values, eliminated in self.keyframes:
+            chunks.append(KEYFRAME.pack(step, *(list(values) + eliminated)))
+
+        return b''.join(chunks)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """ Reads a serialized trace.
+
+            Args:
+                - data (bytes): from to_bytes.
+
+            Returns:
+                - Trace
+        """
+        data = bytes(data)
+        try:
+            magic, version, interval, steps, keyframes = \
+                HEADER.unpack_from(data)
+        except struct.error:
+            raise ValueError("Invalid trace")
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Invalid trace")
+
+        pos = HEADER.size
+        size = struct.unpack_from('>H', data, pos)[0]
+        names = data[pos + 2:pos + 2 + size].decode('ascii').split(',')
+        pos += 2 + size
+
+        trace = cls([[0] * 9] * 9, names[:-1], interval)
+        trace.clues = bytearray(data[pos:pos + 81])
+        trace.steps = bytearray(data[pos + 81:pos + 81 + steps * 4])
+        pos += 81 + steps * 4
+
+        for i in range(keyframes):
+            frame = KEYFRAME.unpack_from(data, pos + i * KEYFRAME.size)
+            trace.keyframes.append(
+                (frame[0], bytearray(frame[1:82]), list(frame[82:])))
+
+        return trace
+
+
+def get_candidates(values, eliminated):
+    """ Gets the candidates of every cell of a replayed state.
+
+        Args:
+            - values (list): 81 flat values.
+            - eliminated (list): 81 eliminated candidate masks.
+
+        Returns:
+            - list: 81 lists of possible values, empty for known cells.
+    """
+    candidates = []
+
+    for idx in CELLS:
+        if values[idx]:
+            candidates.append([])
+            continue
+
+        known = eliminated[idx]
+        for peer in PEERS[idx]:
+            known |= BIT[values[peer]]
+        candidates.append(list(MASK_VALS[ALL_MASK & ~known]))
+
+    return candidates
@@ -0,0 +1,51 @@
+# Cell, unit and peer lookup tables, built once at import time.
+CELLS = range(81)  # flat cell indexes, idx = row * 9 + col
+
+SQUARE_DEFS = (
+    # (first_cell_row, first_cell_col, last_cell_row, last_cell_col) # SQR#
+    (0, 0, 2, 2),  # SQR0
+    (0, 3, 2, 5),  # SQR1
+    (0, 6, 2, 8),  # SQR2
+    (3, 0, 5, 2),  # SQR3
+    (3, 3, 5, 5),  # SQR4
+    (3, 6, 5, 8),  # SQR5
+    (6, 0, 8, 2),  # SQR6
+    (6, 3, 8, 5),  # SQR7
+    (6, 6, 8, 8))  # SQR8
+
+ROW_OF = tuple(idx // 9 for idx in CELLS)
+COL_OF = tuple(idx % 9 for idx in CELLS)
+SQR_OF = tuple((idx // 27) * 3 + (idx % 9) // 3 for idx in CELLS)
+
+ROWS = tuple(tuple(idx for idx in CELLS if ROW_OF[idx] == i)
+             for i in range(9))
+COLS = tuple(tuple(idx for idx in CELLS if COL_OF[idx] == j)
+             for j in range(9))
+SQRS = tuple(tuple(idx for idx in CELLS if SQR_OF[idx] == k)
+             for k in range(9))
+UNITS = ROWS + COLS + SQRS
+
+# (row, col, sqr) units of every cell
+CELL_UNITS = tuple((ROWS[ROW_OF[idx]], COLS[COL_OF[idx]], SQRS[SQR_OF[idx]])
+                   for idx in CELLS)
+
+# the 20 cells sharing a unit with every cell, sorted
+PEERS = tuple(tuple(sorted(set(CELL_UNITS[idx][0] + CELL_UNITS[idx][1] +
+                               CELL_UNITS[idx][2]) - set([idx])))
+              for idx in CELLS)
+
+
+def get_idx(i, j):
+    """ Gets a cell's flat index.
+
+        Args:
+            - i (int): row zero index
+            - j (int): column zero index
+
+        Returns:
+            - int: flat cell index
+    """
+    if not (0 <= i <= 8 and 0 <= j <= 8):
+        raise ValueError("Invalid cell")
+
+    return i * 9 + j
@@ -5,4 +5,11 @@ urlpatterns = [
     url(r'^$', solver_views.choose_method),
     url(r'numbers/', solver_views.input_numbers),
     url(r'test_solver/', solver_views.test_solver),
+    url(r'export/', solver_views.export_puzzles),
+    url(r'^solve/$', solver_views.solve),
+    url(r'^edit/$', solver_views.edit_cell),
+    url(r'^hint/$', solver_views.hint),
+    url(r'^jobs/$', solver_views.submit_job),
+    url(r'^jobs/(?P<job_id>\d+)/$', solver_views.job_status),
+    url(r'^puzzles/(?P<puzzle_id>\d+)/trace/$', solver_views.solving_trace),
 ]
@@ -0,0 +1,63 @@
+from __future__ import unicode_literals
+from .engine import BIT, UNIT_TYPES
+from .exceptions import InvalidPuzzleError
+from .units import SQR_OF
+
+
+def validate(grid, complete=False, min_clues=0):
+    """ Checks the 27 units of a puzzle in a single pass over its cells,
+        keeping a mask of the values seen in every unit, and stops at the
+        first value that breaks the rules.
+
+        Args:
+            - grid (list): 9x9 nested list, 0 means unknown value.
+            - complete (bool): whether unknown values are an error, for
+                solved puzzles.
+            - min_clues (int): known values the puzzle needs.
+
+        Returns:
+            - int: known values count.
+
+        Raises:
+            - InvalidPuzzleError: with the failing unit, if any.
+    """
+    masks = [0] * 27  # seen values, rows then cols then sqrs
+    known = 0
+    idx = 0
+
+    for i, row in enumerate(grid):
+        for j, val in enumerate(row):
+            if val == 0:
+                if complete:
+                    raise InvalidPuzzleError(
+                        "Missing value in row %i" % i, ('row', i))
+                idx += 1
+                continue
+            if not 1 <= val <= 9:
+                raise InvalidPuzzleError(
+                    "Invalid value %r in row %i" % (val, i), ('row', i))
+
+            bit = BIT[val]
+            for unit in (i, 9 + j, 18 + SQR_OF[idx]):
+                if masks[unit] & bit:
+                    unit = (UNIT_TYPES[unit // 9], unit % 9)
+                    raise InvalidPuzzleError(
+                        "Repeated value %i in %s %i" % ((val,) + unit), unit)
+                masks[unit] |= bit
+
+            known += 1
+            idx += 1
+
+    if known < min_clues:
+        raise InvalidPuzzleError("Fewer than %i known values" % min_clues)
+
+    return known
+
+
+def is_valid(grid, complete=False, min_clues=0):
+    """ Same as validate, as a bool. """
+    try:
+        validate(grid, complete, min_clues)
+    except InvalidPuzzleError:
+        return False
+    return True
@@ -1,8 +1,17 @@
-from django.shortcuts import render
-from .models import SudokuPuzzle
+import json
+from django.http import (
+    Http404, HttpResponse, HttpResponseBadRequest, JsonResponse,
+    StreamingHttpResponse)
+from django.shortcuts import get_object_or_404, render
+from django.utils import six
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from sudoku_solver import utils
+from . import engine, formats, hints, incremental, jobs, trace, validation
+from .models import SudokuPuzzle, SolveJob, DONE, MIN_CLUES
+from .units import get_idx
 from collections import OrderedDict
 import numpy as np
-from silk.profiling.profiler import silk_profile
 
 TESTS = ('easy', 'medium', 'hard')
 
@@ -15,7 +24,6 @@ def input_numbers(request):
     return render(request, 'input_numbers.html')
 
 
-@silk_profile()
 def test_solver(request):
     global TESTS
     unsolved_db = {}
@@ -26,41 +34,17 @@ def test_solver(request):
     context["tests"] = OrderedDict({})
 
     for test in TESTS:
-        f = open('static/txt/test_%s.txt' % test)
-        # sets key in this dictionaries to the name of the difficulty and the
-        # value as an empty puzzle
-        unsolved_db[test] = []
-        solved_db[test] = []
-        unsolved_disp[test] = []
-        f.readline()  # first line should contain 'UNSOLVED' so we skip it
-
-        for i in range(9):
-            row = f.readline()
-            row = row[0:-1]  # remove /n at the end
-            unsolved_db[test].append([])  # appends an empty row to
-            # the puzzle
-
-            for j in range(9):
-                unsolved_db[test][i].append(int(row[j]))
-                # appends a number to the row
-
-            row = row.replace('0', ' ')
-            unsolved_disp[test].append(row)
-
-        f.readline()  # skips line with 'SOLVED' text
-
-        for i in range(9):
-            row = f.readline()
-            row = row[0:-1]  # remove /n at the end
-            solved_db[test].append([])
-
-            for j in range(9):
-                solved_db[test][i].append(int(row[j]))
-
-        f.close()
-        puzzle = SudokuPuzzle(unsolved_puzzle=unsolved_db[test])
-        puzzle.save()
-        puzzle.solve()
+        with open('static/txt/test_%s.txt' % test, 'rb') as f:
+            record = next(formats.iter_records(f))
+
+        unsolved_db[test] = utils.str_to_grid(record[2])
+        solved_db[test] = utils.str_to_grid(record[3])
+        unsolved_disp[test] = [
+            record[2][i*9:i*9+9].replace('0', ' ') for i in range(9)]
+        puzzle = SudokuPuzzle.get_or_create_puzzle(unsolved_db[test])[0]
+
+        if not puzzle.solved:  # known puzzles keep their solution
+            puzzle.solve()
 
         if puzzle.solved and \
                 np.array_equal(solved_db[test], puzzle.solved_puzzle):
@@ -72,6 +56,272 @@ def test_solver(request):
             "unsolved": unsolved_disp[test],
             "solved": puzzle.solved_puzzle,
             "passed_test": passed_test[test],
+            "difficulty": puzzle.difficulty,
             "solving_time": puzzle.solving_time}
 
     return render(request, 'test_solver.html', context)
+
+
+def export_puzzles(request):
+    """ Streams the solved puzzles as a download. Takes a format GET
+        param, one of formats.EXPORT_FORMATS, and a gzip one.
+    """
+    fmt = request.GET.get('format', 'lines')
+    compress = request.GET.get('gzip') in ('1', 'true')
+
+    if fmt not in formats.EXPORT_FORMATS:
+        return HttpResponseBadRequest("Invalid export format")
+
+    rows = SudokuPuzzle.objects.filter(solved=True).order_by(
+        'pk').values_list(*formats.EXPORT_FIELDS).iterator()
+    response = StreamingHttpResponse(
+        formats.iter_bytes(formats.iter_export(rows, fmt), compress),
+        content_type=('application/gzip' if compress
+                      else formats.EXPORT_FORMATS[fmt]))
+    response['Content-Disposition'] = 'attachment; filename="%s"' % (
+        'puzzles.%s%s' % ('txt' if fmt == 'lines' else fmt,
+                          '.gz' if compress else ''))
+    return response
+
+
+def get_request_data(request):
+    """ Gets the params of an API request, sent either as a JSON object
+        or as a form.
+
+        Returns:
+            - dict
+
+        Raises:
+            - ValueError: if the JSON body is invalid.
+    """
+    if request.content_type == 'application/json':
+        data = json.loads(request.body.decode('utf-8'))
+
+        if not isinstance(data, dict):
+            raise ValueError("Invalid JSON object")
+        return data
+
+    return request.POST.dict()
+
+
+def get_flag(data, name, default):
+    """ Reads a boolean param, sent as JSON or as a form field. """
+    value = data.get(name, default)
+
+    if not isinstance(value, six.string_types):
+        return bool(value)  # JSON true, false, numbers and null
+    return value not in ('0', 'false', 'False', '')
+
+
+def get_job_data(job):
+    data = {'id': job.pk, 'status': job.status}
+
+    if job.status == DONE:
+        data.update(
+            solved=job.puzzle.solved,
+            correct=job.puzzle.correct,
+            solution=utils.grid_to_str(job.puzzle.solved_puzzle)
+            if job.puzzle.solved else None,
+            solving_time=job.puzzle.solving_time)
+    elif job.error:
+        data['error'] = job.error.strip().splitlines()[-1]
+
+    return data
+
+
+@csrf_exempt
+@require_POST
+def submit_job(request):
+    """ Queues a puzzle, given as an 81 character or 9x9 array puzzle
+        param, for run_solver_workers. An optional method param picks the
+        solving method. Responds with the job, see job_status, or with an
+        error if a value repeats in a unit or the puzzle hasn't got
+        exactly one solution.
+    """
+    try:
+        data = get_request_data(request)
+        grid = utils.parse_grid(data.get('puzzle', ''))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    method = data.get('method', '')
+    if method and method not in engine.METHODS:
+        return JsonResponse({'error': "Invalid solving method"}, status=400)
+
+    try:
+        job = jobs.submit(grid, method)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse(get_job_data(job), status=202)
+
+
+@require_GET
+def job_status(request, job_id):
+    """ Responds with a job's status, plus the solution once it's done. """
+    job = get_object_or_404(
+        SolveJob.objects.select_related('puzzle'), pk=job_id)
+    return JsonResponse(get_job_data(job))
+
+
+@csrf_exempt
+@require_POST
+def solve(request):
+    """ Solves a puzzle, given as an 81 character or 9x9 array puzzle
+        param, and responds with the solution in the same shape.
+
+        Optional params:
+            - method: one of engine.METHODS.
+            - persist: whether to store the puzzle, defaults to true.
+                Without it the database isn't touched.
+            - cache: whether to use the solution cache, defaults to
+                true. Repeated puzzles are looked up by their exact
+                fingerprint; only misses pay for canonicalizing.
+
+        Puzzles with a repeated value, or too few clues, are rejected
+        with the failing unit before anything is stored.
+    """
+    try:
+        data = get_request_data(request)
+        puzzle_param = data.get('puzzle', '')
+        grid = utils.parse_grid(puzzle_param)
+        validation.validate(grid, min_clues=MIN_CLUES)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    method = data.get('method') or None
+    if method is not None and method not in engine.METHODS:
+        return JsonResponse({'error': "Invalid solving method"}, status=400)
+
+    persist = get_flag(data, 'persist', True)
+    use_cache = get_flag(data, 'cache', True)
+
+    if persist:
+        puzzle = SudokuPuzzle.get_or_create_puzzle(grid)[0]
+        if not puzzle.solved:
+            puzzle.solve(method=method, use_cache=use_cache)
+    else:
+        puzzle = SudokuPuzzle(unsolved_puzzle=grid)
+        puzzle.solve(method=method, use_cache=use_cache, commit=False)
+
+    solution = None
+    if puzzle.solved and puzzle.correct:
+        solution = puzzle.solved_puzzle
+        if not isinstance(puzzle_param, list):
+            solution = utils.grid_to_str(solution)
+
+    return JsonResponse({
+        'id': puzzle.pk,
+        'solved': puzzle.solved and puzzle.correct,
+        'correct': puzzle.correct,
+        'solution': solution,
+        'solving_time': puzzle.solving_time})
+
+
+@csrf_exempt
+@require_POST
+def edit_cell(request):
+    """ Checks a puzzle after one of its cells is edited, without solving
+        it again while the previous solution still holds.
+
+        Params:
+            - puzzle: 81 character string or 9x9 array, before the edit.
+            - solution: the previous response's solution, if any.
+            - row, col: zero indexes of the edited cell.
+            - old, new: its value before and after the edit.
+
+        Responds with the edited puzzle and solution in the same shape,
+        the status, one of incremental's, and the candidates of the
+        edited cell and its peers, by flat index.
+    """
+    try:
+        data = get_request_data(request)
+        puzzle_param = data.get('puzzle', '')
+        grid = utils.parse_grid(puzzle_param)
+        solution = data.get('solution')
+        if solution is not None:
+            solution = utils.parse_grid(solution)
+
+        idx = get_idx(int(data['row']), int(data['col']))
+        state = incremental.EditState(grid, solution)
+        candidates = state.edit(idx, int(data['old']), int(data['new']))
+    except (KeyError, TypeError, ValueError) as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    status = state.get_status()
+    grid = state.get_grid()
+    solution = state.get_solution()
+    if not isinstance(puzzle_param, list):
+        grid = utils.grid_to_str(grid)
+        solution = solution and utils.grid_to_str(solution)
+
+    return JsonResponse({
+        'puzzle': grid,
+        'status': status,
+        'solution': solution,
+        'candidates': dict((i, sorted(vals))
+                           for i, vals in candidates.items())})
+
+
+@require_GET
+def solving_trace(request, puzzle_id):
+    """ Responds with the trace.Trace bytes of a puzzle's last solve,
+        for clients replaying it themselves. With a step GET param,
+        responds instead with that step and the state after it as JSON.
+    """
+    puzzle = get_object_or_404(
+        SudokuPuzzle.objects.only('solving_trace'), pk=puzzle_id)
+    if puzzle.solving_trace is None:
+        raise Http404("Puzzle without trace")
+
+    if 'step' not in request.GET:
+        return HttpResponse(bytes(puzzle.solving_trace),
+                            content_type='application/octet-stream')
+
+    recorder = trace.Trace.from_bytes(puzzle.solving_trace)
+    try:
+        step = int(request.GET['step'])
+    except ValueError:
+        step = -1
+    if not 0 <= step < len(recorder):
+        return JsonResponse({'error': "Invalid step"}, status=400)
+
+    values, eliminated = recorder.get_state(step + 1)
+
+    op, technique, idx, val = recorder.get_step(step)
+    return JsonResponse({
+        'step': step,
+        'steps': len(recorder),
+        'op': op,
+        'technique': technique,
+        'row': idx // 9,
+        'col': idx % 9,
+        'value': val,
+        'puzzle': ''.join(str(val) for val in values),
+        'candidates': trace.get_candidates(values, eliminated)})
+
+
+@csrf_exempt
+@require_POST
+def hint(request):
+    """ Responds with the next value to fill in a puzzle, given as an 81
+        character or 9x9 array puzzle param: its cell, the technique that
+        finds it and the units supporting it. The hint is null once every
+        value is known.
+    """
+    try:
+        data = get_request_data(request)
+        found = hints.get_hint(utils.parse_grid(data.get('puzzle', '')))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    if found is None:
+        return JsonResponse({'hint': None})
+
+    idx, val, technique, supporting = found
+    return JsonResponse({'hint': {
+        'row': idx // 9,
+        'col': idx % 9,
+        'value': val,
+        'technique': technique,
+        'units': [{'type': kind, 'index': index}
+                  for kind, index in supporting]}})
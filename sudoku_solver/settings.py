@@ -132,4 +132,15 @@ STATICFILES_DIRS = [
 ]
 
 # Silk
-SILKY_PYTHON_PROFILER = True
+SILKY_PYTHON_PROFILER = False  # per call profiles, see SOLVER_PROFILE_RATE
+SILKY_IGNORE_PATHS = [  # recording takes 4 queries a call
+    '/solver/solve/', '/solver/edit/', '/solver/hint/']
+
+# Solver
+SOLVER_METHOD = 'logic'  # 'logic' or 'dlx', see solver.engine.METHODS
+SOLVER_CACHE_SIZE = 1024  # solutions cached per process, 0 disables it
+SOLVER_CACHE_ALIAS = None  # CACHES alias shared between processes
+SOLVER_CACHE_CANONICAL = True  # share entries between symmetric puzzles
+SOLVER_PROFILE_RATE = 0  # fraction of solves profiled by phase, 0 disables it
+SOLVER_TRACE = False  # record solving steps, see solver.trace
+SOLVER_HINT_CACHE_SIZE = 1024  # hints memoized per process
@@ -10,3 +10,44 @@ class UtilsTestCase(TestCase):
         act_arr = utils.remove_zeroes(arr)  # actual list
 
         self.assertTrue(np.array_equal(exp_arr, act_arr))
+
+    def test_grid_to_str(self):
+        grid = [[0] * 9 for i in range(9)]
+        grid[0][0] = 5
+        grid[8][8] = 9
+
+        self.assertEqual(utils.grid_to_str(grid), '5' + '0' * 79 + '9')
+
+    def test_str_to_grid(self):
+        string = '5' + '.' * 79 + '9\n'
+        grid = utils.str_to_grid(string)
+
+        self.assertEqual(grid[0], [5, 0, 0, 0, 0, 0, 0, 0, 0])
+        self.assertEqual(grid[8][8], 9)
+        self.assertEqual(utils.grid_to_str(grid), '5' + '0' * 79 + '9')
+
+    def test_get_fingerprint(self):
+        grid = [[0] * 9 for i in range(9)]
+        fingerprint = utils.get_fingerprint(grid)
+        grid[8][8] = 9
+
+        self.assertEqual(len(fingerprint), 64)
+        self.assertNotEqual(utils.get_fingerprint(grid), fingerprint)
+
+    def test_parse_grid(self):
+        grid = [[0] * 9 for i in range(9)]
+        grid[8][8] = 9
+
+        self.assertEqual(utils.parse_grid(grid), grid)
+        self.assertEqual(utils.parse_grid('0' * 80 + '9'), grid)
+
+        for value in (grid[:8], [[0] * 9] * 8 + [[0] * 8 + [10]],
+                      [[0] * 9] * 8 + [[0] * 8 + [True]], {}):
+            with self.assertRaises(ValueError):
+                utils.parse_grid(value)
+
+    def test_str_to_grid_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            utils.str_to_grid('123')
+        with self.assertRaises(ValueError):
+            utils.str_to_grid('x' * 81)
@@ -1,3 +1,59 @@
+import hashlib
+from django.utils import six
+
+
 def remove_zeroes(arr):
     # removes zeroes from arr
     return filter(lambda x: x != 0, arr)
+
+
+def grid_to_str(grid):
+    """ Converts a 9x9 grid to its 81 digit string, row by row. """
+    return ''.join(str(val) for row in grid for val in row)
+
+
+def str_to_grid(string):
+    """ Converts an 81 character string, row by row, to a 9x9 grid.
+        Unknown values may be written as 0 or '.'.
+
+        Args:
+            - string (str)
+
+        Returns:
+            - list: 9x9 nested list of ints.
+    """
+    string = string.strip().replace('.', '0')
+
+    if len(string) != 81 or not string.isdigit():
+        raise ValueError("Invalid puzzle string")
+
+    return [[int(val) for val in string[i*9:i*9+9]] for i in range(9)]
+
+
+def get_fingerprint(grid):
+    """ Gets the sha256 hex digest of a grid's 81 digit string. Equal
+        grids, and only them, share it.
+    """
+    return hashlib.sha256(grid_to_str(grid).encode('ascii')).hexdigest()
+
+
+def parse_grid(value):
+    """ Reads a puzzle given either as a string, see str_to_grid, or as
+        a 9x9 nested list, e.g. from JSON.
+
+        Args:
+            - value (str or list)
+
+        Returns:
+            - list: 9x9 nested list of ints.
+    """
+    if isinstance(value, six.string_types):
+        return str_to_grid(value)
+
+    if not isinstance(value, list) or len(value) != 9 or any(
+            not isinstance(row, list) or len(row) != 9 or any(
+                type(val) is not int or not 0 <= val <= 9 for val in row)
+            for row in value):
+        raise ValueError("Invalid puzzle")
+
+    return [list(row) for row in value]